@@ -26,7 +26,10 @@ CREATE TABLE chunk (
     document_id TEXT NOT NULL REFERENCES document,
     page_number INT,
     chunk_text TEXT,
-    embedding VECTOR(768)
+    embedding VECTOR(768),
+    embedding_f16 VECF16(768),    -- Half-precision copy for quantized candidate scans
+    embedding_bin BVECTOR(768),   -- Sign bits for Hamming-distance candidate scans
+    embedding_multilingual VECTOR(768)  -- paraphrase-multilingual-mpnet-base-v2 embedding
 );
 
 CREATE TABLE audit (
@@ -38,10 +41,22 @@ CREATE TABLE audit (
     chunk_texts TEXT[],           -- Chunks passed to the LLM
     response TEXT,
     language_code VARCHAR(10),
+    llm_calls INTEGER,            -- Ollama calls made for the request
+    prompt_tokens INTEGER,        -- Sum of prompt_eval_count
+    output_tokens INTEGER,        -- Sum of eval_count
+    eval_seconds REAL,            -- Sum of eval_duration (output generation time)
+    llm_seconds REAL,             -- Sum of total_duration
+    token_usage JSONB,            -- Per-stage breakdown (safety, rerank, answer)
     event_time TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
 );
 
 CREATE INDEX pgroonga_chunk_text_index ON chunk USING pgroonga (chunk_text);
+-- Candidate scans of quantized search: cosine on half precision, Hamming (squared Euclidean on
+-- bits) on sign bits
+CREATE INDEX idx_chunk_embedding_f16
+    ON chunk USING vectors (embedding_f16 vecf16_cos_ops) WITH (options = $$[indexing.hnsw]$$);
+CREATE INDEX idx_chunk_embedding_bin
+    ON chunk USING vectors (embedding_bin bvector_l2_ops) WITH (options = $$[indexing.hnsw]$$);
 
 -- Table for storing user tokens
 CREATE TABLE IF NOT EXISTS user_tokens (
@@ -65,6 +80,7 @@ CREATE TABLE IF NOT EXISTS chat_history (
     dts BIGINT NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    version INTEGER NOT NULL DEFAULT 1,   -- Incremented on every save
     UNIQUE (chat_id, session_id, model)
 );
 
@@ -73,3 +89,31 @@ CREATE INDEX idx_chat_history_chat_id ON chat_history(chat_id);
 CREATE INDEX idx_chat_history_session_id ON chat_history(session_id);
 CREATE INDEX idx_chat_history_model ON chat_history(model);
 CREATE INDEX idx_chat_history_dts ON chat_history(dts DESC);
+-- Sidebar listing: a user's chats, newest first (keyset pagination on dts, chat_id)
+CREATE INDEX idx_chat_history_user_model_dts ON chat_history(user_email, model, dts DESC, chat_id DESC);
+
+-- Chat messages, appended one row per message (chat_history.messages is kept for old rows)
+CREATE TABLE IF NOT EXISTS chat_message (
+    chat_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,   -- 0-based position in the conversation
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    message_id TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (chat_id, seq)
+);
+
+-- Rolling summary of the older turns of a chat (conversation memory), covering messages up to through_seq
+CREATE TABLE IF NOT EXISTS chat_summary (
+    chat_id TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    through_seq INTEGER NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Persistent tier of the translation cache (used when TRANSLATION_CACHE_BACKEND=postgres)
+CREATE TABLE IF NOT EXISTS translation_cache (
+    cache_key TEXT PRIMARY KEY,   -- source:target:sha256(text)
+    translation TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
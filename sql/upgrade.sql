@@ -0,0 +1,82 @@
+-- Idempotent schema upgrades for databases created from an older init.sql.
+-- Run with: psql -U postgres -d smart -f upgrade.sql
+\connect smart;
+
+-- Quantized copies of chunk embeddings for two-stage vector search
+ALTER TABLE chunk ADD COLUMN IF NOT EXISTS embedding_f16 VECF16(768);
+ALTER TABLE chunk ADD COLUMN IF NOT EXISTS embedding_bin BVECTOR(768);
+
+-- Fill the quantized copies of chunks embedded before the columns existed (the candidate scan
+-- skips rows without them)
+UPDATE chunk
+SET embedding_f16 = embedding::vecf16,
+    embedding_bin = binarize(embedding)
+WHERE embedding IS NOT NULL AND (embedding_f16 IS NULL OR embedding_bin IS NULL);
+
+-- Candidate scans: cosine on half precision, Hamming (squared Euclidean on bits) on sign bits
+CREATE INDEX IF NOT EXISTS idx_chunk_embedding_f16
+    ON chunk USING vectors (embedding_f16 vecf16_cos_ops) WITH (options = $$[indexing.hnsw]$$);
+CREATE INDEX IF NOT EXISTS idx_chunk_embedding_bin
+    ON chunk USING vectors (embedding_bin bvector_l2_ops) WITH (options = $$[indexing.hnsw]$$);
+
+-- Persistent tier of the translation cache (used when TRANSLATION_CACHE_BACKEND=postgres)
+CREATE TABLE IF NOT EXISTS translation_cache (
+    cache_key TEXT PRIMARY KEY,   -- source:target:sha256(text)
+    translation TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Multilingual chunk embeddings (used when RETRIEVAL_MODE=multilingual)
+ALTER TABLE chunk ADD COLUMN IF NOT EXISTS embedding_multilingual VECTOR(768);
+
+-- Token usage and model time per request, from Ollama response counters
+ALTER TABLE audit ADD COLUMN IF NOT EXISTS llm_calls INTEGER;
+ALTER TABLE audit ADD COLUMN IF NOT EXISTS prompt_tokens INTEGER;
+ALTER TABLE audit ADD COLUMN IF NOT EXISTS output_tokens INTEGER;
+ALTER TABLE audit ADD COLUMN IF NOT EXISTS eval_seconds REAL;
+ALTER TABLE audit ADD COLUMN IF NOT EXISTS llm_seconds REAL;
+ALTER TABLE audit ADD COLUMN IF NOT EXISTS token_usage JSONB;
+
+-- Row version of chat_history, returned by the save_chat upsert
+ALTER TABLE chat_history ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+
+-- Chat messages, appended one row per message instead of rewriting chat_history.messages
+CREATE TABLE IF NOT EXISTS chat_message (
+    chat_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,   -- 0-based position in the conversation
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    message_id TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (chat_id, seq)
+);
+
+-- Move existing JSONB message arrays into chat_message (the longest array wins when a chat
+-- has rows for several sessions), then clear the arrays
+INSERT INTO chat_message (chat_id, seq, role, content, message_id, created_at)
+SELECT latest.chat_id, element.ordinality - 1, element.value->>'role',
+       COALESCE(element.value->>'content', ''), element.value->>'message_id', latest.updated_at
+FROM (
+    SELECT DISTINCT ON (chat_id) chat_id, messages, updated_at
+    FROM chat_history
+    WHERE jsonb_array_length(messages) > 0
+    ORDER BY chat_id, jsonb_array_length(messages) DESC, updated_at DESC
+) AS latest
+CROSS JOIN LATERAL jsonb_array_elements(latest.messages) WITH ORDINALITY AS element(value, ordinality)
+ON CONFLICT (chat_id, seq) DO NOTHING;
+
+UPDATE chat_history SET messages = '[]'::jsonb
+WHERE jsonb_array_length(messages) > 0
+  AND EXISTS (SELECT 1 FROM chat_message WHERE chat_message.chat_id = chat_history.chat_id);
+
+-- Sidebar listing: a user's chats, newest first (keyset pagination on dts, chat_id)
+CREATE INDEX IF NOT EXISTS idx_chat_history_user_model_dts
+    ON chat_history(user_email, model, dts DESC, chat_id DESC);
+
+-- Rolling summary of the older turns of a chat (conversation memory), covering messages up to through_seq
+CREATE TABLE IF NOT EXISTS chat_summary (
+    chat_id TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    through_seq INTEGER NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
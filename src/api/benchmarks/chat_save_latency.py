@@ -0,0 +1,148 @@
+"""
+Write-Latency Benchmark for Chat Saves
+
+Measures per-turn latency of persisting a chat, as done on every message:
+
+- `legacy`: SELECT COUNT(*), then UPDATE or INSERT (two round trips, the previous save_chat)
+- `upsert`: one INSERT ... ON CONFLICT ... DO UPDATE ... RETURNING version (ChatHistoryManager)
+
+Each simulated chat grows by one user/assistant pair per turn. Rows are written under a
+dedicated model name and deleted afterwards.
+
+Usage (from src/api, with the database configured through DB_* environment variables):
+    python -m benchmarks.chat_save_latency --chats 20 --turns 20
+"""
+
+import argparse
+import json
+import statistics
+import time
+import uuid
+
+from sqlalchemy import text
+
+from utils.chat_history import ChatHistoryManager
+from utils.database import SessionLocal
+
+BENCHMARK_MODEL = "benchmark-chat-save"
+BENCHMARK_USER = "benchmark@example.com"
+
+
+def legacy_save(chat, user_email, session_id, model):
+    """The previous two-statement save (count, then update or insert)."""
+    db_session = SessionLocal()
+    try:
+        params = {
+            "chat_id": chat["chat_id"],
+            "session_id": session_id,
+            "user_email": user_email,
+            "model": model,
+            "title": chat["title"],
+            "messages": json.dumps(chat["messages"], ensure_ascii=False),
+            "dts": chat["dts"],
+        }
+        exists = db_session.execute(
+            text(
+                "SELECT COUNT(*) FROM chat_history "
+                "WHERE chat_id = :chat_id AND user_email = :user_email AND model = :model"
+            ),
+            params,
+        ).scalar()
+        if exists:
+            sql = """
+            UPDATE chat_history
+            SET title = :title, messages = :messages, dts = :dts, updated_at = CURRENT_TIMESTAMP
+            WHERE chat_id = :chat_id AND session_id = :session_id AND model = :model
+            """
+        else:
+            sql = """
+            INSERT INTO chat_history (
+                chat_id, session_id, user_email, model, title, messages, dts, created_at, updated_at
+            ) VALUES (
+                :chat_id, :session_id, :user_email, :model, :title, :messages, :dts,
+                CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+            )
+            """
+        db_session.execute(text(sql), params)
+        db_session.commit()
+    finally:
+        db_session.close()
+
+
+def cleanup():
+    """Delete the rows written by the benchmark."""
+    db_session = SessionLocal()
+    try:
+        # Messages first: they are only reachable through the benchmark chats' ids
+        sql = """
+        WITH deleted_messages AS (
+            DELETE FROM chat_message
+            WHERE chat_id IN (SELECT chat_id FROM chat_history WHERE model = :model)
+        )
+        DELETE FROM chat_history WHERE model = :model
+        """
+        db_session.execute(text(sql), {"model": BENCHMARK_MODEL})
+        db_session.commit()
+    finally:
+        db_session.close()
+
+
+def run_benchmark(chats: int, turns: int, answer_chars: int):
+    """Run both save strategies and return one result row per strategy."""
+    manager = ChatHistoryManager(model=BENCHMARK_MODEL)
+    strategies = {
+        "legacy": lambda chat, session_id: legacy_save(
+            chat, BENCHMARK_USER, session_id, BENCHMARK_MODEL
+        ),
+        "upsert": lambda chat, session_id: manager.save_chat(chat, BENCHMARK_USER, session_id),
+    }
+
+    results = []
+    for name, save in strategies.items():
+        latencies = []
+        try:
+            for _ in range(chats):
+                chat = {
+                    "chat_id": str(uuid.uuid4()),
+                    "title": "Benchmark chat",
+                    "dts": int(time.time()),
+                    "messages": [],
+                }
+                session_id = str(uuid.uuid4())
+                for turn in range(turns):
+                    chat["messages"] += [
+                        {"role": "user", "content": f"Question {turn}?"},
+                        {"role": "assistant", "content": "x" * answer_chars},
+                    ]
+                    start = time.perf_counter()
+                    save(chat, session_id)
+                    latencies.append(1000 * (time.perf_counter() - start))
+        finally:
+            cleanup()
+
+        ordered = sorted(latencies)
+        results.append(
+            {
+                "strategy": name,
+                "saves": len(latencies),
+                "mean_ms": round(statistics.mean(latencies), 3),
+                "p50_ms": round(ordered[len(ordered) // 2], 3),
+                "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))], 3),
+            }
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-turn write latency of chat saves")
+    parser.add_argument("--chats", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--answer-chars", type=int, default=1500)
+    args = parser.parse_args()
+
+    for row in run_benchmark(args.chats, args.turns, args.answer_chars):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
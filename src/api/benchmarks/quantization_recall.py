@@ -0,0 +1,104 @@
+"""
+Recall Benchmark for Quantized Two-Stage Vector Search
+
+Measures recall@k of the half-precision and binary candidate scans (followed by
+full-precision rescoring) against exact cosine search, for several candidate pool sizes.
+
+The corpus is either synthetic (clustered Gaussian vectors, the default) or loaded from
+the `chunk` table. Queries are perturbed copies of corpus vectors.
+
+Usage (from src/api):
+    python -m benchmarks.quantization_recall --corpus-size 20000 --queries 200
+    python -m benchmarks.quantization_recall --from-db --queries 200
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from rag_pipeline.quantization import bytes_per_vector, exact_top_k, recall_at_k, two_stage_top_k
+
+
+def synthetic_corpus(size: int, dimensions: int, clusters: int, seed: int) -> np.ndarray:
+    """Generate clustered embeddings that resemble sentence-transformer output."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimensions)).astype(np.float32)
+    assignment = rng.integers(0, clusters, size=size)
+    corpus = centers[assignment] + 1.5 * rng.normal(size=(size, dimensions)).astype(np.float32)
+    return corpus
+
+
+def load_corpus_from_db(limit: int) -> np.ndarray:
+    """Load chunk embeddings from PostgreSQL."""
+    from sqlalchemy import text
+
+    from utils.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        rows = session.execute(
+            text("SELECT embedding::text FROM chunk LIMIT :limit"), {"limit": limit}
+        ).fetchall()
+    finally:
+        session.close()
+    return np.array([json.loads(row[0]) for row in rows], dtype=np.float32)
+
+
+def run_benchmark(corpus: np.ndarray, queries: int, k: int, candidate_ks, seed: int):
+    """Run the recall benchmark and return one result row per (mode, candidate_k)."""
+    rng = np.random.default_rng(seed + 1)
+    query_rows = rng.choice(len(corpus), size=min(queries, len(corpus)), replace=False)
+    query_vectors = corpus[query_rows] + 1.0 * rng.normal(
+        size=(len(query_rows), corpus.shape[1])
+    ).astype(np.float32)
+
+    exact = [exact_top_k(q, corpus, k) for q in query_vectors]
+
+    results = []
+    for mode in ("halfvec", "binary"):
+        for candidate_k in candidate_ks:
+            start = time.perf_counter()
+            recalls = [
+                recall_at_k(expected, two_stage_top_k(q, corpus, k, mode, candidate_k))
+                for q, expected in zip(query_vectors, exact)
+            ]
+            elapsed = time.perf_counter() - start
+            results.append(
+                {
+                    "mode": mode,
+                    "candidate_k": candidate_k,
+                    "recall_at_k": round(float(np.mean(recalls)), 4),
+                    "ms_per_query": round(1000 * elapsed / len(query_vectors), 3),
+                    "bytes_per_vector": bytes_per_vector(corpus.shape[1], mode),
+                }
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall benchmark for quantized vector search")
+    parser.add_argument("--from-db", action="store_true", help="Use chunk embeddings from DB")
+    parser.add_argument("--corpus-size", type=int, default=20000)
+    parser.add_argument("--dimensions", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--candidate-k", type=int, nargs="+", default=[50, 100, 200, 400])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.from_db:
+        corpus = load_corpus_from_db(args.corpus_size)
+    else:
+        corpus = synthetic_corpus(args.corpus_size, args.dimensions, args.clusters, args.seed)
+
+    print(f"Corpus: {corpus.shape[0]} vectors x {corpus.shape[1]} dimensions")
+    print(f"Full precision: {bytes_per_vector(corpus.shape[1], 'off')} bytes/vector")
+    for row in run_benchmark(corpus, args.queries, args.k, args.candidate_k, args.seed):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -12,10 +12,13 @@ Features:
 - Offers usage analytics and query reports under `/api/reports`
 - Supports cookie-based session persistence and CORS headers
 - Includes a lightweight health check endpoint at `/health`
+- Preloads the Ollama models at startup and keeps them resident
+- Load-balances Ollama requests across `OLLAMA_HOSTS` with background health checks
 
 Environment Variables:
 - `SESSION_SECRET_KEY`: Key for encrypting session cookies
 - `FRONTEND_URL`: Allowed origin(s) for CORS requests
+- `OLLAMA_PRELOAD_ON_STARTUP`: Set to 0 to skip model preloading and residency refresh
 
 Routers:
 - `/auth`: Handles Google OAuth login and callbacks
@@ -28,6 +31,9 @@ import os
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from rag_pipeline.config import OLLAMA_PRELOAD_ON_STARTUP
+from rag_pipeline.model_residency import get_residency_manager
+from rag_pipeline.ollama_pool import get_ollama_pool
 from routers.auth_google import router as google_router
 from routers.chat_api import router as query_router
 from routers.reports import router as reports_router
@@ -36,6 +42,21 @@ from starlette.middleware.sessions import SessionMiddleware
 
 app = FastAPI()
 
+
+@app.on_event("startup")
+async def start_model_residency():
+    # Health-check the Ollama hosts, then preload the models and keep them resident
+    get_ollama_pool().start()
+    if OLLAMA_PRELOAD_ON_STARTUP:
+        get_residency_manager().start()
+
+
+@app.on_event("shutdown")
+async def stop_model_residency():
+    await get_residency_manager().stop()
+    await get_ollama_pool().stop()
+
+
 # Required middleware for OAuth to use session storage
 app.add_middleware(
     SessionMiddleware,
@@ -7,12 +7,86 @@ import logging
 
 # Ollama API endpoints
 OLLAMA_HOST = os.getenv("OLLAMA_HOST", "localhost")
-OLLAMA_URL = f"http://{OLLAMA_HOST}:11434/api/generate"
+OLLAMA_BASE_URL = f"http://{OLLAMA_HOST}:11434"
+OLLAMA_URL = f"{OLLAMA_BASE_URL}/api/generate"
+# Ollama hosts load-balanced by the endpoint pool (comma separated; defaults to OLLAMA_HOST)
+OLLAMA_HOSTS = [
+    host.strip() for host in os.getenv("OLLAMA_HOSTS", OLLAMA_HOST).split(",") if host.strip()
+]
+# Pool health checks, and ejection of hosts after consecutive failures
+OLLAMA_HEALTH_INTERVAL = float(os.getenv("OLLAMA_HEALTH_INTERVAL", "15"))
+OLLAMA_EJECT_AFTER = int(os.getenv("OLLAMA_EJECT_AFTER", "3"))
+OLLAMA_EJECT_SECONDS = float(os.getenv("OLLAMA_EJECT_SECONDS", "30"))
 # OLLAMA_MODEL = "gemma3:12b"
 OLLAMA_MODEL = "llama3:8b"
 RERANKER_MODEL = "llama3:8b"
 SAFETY_MODEL = "llama-guard3:8b"
+# Small model that maintains the rolling conversation summaries
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "llama3.2:1b")
 EMBEDDING_MODEL = "all-mpnet-base-v2"
+MULTILINGUAL_EMBEDDING_MODEL = "paraphrase-multilingual-mpnet-base-v2"
+
+# Model residency: keep_alive sent with every request, models preloaded at startup, and the
+# refresh loop that pings models expiring within OLLAMA_REFRESH_MARGIN seconds
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_PRELOAD_MODELS = [
+    model.strip()
+    for model in os.getenv(
+        "OLLAMA_PRELOAD_MODELS",
+        ",".join([OLLAMA_MODEL, RERANKER_MODEL, SAFETY_MODEL, SUMMARY_MODEL]),
+    ).split(",")
+    if model.strip()
+]
+OLLAMA_PRELOAD_ON_STARTUP = os.getenv("OLLAMA_PRELOAD_ON_STARTUP", "1") == "1"
+OLLAMA_REFRESH_INTERVAL = float(os.getenv("OLLAMA_REFRESH_INTERVAL", "60"))
+OLLAMA_REFRESH_MARGIN = float(os.getenv("OLLAMA_REFRESH_MARGIN", "300"))
+# A load_duration above this many seconds is counted as a cold load
+OLLAMA_COLD_LOAD_SECONDS = float(os.getenv("OLLAMA_COLD_LOAD_SECONDS", "1.0"))
+
+# Per-stage latency budgets: timeout = recent p95 x multiplier, clamped to [floor, ceiling]
+STAGE_TIMEOUT_CEILINGS = {
+    "safety": float(os.getenv("SAFETY_TIMEOUT_CEILING", "60")),
+    "rerank": float(os.getenv("RERANK_TIMEOUT_CEILING", "60")),
+    "generate": float(os.getenv("GENERATE_TIMEOUT_CEILING", "600")),
+    "summarize": float(os.getenv("SUMMARIZE_TIMEOUT_CEILING", "120")),
+}
+STAGE_TIMEOUT_FLOOR = float(os.getenv("STAGE_TIMEOUT_FLOOR", "5"))
+STAGE_TIMEOUT_MULTIPLIER = float(os.getenv("STAGE_TIMEOUT_MULTIPLIER", "2.0"))
+# Circuit breaker: consecutive failures before opening, and seconds before a trial call
+OLLAMA_BREAKER_FAILURES = int(os.getenv("OLLAMA_BREAKER_FAILURES", "5"))
+OLLAMA_BREAKER_RESET_SECONDS = float(os.getenv("OLLAMA_BREAKER_RESET_SECONDS", "30"))
+
+# LLM request scheduler: total concurrent Ollama calls, per-class caps (classes in priority
+# order: answer > safety > rerank > batch) and the queue bound above which chat requests get 429
+SCHEDULER_MAX_CONCURRENCY = int(
+    os.getenv("SCHEDULER_MAX_CONCURRENCY", str(4 * max(1, len(OLLAMA_HOSTS))))
+)
+SCHEDULER_CLASS_LIMITS = {
+    "answer": int(os.getenv("SCHEDULER_ANSWER_LIMIT", str(SCHEDULER_MAX_CONCURRENCY))),
+    "safety": int(os.getenv("SCHEDULER_SAFETY_LIMIT", str(SCHEDULER_MAX_CONCURRENCY))),
+    "rerank": int(os.getenv("SCHEDULER_RERANK_LIMIT", str(max(1, SCHEDULER_MAX_CONCURRENCY // 2)))),
+    "batch": int(os.getenv("SCHEDULER_BATCH_LIMIT", str(max(1, SCHEDULER_MAX_CONCURRENCY // 4)))),
+}
+SCHEDULER_MAX_QUEUE = int(os.getenv("SCHEDULER_MAX_QUEUE", "64"))
+
+# Coalesce identical concurrent LLM calls and pipeline runs into one execution
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "1") == "1"
+
+# Generation API: "chat" sends structured messages to /api/chat so the system prompt and
+# history form a stable prefix Ollama can reuse from its KV cache; "generate" sends a flat prompt
+GENERATION_API = os.getenv("GENERATION_API", "chat").lower()
+# History messages sent per turn; the window advances in blocks of this size so the history
+# prefix stays identical across consecutive turns (between N and 2N-1 messages are sent)
+CHAT_HISTORY_MESSAGES = int(os.getenv("CHAT_HISTORY_MESSAGES", "6"))
+# Latest messages loaded from chat_message to continue a chat (enough for any history window)
+CHAT_CONTEXT_MESSAGES = int(os.getenv("CHAT_CONTEXT_MESSAGES", str(2 * CHAT_HISTORY_MESSAGES)))
+# Estimated tokens of raw history sent per turn; older messages are replaced by the chat's
+# rolling summary (see conversation_memory.py)
+CHAT_HISTORY_TOKENS = int(os.getenv("CHAT_HISTORY_TOKENS", "1500"))
+# Characters of each message passed to the summarizer
+SUMMARY_MESSAGE_CHARS = int(os.getenv("SUMMARY_MESSAGE_CHARS", "2000"))
+# Chats whose Ollama host is remembered for KV-cache affinity
+CHAT_AFFINITY_SIZE = int(os.getenv("CHAT_AFFINITY_SIZE", "10000"))
 
 # Configure logging
 logging.basicConfig(
@@ -29,12 +103,90 @@ GENERATION_CONFIG = {
     "stream": False,
 }
 
+# Generation profiles per stage, sent as Ollama `options`: num_predict caps the output tokens,
+# num_ctx sizes the context window and stop sequences end the output early
+GENERATION_PROFILES = {
+    "safety": {
+        "temperature": 0.0,
+        "num_predict": int(os.getenv("SAFETY_MAX_TOKENS", "48")),
+        "num_ctx": 2048,
+        "stop": ["\n\n", "</safety_prompt>"],
+    },
+    "rerank": {
+        "temperature": 0.1,
+        "num_predict": int(os.getenv("RERANK_MAX_TOKENS", "8")),
+        "num_ctx": 2048,
+        "stop": ["\n"],
+    },
+    "answer": {
+        "temperature": GENERATION_CONFIG["temperature"],
+        "top_p": GENERATION_CONFIG["top_p"],
+        "repeat_penalty": GENERATION_CONFIG["repeat_penalty"],
+        "num_predict": int(os.getenv("ANSWER_MAX_TOKENS", "1024")),
+        "num_ctx": int(os.getenv("ANSWER_NUM_CTX", "8192")),
+        "stop": ["\nUSER QUERY:"],
+    },
+    "summary": {
+        "temperature": 0.1,
+        "num_predict": int(os.getenv("SUMMARY_MAX_TOKENS", "256")),
+        "num_ctx": 4096,
+    },
+}
+
 # Token limits
 MAX_INPUT_TOKENS = 4000
 
 # Vector search threshold
 VECTOR_SIMILARITY_THRESHOLD = 0.3
 
+# Two-stage quantized vector search: "off" (full vectors only), "halfvec" or "binary"
+QUANTIZED_SEARCH_MODE = os.getenv("QUANTIZED_SEARCH_MODE", "off").lower()
+# Candidates fetched by the quantized scan before rescoring with full vectors
+QUANTIZED_CANDIDATE_K = int(os.getenv("QUANTIZED_CANDIDATE_K", "100"))
+
+# Translation cache: in-process LRU size and persistent tier ("sqlite", "postgres", "kv" for the
+# shared key-value store, or "memory")
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "5000"))
+TRANSLATION_CACHE_BACKEND = os.getenv("TRANSLATION_CACHE_BACKEND", "sqlite").lower()
+TRANSLATION_CACHE_PATH = os.getenv(
+    "TRANSLATION_CACHE_PATH", "/persistent/translation_cache.sqlite3"
+)
+
+# Translation backend ("google", "local" or "standin"), worker threads and per-call timeout
+TRANSLATION_BACKEND = os.getenv("TRANSLATION_BACKEND", "google").lower()
+TRANSLATION_MAX_WORKERS = int(os.getenv("TRANSLATION_MAX_WORKERS", "8"))
+TRANSLATION_TIMEOUT = float(os.getenv("TRANSLATION_TIMEOUT", "15"))
+
+# Response back-translation: maximum characters per segment and concurrent segment requests
+TRANSLATION_SEGMENT_CHARS = int(os.getenv("TRANSLATION_SEGMENT_CHARS", "1500"))
+TRANSLATION_CONCURRENCY = int(os.getenv("TRANSLATION_CONCURRENCY", "4"))
+
+# Retrieval for non-English questions: "translate" (translate to English and back) or
+# "multilingual" (embed the native question against chunk.embedding_multilingual and
+# ask the LLM to answer in the user's language)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "translate").lower()
+MULTILINGUAL_EMBEDDING_COLUMN = "embedding_multilingual"
+# Seconds the check that every chunk has a multilingual embedding is cached (multilingual
+# mode falls back to translation until the column is filled)
+MULTILINGUAL_CHECK_TTL = float(os.getenv("MULTILINGUAL_CHECK_TTL", "300"))
+
+# Safety checks: "shadow" (every query goes to Llama Guard, and the verdict the local tiers
+# would have given is compared with it), "tiered" (local rules and classifier first, Llama
+# Guard for ambiguous queries; only enable once the shadow agreement rate has been measured)
+# or "llama_guard" (every query goes to Llama Guard, no local tiers)
+SAFETY_MODE = os.getenv("SAFETY_MODE", "shadow").lower()
+# Local classifier scores at or above the unsafe threshold are blocked without Llama Guard;
+# scores at or below the benign threshold are only allowed by a calibrated classifier file
+SAFETY_BENIGN_THRESHOLD = float(os.getenv("SAFETY_BENIGN_THRESHOLD", "0.05"))
+SAFETY_UNSAFE_THRESHOLD = float(os.getenv("SAFETY_UNSAFE_THRESHOLD", "0.95"))
+# Optional JSON file with classifier weights ({"bias", "weights", "calibrated"}), and fraction
+# of local decisions shadow-checked
+# in tiered mode
+SAFETY_CLASSIFIER_PATH = os.getenv("SAFETY_CLASSIFIER_PATH")
+SAFETY_SHADOW_RATE = float(os.getenv("SAFETY_SHADOW_RATE", "0.05"))
+# Concurrent Llama Guard requests during bulk re-evaluation
+SAFETY_BULK_CONCURRENCY = int(os.getenv("SAFETY_BULK_CONCURRENCY", "8"))
+
 # Default chunk limits for searches
 DEFAULT_VECTOR_K = 10
 DEFAULT_BM25_K = 10
@@ -0,0 +1,243 @@
+"""
+Conversation Memory for SMART RAG System
+
+Long assistant answers make the raw history of a chat grow by thousands of tokens per turn. This
+module keeps the history sent with a turn within a fixed token budget: the most recent messages
+are sent as they are, and everything older is replaced by a rolling summary of the chat.
+
+- `select_history()`: Split a chat's history into the older messages (covered by the summary)
+  and the recent raw messages (the history window, trimmed to `CHAT_HISTORY_TOKENS`). Until a
+  chat has a summary, the whole history window is sent.
+- `ConversationMemory`: After each answer, folds the messages that left the raw window into the
+  chat's summary with a small model (`SUMMARY_MODEL`), in the background, and stores it with the
+  chat (`chat_summary` table).
+
+A summary is a dict {"text", "through_seq"}: it covers the chat's messages up to `through_seq`.
+It only changes when messages leave the raw window, so turns in between send the same prefix.
+If the background update has not finished when the next turn starts, that turn uses the previous
+summary. Turns only load the latest messages of a chat, so when updates fall behind, the
+messages between the summary and the loaded ones are read from the chat before folding;
+a summary never skips a message.
+"""
+
+import asyncio
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .config import (
+    CHAT_HISTORY_MESSAGES,
+    CHAT_HISTORY_TOKENS,
+    SUMMARY_MESSAGE_CHARS,
+    SUMMARY_MODEL,
+    logger,
+)
+from .ollama_api import AsyncOllamaAPIClient, history_window
+
+# Rough characters per token of English text, for estimating prompt sizes without a tokenizer
+CHARS_PER_TOKEN = 4
+
+# Sources block appended to every answer (not worth summarizing)
+SOURCES_MARKER = "\n\nSOURCES:"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the tokens of a text (about four characters per token)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def select_history(
+    chat_history: Optional[List[Dict]],
+    budget: Optional[int] = CHAT_HISTORY_TOKENS,
+    window: int = CHAT_HISTORY_MESSAGES,
+) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Split a chat history into the messages replaced by the summary and those sent as they are.
+
+    Args:
+        chat_history: Previous conversation messages, oldest first
+        budget: Estimated tokens of raw history sent at most (the latest message is always sent);
+            None sends the whole history window, for chats without a summary yet
+        window: History window size (see `history_window`)
+
+    Returns:
+        Tuple of (older, recent) messages
+    """
+    if not chat_history:
+        return [], []
+    recent = history_window(chat_history, window)
+    if budget is None:
+        return chat_history[: len(chat_history) - len(recent)], recent
+    tokens = sum(estimate_tokens(message["content"]) for message in recent)
+    while len(recent) > 1 and tokens > budget:
+        tokens -= estimate_tokens(recent[0]["content"])
+        recent = recent[1:]
+    return chat_history[: len(chat_history) - len(recent)], recent
+
+
+def summary_for_prompt(summary: Optional[Dict], older: List[Dict]) -> str:
+    """Summary text to send in place of the `older` messages ("" if there are none)."""
+    if not summary or not older:
+        return ""
+    if older[-1].get("seq", -1) > summary["through_seq"]:
+        logger.info(
+            f"Conversation summary covers messages up to {summary['through_seq']}, "
+            f"{older[-1]['seq']} left the history window (update pending)"
+        )
+    return summary["text"]
+
+
+def build_summary_prompt(summary: str, messages: List[Dict]) -> str:
+    """Prompt asking the summary model to fold `messages` into the current `summary`."""
+    lines = []
+    for message in messages:
+        role = "User" if message["role"] == "user" else "Assistant"
+        content = message["content"].split(SOURCES_MARKER)[0].strip()
+        lines.append(f"{role}: {content[:SUMMARY_MESSAGE_CHARS]}")
+    conversation = "\n\n".join(lines)
+    return f"""You maintain the memory of a conversation between a user and an AI assistant about machine learning, deep learning and data science.
+Update the summary with the new messages. Keep the topics discussed, the details the user shared about their project or needs, and the conclusions reached. Drop repetitions and formatting.
+Answer with the updated summary only, in at most 150 words of plain English.
+
+SUMMARY SO FAR:
+{summary or "(none)"}
+
+NEW MESSAGES:
+{conversation}
+
+UPDATED SUMMARY:
+"""
+
+
+class ConversationMemory:
+    """Maintains the rolling summary of each chat in the background."""
+
+    def __init__(
+        self,
+        save_summary: Callable[[str, str, int], bool],
+        load_chat: Optional[Callable[..., Optional[Dict]]] = None,
+        model_name: str = SUMMARY_MODEL,
+        budget: int = CHAT_HISTORY_TOKENS,
+        window: int = CHAT_HISTORY_MESSAGES,
+    ):
+        """
+        Initialize the conversation memory.
+
+        Args:
+            save_summary: Stores a summary: (chat_id, text, through_seq) -> success
+            load_chat: Loads a window of a chat like `ChatHistoryManager.get_chat`
+                (chat_id, last_n=..., after_seq=...), to read messages that are pending but
+                were not loaded with the turn; without it such updates are skipped
+            model_name: Ollama model that writes the summaries
+            budget: Estimated tokens of raw history sent per turn (see `select_history`)
+            window: History window size
+        """
+        self.save_summary = save_summary
+        self.load_chat = load_chat
+        self.model_name = model_name
+        self.budget = budget
+        self.window = window
+        # chat_id -> running update; one update per chat at a time
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.stats_counters = {"updates": 0, "failures": 0, "skipped": 0, "gaps_filled": 0}
+
+    def pending_messages(self, chat: Dict) -> List[Dict]:
+        """Stored messages that left the raw history window and are not summarized yet."""
+        older, _ = select_history(chat.get("messages"), self.budget, self.window)
+        summary = chat.get("conversation_summary")
+        through_seq = summary["through_seq"] if summary else -1
+        return [message for message in older if message.get("seq", -1) > through_seq]
+
+    def schedule_update(self, chat: Dict) -> Optional[asyncio.Task]:
+        """
+        Start updating the summary of a saved chat if messages left its raw history window.
+
+        Returns:
+            The background task, or None if there is nothing to do
+        """
+        messages = self.pending_messages(chat)
+        if not messages:
+            return None
+        chat_id = chat["chat_id"]
+        if chat_id in self._tasks:
+            # The messages are picked up after the running update, on a later turn
+            self.stats_counters["skipped"] += 1
+            return None
+        task = asyncio.create_task(self.update(chat_id, chat.get("conversation_summary"), messages))
+        self._tasks[chat_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(chat_id, None))
+        return task
+
+    async def _fill_gap(
+        self, chat_id: str, through_seq: int, messages: List[Dict]
+    ) -> Optional[List[Dict]]:
+        """
+        Prepend the stored messages between the summary and `messages` (those not loaded with
+        the turn). Returns None if they cannot all be read.
+        """
+        first_seq = messages[0].get("seq", 0)
+        if first_seq <= through_seq + 1:
+            return messages
+        if self.load_chat is None:
+            return None
+
+        loop = asyncio.get_running_loop()
+        chat = await loop.run_in_executor(
+            None,
+            partial(
+                self.load_chat, chat_id, last_n=first_seq - through_seq - 1, after_seq=through_seq
+            ),
+        )
+        missing = chat["messages"] if chat else []
+        if [message.get("seq") for message in missing] != list(range(through_seq + 1, first_seq)):
+            return None
+        self.stats_counters["gaps_filled"] += 1
+        return missing + messages
+
+    async def update(
+        self, chat_id: str, summary: Optional[Dict], messages: List[Dict]
+    ) -> Optional[Dict]:
+        """
+        Fold `messages` into the chat's summary and store it. Messages between the summary's
+        `through_seq` and the first of `messages` are loaded first, so none is skipped.
+
+        Returns:
+            The new summary, or None if it could not be generated or stored
+        """
+        through_seq = summary["through_seq"] if summary else -1
+        contiguous = await self._fill_gap(chat_id, through_seq, messages)
+        if contiguous is None:
+            self.stats_counters["failures"] += 1
+            logger.warning(
+                f"Could not summarize chat {chat_id}: messages after {through_seq} "
+                f"up to {messages[0].get('seq')} could not be loaded"
+            )
+            return None
+        messages = contiguous
+
+        prompt = build_summary_prompt(summary["text"] if summary else "", messages)
+        try:
+            client = AsyncOllamaAPIClient(
+                self.model_name, stage="summarize", profile="summary", priority="batch"
+            )
+            text = (await client.generate_text(prompt)).strip()
+        except Exception as e:
+            text = f"Error: {e}"
+        if not text or text.startswith("Error:"):
+            self.stats_counters["failures"] += 1
+            logger.warning(f"Could not summarize chat {chat_id}: {text or 'empty summary'}")
+            return None
+
+        updated = {"text": text, "through_seq": messages[-1]["seq"]}
+        loop = asyncio.get_running_loop()
+        saved = await loop.run_in_executor(
+            None, self.save_summary, chat_id, updated["text"], updated["through_seq"]
+        )
+        if not saved:
+            self.stats_counters["failures"] += 1
+            return None
+        self.stats_counters["updates"] += 1
+        logger.info(f"Chat {chat_id} summarized through message {updated['through_seq']}")
+        return updated
+
+    def stats(self) -> Dict:
+        return {"model": self.model_name, "running": len(self._tasks), **self.stats_counters}
@@ -3,19 +3,23 @@ Embedding model utilities for the Ollama RAG system.
 
 This module provides functions to load a sentence-transformer embedding model and generate
 vector embeddings for user queries. These embeddings are used for semantic search and
-retrieval-augmented generation (RAG) workflows.
+retrieval-augmented generation (RAG) workflows. A multilingual model is also available for
+the "multilingual" retrieval mode, where non-English questions are embedded directly.
 """
 
 import torch
 from sentence_transformers import SentenceTransformer
 
-from .config import EMBEDDING_MODEL, logger
+from .config import EMBEDDING_MODEL, MULTILINGUAL_EMBEDDING_MODEL, logger
 
+# Multilingual model, loaded on first use
+_multilingual_model = None
 
-def get_ch_embedding_model():
-    """Load and return the embedding model."""
+
+def get_ch_embedding_model(model_name=None):
+    """Load and return the embedding model (EMBEDDING_MODEL unless `model_name` is given)."""
     try:
-        model_name = EMBEDDING_MODEL
+        model_name = model_name or EMBEDDING_MODEL
         model = SentenceTransformer(model_name).to("cuda" if torch.cuda.is_available() else "cpu")
         logger.info(f"Successfully loaded Embedding model: {model_name}")
         return model
@@ -24,6 +28,14 @@ def get_ch_embedding_model():
         raise
 
 
+def get_multilingual_embedding_model():
+    """Load (once) and return the multilingual embedding model."""
+    global _multilingual_model
+    if _multilingual_model is None:
+        _multilingual_model = get_ch_embedding_model(MULTILINGUAL_EMBEDDING_MODEL)
+    return _multilingual_model
+
+
 def embed_query(query, model):
     """Generate an embedding for the given query."""
     device = "cuda" if torch.cuda.is_available() else "cpu"
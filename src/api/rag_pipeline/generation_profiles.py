@@ -0,0 +1,97 @@
+"""
+Generation Profiles for Ollama Requests
+
+Each Ollama-backed stage uses a named profile from `GENERATION_PROFILES` in `config.py`
+("safety", "rerank", "answer", "summary"). A profile is sent as the request's `options`, which
+is where Ollama reads sampling parameters and limits (`num_predict`, `num_ctx`, `stop`);
+top-level fields such as `max_tokens` are ignored.
+
+Responses are checked against the profile: `eval_count` above `num_predict` means the limit
+was not honoured, and `done_reason == "length"` means the output was cut at the limit.
+
+Functions:
+- `profile_options()`: Ollama options for a profile, with optional overrides.
+- `check_limits()`: Validate a response against the options it was sent with.
+- `generation_profile_stats()`: Output-token and limit statistics per profile.
+"""
+
+import copy
+from typing import Any, Dict
+
+from .config import GENERATION_PROFILES, logger
+
+# Per-profile output statistics
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def profile_options(profile: str, **overrides: Any) -> Dict[str, Any]:
+    """
+    Build the Ollama `options` for a generation profile.
+
+    Args:
+        profile: Profile name ("safety", "rerank", "answer" or "summary")
+        **overrides: Option overrides; None values are ignored, `max_tokens` maps to num_predict
+
+    Returns:
+        Options dict for the request payload
+    """
+    if profile not in GENERATION_PROFILES:
+        raise ValueError(f"Unknown generation profile: {profile}")
+    options = copy.deepcopy(GENERATION_PROFILES[profile])
+    if "max_tokens" in overrides:
+        overrides["num_predict"] = overrides.pop("max_tokens")
+    options.update({key: value for key, value in overrides.items() if value is not None})
+    return options
+
+
+def check_limits(profile: str, options: Dict[str, Any], response_data: Dict[str, Any]) -> bool:
+    """
+    Record output statistics and check that Ollama honoured the output limit.
+
+    Args:
+        profile: Profile the request was sent with
+        options: Options the request was sent with
+        response_data: Decoded Ollama generate/chat response
+
+    Returns:
+        True if the output stayed within `num_predict`
+    """
+    eval_count = response_data.get("eval_count") or 0
+    limit = options.get("num_predict")
+    stats = _stats.setdefault(
+        profile,
+        {
+            "requests": 0,
+            "output_tokens": 0,
+            "max_output_tokens": 0,
+            "truncated": 0,
+            "violations": 0,
+        },
+    )
+    stats["requests"] += 1
+    stats["output_tokens"] += eval_count
+    stats["max_output_tokens"] = max(stats["max_output_tokens"], eval_count)
+
+    if response_data.get("done_reason") == "length":
+        stats["truncated"] += 1
+        logger.info(f"{profile} generation stopped at the {limit}-token limit")
+
+    if limit is not None and limit >= 0 and eval_count > limit:
+        stats["violations"] += 1
+        logger.error(
+            f"{profile} generation produced {eval_count} tokens, over its {limit}-token limit"
+        )
+        return False
+    return True
+
+
+def generation_profile_stats() -> Dict[str, Dict[str, Any]]:
+    """Configured limits and output statistics per profile."""
+    return {
+        name: {
+            "num_predict": profile.get("num_predict"),
+            "num_ctx": profile.get("num_ctx"),
+            **_stats.get(name, {}),
+        }
+        for name, profile in GENERATION_PROFILES.items()
+    }
@@ -7,26 +7,70 @@ for the Ollama Retrieval-Augmented Generation (RAG) pipeline. It combines:
 - FastText-based language detection for general multilingual support.
 - Rule-based pattern matching for short commands and phrases.
 - Common phrase heuristics to correct frequent misclassifications (e.g., short English queries).
-- GoogleTranslator integration (via `deep_translator`) for automatic language translation.
+- A two-tier translation cache so repeated strings never reach the translator twice.
+- Pluggable translation backends (`translation_backend.py`, Google Translate by default) with
+  async, timeout-bounded calls; every translation goes through the backend and the cache.
 
 Functions:
 - `detect_language()`: Detects the language of a string using a hybrid model.
 - `detect_language_with_details()`: Returns detailed detection metadata (method, confidence, etc).
+- `detect_languages()`: Detects the language of many strings at once (e.g. audit backfills).
 - `translate_text()`: Translates text to a target language (default is English).
+- `translate_batch()`: Translates many segments with a single provider call.
+- `translate_text_async()` / `translate_batch_async()`: Non-blocking variants for async handlers.
+- `translate_response_async()`: Segmented, concurrent translation of long LLM answers.
 
 The module uses a singleton pattern to reuse the `LanguageDetector` class across calls.
 """
 
+import asyncio
 import re
-from typing import Dict, Optional, Union, cast
-
-from deep_translator import GoogleTranslator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple, Union, cast
 
 # Required external dependencies
 from fast_langdetect import detect as fasttext_detect
 
 # Import from rag_pipeline
-from .config import logger
+from .config import (
+    TRANSLATION_CONCURRENCY,
+    TRANSLATION_MAX_WORKERS,
+    TRANSLATION_SEGMENT_CHARS,
+    TRANSLATION_TIMEOUT,
+    logger,
+)
+from .translation_backend import get_translation_backend
+from .translation_cache import get_translation_cache
+
+
+# Thread pool for language detection and translation cache reads/writes, kept apart from the
+# loop's default executor and from the backend's pool, so cache hits never queue behind slow
+# provider calls
+_cache_executor = ThreadPoolExecutor(
+    max_workers=TRANSLATION_MAX_WORKERS, thread_name_prefix="translation-cache"
+)
+
+# Display names used when asking the LLM to answer in the user's language
+LANGUAGE_NAMES = {
+    "en": "English",
+    "es": "Spanish",
+    "fr": "French",
+    "de": "German",
+    "it": "Italian",
+    "pt": "Portuguese",
+    "nl": "Dutch",
+    "ru": "Russian",
+    "zh": "Chinese",
+    "ja": "Japanese",
+    "ko": "Korean",
+    "ar": "Arabic",
+    "hi": "Hindi",
+}
+
+
+def language_name(code: str) -> str:
+    """Return the display name of a language code (the code itself if unknown)."""
+    return LANGUAGE_NAMES.get(code, code)
 
 
 class LanguageDetector:
@@ -35,6 +79,9 @@ class LanguageDetector:
     with FastText for general text.
     """
 
+    # Trie key marking the end of a phrase (cannot collide with a word)
+    _PHRASE_END = " "
+
     def __init__(self, default_language: str = "en", min_confidence: float = 0.5):
         """
         Initialize the language detector.
@@ -121,11 +168,55 @@ class LanguageDetector:
             "whose",
         }
 
-        # Initialize the translator for potential future use
-        self.translator = GoogleTranslator(source="auto", target="en")
+        # Precompiled matchers (rebuild with `compile_matchers()` after editing the rules)
+        self._language_matchers: Dict[str, Tuple[Pattern, Dict[str, str]]] = {}
+        self._phrase_trie: Dict[str, Dict] = {}
+        self.compile_matchers()
 
         logger.debug("LanguageDetector initialized successfully")
 
+    def compile_matchers(self) -> None:
+        """
+        Compile `patterns` into one alternation per language (one named group per pattern)
+        and `common_english_phrases` into a word-level trie.
+        """
+        self._language_matchers = {}
+        for lang, patterns in self.patterns.items():
+            groups = {f"{lang}_{i}": pattern for i, pattern in enumerate(patterns)}
+            combined = "|".join(f"(?P<{name}>{pattern})" for name, pattern in groups.items())
+            self._language_matchers[lang] = (re.compile(combined, re.IGNORECASE), groups)
+
+        self._phrase_trie = {}
+        for phrase in self.common_english_phrases:
+            node = self._phrase_trie
+            for word in phrase.split(" "):
+                node = node.setdefault(word, {})
+            node[self._PHRASE_END] = phrase
+
+    def _match_common_phrase(self, text_lower: str) -> Optional[str]:
+        """
+        Return the shortest common English phrase that equals `text_lower` or is followed by
+        a space in it, or None.
+        """
+        node = self._phrase_trie
+        words = text_lower.split(" ")
+        for word in words:
+            node = node.get(word)
+            if node is None:
+                return None
+            if self._PHRASE_END in node:
+                return node[self._PHRASE_END]
+        return None
+
+    def _match_pattern(self, text: str) -> Optional[Tuple[str, str]]:
+        """Return (language, pattern) for the first matching language pattern, or None."""
+        for lang, (matcher, groups) in self._language_matchers.items():
+            match = matcher.search(text)
+            if match:
+                name = next(n for n, value in match.groupdict().items() if value is not None)
+                return lang, groups[name]
+        return None
+
     def detect_language(self, text: str) -> str:
         """
         Detect the language of the given text using a hybrid approach.
@@ -149,10 +240,10 @@ class LanguageDetector:
         if word_count <= 3:
             # Check for common English phrases
             text_lower = text.lower()
-            for phrase in self.common_english_phrases:
-                if text_lower == phrase or text_lower.startswith(phrase + " "):
-                    logger.debug(f"Matched common English phrase: '{phrase}'")
-                    return "en"
+            phrase = self._match_common_phrase(text_lower)
+            if phrase:
+                logger.debug(f"Matched common English phrase: '{phrase}'")
+                return "en"
 
             # Check for language-specific patterns
             pattern_result = self._check_patterns(text_lower)
@@ -203,11 +294,8 @@ class LanguageDetector:
         Returns:
             Language code if matched, None otherwise
         """
-        for lang, patterns in self.patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, text, re.IGNORECASE):
-                    return lang
-        return None
+        matched = self._match_pattern(text)
+        return matched[0] if matched else None
 
     def detect_with_details(self, text: str) -> Dict[str, Union[str, float, int]]:
         """
@@ -233,25 +321,24 @@ class LanguageDetector:
 
         # Check for common English phrases
         if word_count <= 3:
-            for phrase in self.common_english_phrases:
-                if text_lower == phrase or text_lower.startswith(phrase + " "):
-                    return {
-                        "lang": "en",
-                        "method": f"common_phrase:{phrase}",
-                        "confidence": 0.95,
-                        "word_count": word_count,
-                    }
+            phrase = self._match_common_phrase(text_lower)
+            if phrase:
+                return {
+                    "lang": "en",
+                    "method": f"common_phrase:{phrase}",
+                    "confidence": 0.95,
+                    "word_count": word_count,
+                }
 
         # Check for language-specific patterns
-        for lang, patterns in self.patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, text_lower, re.IGNORECASE):
-                    return {
-                        "lang": lang,
-                        "method": f"pattern:{pattern}",
-                        "confidence": 0.9,
-                        "word_count": word_count,
-                    }
+        matched = self._match_pattern(text_lower)
+        if matched:
+            return {
+                "lang": matched[0],
+                "method": f"pattern:{matched[1]}",
+                "confidence": 0.9,
+                "word_count": word_count,
+            }
 
         # Use FastText for general language detection
         try:
@@ -272,9 +359,29 @@ class LanguageDetector:
                 "error": str(e),
             }
 
+    def detect_languages(self, texts: Iterable[str]) -> List[str]:
+        """
+        Detect the language of many texts, running each distinct text through the detector
+        only once.
+
+        Args:
+            texts: Texts to detect languages for
+
+        Returns:
+            ISO 639-1 language codes in the same order as `texts`
+        """
+        texts = list(texts)
+        detected: Dict[str, str] = {}
+        for text in texts:
+            key = (text or "").strip()
+            if key not in detected:
+                detected[key] = self.detect_language(key)
+        return [detected[(text or "").strip()] for text in texts]
+
     def translate_text(self, text: str, target_lang: str = "en") -> str:
         """
-        Translate text to the target language.
+        Translate text to the target language, detecting its language with this detector.
+        The translation goes through the shared backend and cache (see `translate_text()`).
 
         Args:
             text: Text to translate
@@ -286,19 +393,10 @@ class LanguageDetector:
         if not text:
             return ""
 
-        try:
-            source_lang = self.detect_language(text)
-            if source_lang == target_lang:
-                return text
-
-            self.translator = GoogleTranslator(source=source_lang, target=target_lang)
-            translated = self.translator.translate(text)
-            if translated is None:
-                return ""
-            return cast(str, translated)
-        except Exception as e:
-            logger.error(f"Translation error: {e}")
-            return ""
+        source_lang = self.detect_language(text)
+        if source_lang == target_lang:
+            return text
+        return translate_text(text, target_lang=target_lang, source_lang=source_lang)
 
 
 # Singleton instance for reuse
@@ -332,6 +430,20 @@ def detect_language(text: str) -> str:
     return detector.detect_language(text)
 
 
+def detect_languages(texts: Iterable[str]) -> List[str]:
+    """
+    Detect the languages of many texts using the shared detector instance.
+
+    Args:
+        texts: Texts to detect languages for
+
+    Returns:
+        ISO 639-1 language codes in the same order as `texts`
+    """
+    detector = get_detector()
+    return detector.detect_languages(texts)
+
+
 def detect_language_with_details(text: str) -> Dict[str, Union[str, float, int]]:
     """
     Detect language with detailed information about the detection process.
@@ -346,6 +458,67 @@ def detect_language_with_details(text: str) -> Dict[str, Union[str, float, int]]
     return detector.detect_with_details(text)
 
 
+def _plan_translation(
+    texts: List[str], target_lang: str, source_lang: Optional[str]
+) -> Tuple[List[str], List[Optional[str]], Dict[Tuple[str, str], str], Dict[str, List[str]]]:
+    """
+    Resolve source languages and cache hits for a batch of texts.
+
+    Returns:
+        (results, languages, known, misses) where `results` holds texts that need no
+        translation, `languages` the source language of each text still to translate (None
+        otherwise), `known` cached translations keyed by (language, text), and `misses` the
+        distinct uncached texts per source language.
+    """
+    detector = get_detector()
+    cache = get_translation_cache()
+
+    results = ["" for _ in texts]
+    languages: List[Optional[str]] = []
+    groups: Dict[str, List[str]] = {}
+    for i, text in enumerate(texts):
+        lang = (source_lang or detector.detect_language(text)) if text else None
+        if lang == target_lang:
+            results[i] = text
+            lang = None
+        languages.append(lang)
+        if lang:
+            groups.setdefault(lang, []).append(text)
+
+    known: Dict[Tuple[str, str], str] = {}
+    misses: Dict[str, List[str]] = {}
+    for lang, group in groups.items():
+        cached = cache.get_many(lang, target_lang, group)
+        known.update({(lang, text): translation for text, translation in cached.items()})
+        pending = list(dict.fromkeys(text for text in group if text not in cached))
+        if pending:
+            misses[lang] = pending
+
+    return results, languages, known, misses
+
+
+def _store_translations(
+    known: Dict[Tuple[str, str], str],
+    lang: str,
+    target_lang: str,
+    texts: List[str],
+    translations: List[str],
+) -> None:
+    """Record provider results in `known` and in the translation cache."""
+    translated = {text: translation for text, translation in zip(texts, translations)}
+    get_translation_cache().set_many(lang, target_lang, translated)
+    known.update({(lang, text): translation for text, translation in translated.items()})
+
+
+def _fill_results(texts, results, languages, known, keep_original: bool) -> List[str]:
+    """Fill in translations, using the original text or "" for segments that failed."""
+    for i, lang in enumerate(languages):
+        if lang:
+            fallback = texts[i] if keep_original else ""
+            results[i] = known.get((lang, texts[i])) or fallback
+    return results
+
+
 def translate_text(text: str, target_lang: str = "en", source_lang: Optional[str] = None) -> str:
     """
     Translate text to the target language.
@@ -362,22 +535,226 @@ def translate_text(text: str, target_lang: str = "en", source_lang: Optional[str
         return ""
 
     try:
-        detector = get_detector()
+        return translate_batch([text], target_lang=target_lang, source_lang=source_lang)[0]
+    except Exception as e:
+        logger.error(f"Translation error: {e}")
+        return ""
 
-        # If source language is provided, use it; otherwise detect it
-        if not source_lang:
-            source_lang = detector.detect_language(text)
 
-        # If source and target are the same, return original text
-        if source_lang == target_lang:
-            return text
+def translate_batch(
+    texts: List[str], target_lang: str = "en", source_lang: Optional[str] = None
+) -> List[str]:
+    """
+    Translate many segments, serving repeats from the cache and sending only the misses
+    to the backend in a single call per source language.
 
-        # Initialize translator with the appropriate source language
-        detector.translator = GoogleTranslator(source=source_lang, target=target_lang)
-        translated = detector.translator.translate(text)
-        if translated is None:
-            return ""
-        return cast(str, translated)
-    except Exception as e:
-        logger.error(f"Translation error: {e}")
+    Args:
+        texts: Texts to translate
+        target_lang: Target language code
+        source_lang: Source language code (optional, detected per text if omitted)
+
+    Returns:
+        Translations in the same order as `texts` (empty string for failed segments)
+    """
+    results, languages, known, misses = _plan_translation(texts, target_lang, source_lang)
+    backend = get_translation_backend()
+
+    for lang, group in misses.items():
+        try:
+            translations = backend.translate_batch(group, lang, target_lang)
+            _store_translations(known, lang, target_lang, group, translations)
+        except Exception as e:
+            logger.error(f"Batch translation error ({lang}->{target_lang}): {e}")
+
+    return _fill_results(texts, results, languages, known, keep_original=False)
+
+
+async def translate_batch_async(
+    texts: List[str],
+    target_lang: str = "en",
+    source_lang: Optional[str] = None,
+    timeout: float = TRANSLATION_TIMEOUT,
+) -> List[str]:
+    """
+    Translate many segments without blocking the event loop.
+
+    Cache misses for each source language are sent to the backend concurrently, each bounded
+    by `timeout`. Segments that fail or time out are returned untranslated, since an answer
+    in the wrong language is more useful to the user than an empty one. The timeout only
+    bounds the wait: a provider call that already started keeps running in the backend's
+    thread pool (see `translation_backend.py`).
+
+    Args:
+        texts: Texts to translate
+        target_lang: Target language code
+        source_lang: Source language code (optional, detected per text if omitted)
+        timeout: Per-call timeout in seconds for the translation backend
+
+    Returns:
+        Translations in the same order as `texts`
+    """
+    # Language detection and cache reads/writes (SQLite or Postgres) block, like the backend
+    loop = asyncio.get_running_loop()
+    results, languages, known, misses = await loop.run_in_executor(
+        _cache_executor, _plan_translation, texts, target_lang, source_lang
+    )
+    backend = get_translation_backend()
+
+    async def translate_group(lang: str, group: List[str]) -> None:
+        try:
+            translations = await asyncio.wait_for(
+                backend.atranslate_batch(group, lang, target_lang), timeout=timeout
+            )
+            await loop.run_in_executor(
+                _cache_executor, _store_translations, known, lang, target_lang, group, translations
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Translation ({lang}->{target_lang}) timed out after {timeout}s")
+        except Exception as e:
+            logger.error(f"Async translation error ({lang}->{target_lang}): {e}")
+
+    await asyncio.gather(*(translate_group(lang, group) for lang, group in misses.items()))
+    return _fill_results(texts, results, languages, known, keep_original=True)
+
+
+async def translate_text_async(
+    text: str,
+    target_lang: str = "en",
+    source_lang: Optional[str] = None,
+    timeout: float = TRANSLATION_TIMEOUT,
+) -> str:
+    """
+    Translate text to the target language without blocking the event loop.
+
+    Args:
+        text: Text to translate
+        target_lang: Target language code
+        source_lang: Source language code (optional)
+        timeout: Timeout in seconds for the translation backend call
+
+    Returns:
+        Translated text (the original text if translation fails or times out)
+    """
+    if not text:
         return ""
+
+    translations = await translate_batch_async(
+        [text], target_lang=target_lang, source_lang=source_lang, timeout=timeout
+    )
+    return translations[0]
+
+
+# Fenced code blocks, from an opening ``` line (with an optional info string) to the closing
+# ``` line or the end of the text; they are kept whole, blank lines included
+_CODE_FENCE = re.compile(
+    r"(^[ \t]*```[^`\n]*\n.*?(?:^[ \t]*```[^\n]*$|\Z))", re.MULTILINE | re.DOTALL
+)
+
+# Paragraph breaks (kept verbatim when reassembling a segmented response)
+_PARAGRAPH_BREAK = re.compile(r"(\n\s*\n)")
+
+# Line breaks and sentence boundaries used to split paragraphs longer than the segment limit
+_LINE_BREAK = re.compile(r"(\n)")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])(\s+)")
+
+
+def _pack(text: str, separator: Pattern, max_chars: int) -> List[str]:
+    """
+    Split text at `separator` (a pattern with one capturing group) and group the parts into
+    segments of at most `max_chars`. The separators between segments are kept as their own
+    items, so `"".join(segments) == text`.
+    """
+    parts = separator.split(text)
+    segments: List[str] = []
+    current = parts[0]
+    for gap, part in zip(parts[1::2], parts[2::2]):
+        if current and len(current) + len(gap) + len(part) > max_chars:
+            segments.extend([current, gap])
+            current = part
+        else:
+            current += gap + part
+    segments.append(current)
+    return segments
+
+
+def split_into_segments(text: str, max_chars: int = TRANSLATION_SEGMENT_CHARS) -> List[str]:
+    """
+    Split text into paragraph segments, keeping the paragraph breaks as their own items so
+    that `"".join(segments) == text`. Fenced code blocks are single segments. Paragraphs longer
+    than `max_chars` are split further at line breaks (so list items stay intact), and lines
+    still too long at sentence boundaries; the original separators are kept.
+
+    Args:
+        text: Text to split
+        max_chars: Maximum characters per segment (code blocks and single long sentences
+            are kept whole)
+
+    Returns:
+        List of segments and separators
+    """
+    segments: List[str] = []
+    for index, block in enumerate(_CODE_FENCE.split(text)):
+        if index % 2:
+            segments.append(block)
+            continue
+        for piece in _PARAGRAPH_BREAK.split(block):
+            if len(piece) <= max_chars or _PARAGRAPH_BREAK.fullmatch(piece):
+                segments.append(piece)
+                continue
+            for line in _pack(piece, _LINE_BREAK, max_chars):
+                if len(line) <= max_chars:
+                    segments.append(line)
+                else:
+                    segments.extend(_pack(line, _SENTENCE_BREAK, max_chars))
+    return [segment for segment in segments if segment]
+
+
+def _needs_translation(segment: str) -> bool:
+    """Whitespace, paragraph breaks and fenced code blocks are passed through unchanged."""
+    stripped = segment.strip()
+    return bool(stripped) and not stripped.startswith("```")
+
+
+async def translate_response_async(
+    response: str,
+    target_lang: str,
+    source_lang: str = "en",
+    max_chars: int = TRANSLATION_SEGMENT_CHARS,
+    concurrency: int = TRANSLATION_CONCURRENCY,
+    timeout: float = TRANSLATION_TIMEOUT,
+) -> str:
+    """
+    Translate a long LLM answer segment by segment.
+
+    The answer is split into paragraph/sentence segments that are translated concurrently
+    (at most `concurrency` at a time) and reassembled in order. Structured content such as
+    the SOURCES block should be appended by the caller after translation, untranslated.
+
+    Args:
+        response: Answer text to translate
+        target_lang: Target language code
+        source_lang: Source language code (default English)
+        max_chars: Maximum characters per segment
+        concurrency: Maximum number of segments translated at the same time
+        timeout: Per-segment timeout in seconds
+
+    Returns:
+        Translated answer (segments that fail are kept in the source language)
+    """
+    if not response or source_lang == target_lang:
+        return response
+
+    segments = split_into_segments(response, max_chars=max_chars)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def translate_segment(segment: str) -> str:
+        if not _needs_translation(segment):
+            return segment
+        async with semaphore:
+            return await translate_text_async(
+                segment, target_lang=target_lang, source_lang=source_lang, timeout=timeout
+            )
+
+    translated = await asyncio.gather(*(translate_segment(segment) for segment in segments))
+    logger.info(f"Translated response in {len(segments)} segments to {target_lang}")
+    return "".join(translated)
@@ -0,0 +1,269 @@
+"""
+Model Residency Manager for the Ollama RAG System
+
+The generation, reranking and safety models are separate 8B models served by Ollama. When Ollama
+unloads one of them, the next request pays a multi-second cold load. This module keeps the
+configured models resident:
+
+- Preloads every configured model on every Ollama host at API startup (an empty
+  `/api/generate` request).
+- Supplies the `keep_alive` value sent with every generate request.
+- Periodically checks `/api/ps` and pings models that are not loaded or about to expire.
+- Records `load_duration` / `total_duration` from Ollama responses per model, counting cold loads,
+  and prompt-eval token counts and time (low on chat turns served from the KV cache).
+
+Functions:
+- `get_residency_manager()`: Return the shared manager configured from `config.py`.
+"""
+
+import asyncio
+import re
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import aiohttp
+
+from .config import (
+    OLLAMA_COLD_LOAD_SECONDS,
+    OLLAMA_HOSTS,
+    OLLAMA_KEEP_ALIVE,
+    OLLAMA_PRELOAD_MODELS,
+    OLLAMA_REFRESH_INTERVAL,
+    OLLAMA_REFRESH_MARGIN,
+    logger,
+)
+from .ollama_pool import normalize_host
+
+# Timeout for preload and refresh requests (a cold load of an 8B model can take minutes)
+PRELOAD_TIMEOUT = 600
+
+# Ollama reports durations in nanoseconds
+NANOSECONDS = 1e9
+
+
+def _parse_expires_at(value: Optional[str]) -> Optional[float]:
+    """Convert an Ollama `expires_at` timestamp to epoch seconds."""
+    if not value:
+        return None
+    try:
+        # Ollama returns RFC 3339 with nanoseconds; keep microsecond precision for fromisoformat
+        value = value.replace("Z", "+00:00")
+        if "." in value:
+            head, tail = value.split(".", 1)
+            digits = re.match(r"\d*", tail).group(0)
+            zone = tail[len(digits) :]
+            value = f"{head}.{digits[:6]}{zone}"
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    except ValueError:
+        return None
+
+
+class ModelResidencyManager:
+    """Keeps Ollama models loaded and tracks how often requests hit a cold model."""
+
+    def __init__(
+        self,
+        models: Iterable[str] = OLLAMA_PRELOAD_MODELS,
+        hosts: Iterable[str] = OLLAMA_HOSTS,
+        keep_alive: str = OLLAMA_KEEP_ALIVE,
+        refresh_interval: float = OLLAMA_REFRESH_INTERVAL,
+        refresh_margin: float = OLLAMA_REFRESH_MARGIN,
+        cold_load_seconds: float = OLLAMA_COLD_LOAD_SECONDS,
+    ):
+        """
+        Initialize the manager.
+
+        Args:
+            models: Models to preload and keep resident
+            hosts: Ollama hosts the models are kept resident on
+            keep_alive: Ollama keep_alive value sent with every request (e.g. "30m", -1)
+            refresh_interval: Seconds between residency checks
+            refresh_margin: Models expiring within this many seconds are pinged
+            cold_load_seconds: `load_duration` above this counts as a cold load
+        """
+        self.models = list(dict.fromkeys(models))
+        self.base_urls = list(dict.fromkeys(normalize_host(host) for host in hosts))
+        self.keep_alive = keep_alive
+        self.refresh_interval = refresh_interval
+        self.refresh_margin = refresh_margin
+        self.cold_load_seconds = cold_load_seconds
+        self.metrics: Dict[str, Dict[str, float]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def _request(
+        self, base_url: str, method: str, path: str, payload: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Send a request to an Ollama host and return the decoded JSON body."""
+        async with aiohttp.ClientSession() as session:
+            async with session.request(
+                method,
+                f"{base_url}{path}",
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=PRELOAD_TIMEOUT),
+            ) as response:
+                response.raise_for_status()
+                return await response.json()
+
+    def record(self, model: str, response_data: Dict[str, Any], preload: bool = False) -> None:
+        """
+        Record the timing fields of an Ollama generate/chat response.
+
+        Args:
+            model: Model that served the request
+            response_data: Decoded Ollama response (durations in nanoseconds)
+            preload: True for residency pings, which are not counted as user requests
+        """
+        load_seconds = (response_data.get("load_duration") or 0) / NANOSECONDS
+        total_seconds = (response_data.get("total_duration") or 0) / NANOSECONDS
+        prompt_tokens = response_data.get("prompt_eval_count") or 0
+        prompt_seconds = (response_data.get("prompt_eval_duration") or 0) / NANOSECONDS
+        stats = self.metrics.setdefault(
+            model,
+            {
+                "requests": 0,
+                "preloads": 0,
+                "cold_loads": 0,
+                "load_seconds_total": 0.0,
+                "load_seconds_max": 0.0,
+                "last_load_seconds": 0.0,
+                "last_total_seconds": 0.0,
+                "prompt_tokens_total": 0,
+                "prompt_eval_seconds_total": 0.0,
+                "last_prompt_tokens": 0,
+            },
+        )
+        if preload:
+            stats["preloads"] += 1
+            return
+
+        stats["requests"] += 1
+        stats["load_seconds_total"] += load_seconds
+        stats["load_seconds_max"] = max(stats["load_seconds_max"], load_seconds)
+        stats["last_load_seconds"] = load_seconds
+        stats["last_total_seconds"] = total_seconds
+        stats["prompt_tokens_total"] += prompt_tokens
+        stats["prompt_eval_seconds_total"] += prompt_seconds
+        stats["last_prompt_tokens"] = prompt_tokens
+        if load_seconds >= self.cold_load_seconds:
+            stats["cold_loads"] += 1
+            logger.warning(f"Cold load of {model}: {load_seconds:.1f}s")
+
+    async def load(self, model: str, base_url: str) -> bool:
+        """Load a model on a host (or extend its keep_alive) with an empty generate request."""
+        try:
+            data = await self._request(
+                base_url,
+                "POST",
+                "/api/generate",
+                {"model": model, "keep_alive": self.keep_alive, "stream": False},
+            )
+            self.record(model, data, preload=True)
+            load_seconds = (data.get("load_duration") or 0) / NANOSECONDS
+            logger.info(f"Model {model} resident on {base_url} (load {load_seconds:.1f}s)")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to load model {model} on {base_url}: {e}")
+            return False
+
+    async def preload(self) -> Dict[str, bool]:
+        """
+        Load every configured model on every host.
+
+        Returns:
+            Map of model to True when it loaded on all hosts
+        """
+        pairs = [(model, base_url) for model in self.models for base_url in self.base_urls]
+        results = await asyncio.gather(*(self.load(model, url) for model, url in pairs))
+        loaded = {model: True for model in self.models}
+        for (model, _), ok in zip(pairs, results):
+            loaded[model] = loaded[model] and ok
+        return loaded
+
+    async def loaded_models(self, base_url: str) -> Dict[str, Optional[float]]:
+        """Return the models a host currently has loaded, mapped to their expiry (epoch s)."""
+        data = await self._request(base_url, "GET", "/api/ps")
+        return {
+            entry.get("name") or entry.get("model"): _parse_expires_at(entry.get("expires_at"))
+            for entry in data.get("models", [])
+        }
+
+    async def _refresh_host(self, base_url: str) -> List[str]:
+        try:
+            loaded = await self.loaded_models(base_url)
+        except Exception as e:
+            logger.error(f"Could not list loaded models on {base_url}: {e}")
+            return []
+
+        now = time.time()
+        stale = [
+            model
+            for model in self.models
+            if model not in loaded
+            or (loaded[model] is not None and loaded[model] - now < self.refresh_margin)
+        ]
+        if stale:
+            logger.info(f"Refreshing residency of {stale} on {base_url}")
+            await asyncio.gather(*(self.load(model, base_url) for model in stale))
+        return stale
+
+    async def refresh_once(self) -> List[str]:
+        """
+        Ping configured models that are not loaded or expire within the refresh margin.
+
+        Returns:
+            Models that were pinged on at least one host
+        """
+        results = await asyncio.gather(*(self._refresh_host(url) for url in self.base_urls))
+        return list(dict.fromkeys(model for stale in results for model in stale))
+
+    async def _run(self) -> None:
+        await self.preload()
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh_once()
+
+    def start(self) -> None:
+        """Start preloading and the periodic refresh loop in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the refresh loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Residency configuration and per-model load metrics."""
+        return {
+            "models": self.models,
+            "hosts": self.base_urls,
+            "keep_alive": self.keep_alive,
+            "refresh_running": self._task is not None and not self._task.done(),
+            "metrics": self.metrics,
+        }
+
+
+# Singleton instance for reuse
+_manager = None
+
+
+def get_residency_manager() -> ModelResidencyManager:
+    """
+    Get or create the shared residency manager.
+
+    Returns:
+        ModelResidencyManager instance
+    """
+    global _manager
+    if _manager is None:
+        _manager = ModelResidencyManager()
+    return _manager
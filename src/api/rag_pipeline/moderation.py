@@ -0,0 +1,403 @@
+"""
+Tiered Moderation Engine for the Ollama RAG System
+
+This module puts a cheap local first stage in front of the Llama Guard 3 safety check so that
+plainly benign coursework questions (and plainly disallowed requests) get an immediate verdict
+without a full `llama-guard3:8b` generation. Only ambiguous queries escalate to Llama Guard.
+
+Tiers:
+1. `rules`: Compiled regular expressions for clearly disallowed content (blocked), and short
+   questions made only of coursework terms and question words (allowed).
+2. `classifier`: A small linear bag-of-words model that runs on CPU and returns the
+   probability that a query is unsafe. High scores are blocked locally; low scores are only
+   allowed by a calibrated model (`"calibrated": true` in SAFETY_CLASSIFIER_PATH) that knows
+   every word of the query. The built-in weights never allow a query.
+3. `llama_guard`: `check_query_safety_with_llama_guard()` for everything else. While the
+   safety circuit breaker is open, ambiguous queries are blocked (never allowed locally).
+
+A query is only allowed locally on positive evidence that all of it is benign: a single word
+outside the known vocabulary, or any token with a positive (unsafe) classifier weight, sends
+it to Llama Guard, however many coursework words it contains.
+
+With SAFETY_MODE=shadow (the default) Llama Guard decides every query and the verdict of the
+local tiers is only compared with it, so the agreement rate per tier can be measured before
+tiered mode is enabled. In tiered mode a fraction of local decisions (SAFETY_SHADOW_RATE) is
+still sent to Llama Guard in the background to keep measuring agreement.
+
+Functions:
+- `get_moderation_engine()`: Return the shared engine configured from `config.py`.
+- `check_query_safety()`: Drop-in replacement for `check_query_safety_with_llama_guard()`.
+"""
+
+import asyncio
+import json
+import math
+import random
+import re
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from .config import (
+    SAFETY_BENIGN_THRESHOLD,
+    SAFETY_CLASSIFIER_PATH,
+    SAFETY_MODE,
+    SAFETY_SHADOW_RATE,
+    SAFETY_UNSAFE_THRESHOLD,
+    logger,
+)
+from .resilience import CircuitBreaker, get_stage
+from .safety import check_query_safety_with_llama_guard
+
+# Requests that are refused without asking Llama Guard
+BLOCK_PATTERNS = {
+    "weapons": r"\b(build|make|assemble|synthesi[sz]e)\b.{0,40}\b(bomb|explosive|nerve agent|"
+    r"bioweapon|chemical weapon|pipe bomb)s?\b",
+    "malware": r"\b(write|create|build|code)\b.{0,40}\b(ransomware|keylogger|botnet|"
+    r"credential stealer|computer virus)\b",
+    "self_harm": r"\b(how (can|do|should) i|best way to|ways to)\b.{0,30}\b(kill myself|"
+    r"commit suicide|end my life|hurt myself)\b",
+    "prompt_injection": r"\b(ignore|disregard|forget)\b.{0,30}\b(previous|prior|above|all)\b"
+    r".{0,20}\b(instructions|rules|guidelines)\b",
+}
+
+# Coursework vocabulary: a short question made only of these words and QUESTION_WORDS (with at
+# least one of these) is allowed immediately. Plurals are matched by stripping a final "s".
+COURSEWORK_WORDS = frozenset(
+    """
+    machine learning deep data science neural network regression classification classifier
+    clustering cluster gradient descent backpropagation overfitting underfitting
+    regularization cross validation transformer attention embedding convolution
+    convolutional cnn rnn lstm decision tree random forest boosting bagging bayes bayesian
+    naive probability statistic statistics loss function hyperparameter dataset feature
+    precision recall accuracy pca svm k means optimizer optimiser optimization activation
+    dropout batch norm normalization tensor pytorch tensorflow numpy pandas scikit learn sklearn
+    python homework lecture assignment exam course syllabus model algorithm training layer
+    weight bias variance logistic linear matrix vector epoch supervised unsupervised
+    reinforcement label prediction inference encoder decoder autoencoder softmax sigmoid relu
+    entropy likelihood kernel sgd adam perceptron
+    """.split()
+)
+
+# Question and function words allowed around coursework terms (no verbs of making or acquiring)
+QUESTION_WORDS = frozenset(
+    """
+    what why how when which where who is are was were do does did can could should would will
+    i we you my our your it its this that these those a an the of in on for to and or with
+    between vs versus than from by as at be not there difference explain describe define
+    definition meaning mean compare work example use used using please tell me about give
+    good better best choose affect effect improve reduce avoid prevent handle high low too
+    much many need understand simple terms intuition step role purpose advantage
+    disadvantage pros cons important
+    """.split()
+)
+
+# Maximum length of a query that the benign rule may allow on its own
+BENIGN_RULE_MAX_CHARS = 300
+
+# The benign rule only applies when the classifier does not lean towards unsafe
+BENIGN_RULE_MAX_SCORE = 0.5
+
+# Default weights of the linear classifier (positive = unsafe); overridable from a JSON file
+DEFAULT_CLASSIFIER = {
+    "bias": -2.5,
+    "weights": {
+        "kill": 2.0,
+        "murder": 2.5,
+        "weapon": 1.5,
+        "bomb": 2.0,
+        "explosive": 2.0,
+        "poison": 1.5,
+        "drugs": 1.0,
+        "hack": 1.2,
+        "steal": 1.5,
+        "password": 0.8,
+        "exploit": 0.8,
+        "malware": 1.5,
+        "suicide": 2.0,
+        "hate": 1.0,
+        "racist": 1.5,
+        "nude": 2.0,
+        "porn": 2.5,
+        "jailbreak": 2.0,
+        "bypass": 0.8,
+        "illegal": 1.2,
+        "attack": 0.6,
+        "model": -0.8,
+        "learning": -1.0,
+        "data": -0.6,
+        "explain": -0.8,
+        "what": -0.3,
+        "how": -0.1,
+        "difference": -0.8,
+        "example": -0.6,
+        "algorithm": -1.0,
+        "training": -0.6,
+        "network": -0.6,
+        "function": -0.6,
+        "lecture": -1.0,
+    },
+    # Hand-set weights: low scores are not evidence that a query is safe
+    "calibrated": False,
+}
+
+_TOKEN = re.compile(r"[a-z]+")
+
+
+class LinearSafetyClassifier:
+    """Bag-of-words logistic model scoring the probability that a query is unsafe."""
+
+    def __init__(self, weights: Dict[str, float], bias: float = 0.0, calibrated: bool = False):
+        """
+        Args:
+            weights: Token weights (positive = unsafe)
+            bias: Logit bias
+            calibrated: Whether the scores were calibrated on labelled queries; only then may
+                a low score allow a query
+        """
+        self.weights = weights
+        self.bias = bias
+        self.calibrated = calibrated
+
+    @classmethod
+    def from_file(cls, path: Optional[str]) -> "LinearSafetyClassifier":
+        """
+        Load weights from a JSON file
+        ({"bias": float, "weights": {token: float}, "calibrated": bool}).
+        """
+        params = DEFAULT_CLASSIFIER
+        if path:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    params = json.load(f)
+            except Exception as e:
+                logger.error(f"Could not load safety classifier from {path}, using defaults: {e}")
+        return cls(params["weights"], params.get("bias", 0.0), params.get("calibrated", False))
+
+    def unsafe_tokens(self, query: str) -> set:
+        """Return the tokens of `query` with a positive (unsafe) weight."""
+        tokens = set(_TOKEN.findall(query.lower()))
+        return {token for token in tokens if self.weights.get(token, 0.0) > 0}
+
+    def unknown_tokens(self, query: str) -> set:
+        """Return the tokens of `query` the model has no weight for (question words aside)."""
+        tokens = set(_TOKEN.findall(query.lower()))
+        return {token for token in tokens if token not in self.weights} - QUESTION_WORDS
+
+    def score(self, query: str) -> float:
+        """Return the probability (0-1) that `query` is unsafe."""
+        tokens = set(_TOKEN.findall(query.lower()))
+        logit = self.bias + sum(self.weights.get(token, 0.0) for token in tokens)
+        return 1.0 / (1.0 + math.exp(-logit))
+
+
+class ModerationEngine:
+    """
+    Tiered safety check: compiled rules, then the local classifier, then Llama Guard.
+    Returns the same (is_safe, reason) tuple as `check_query_safety_with_llama_guard()`.
+    """
+
+    def __init__(
+        self,
+        escalate: Callable[..., Awaitable[Tuple[bool, str]]] = check_query_safety_with_llama_guard,
+        classifier: Optional[LinearSafetyClassifier] = None,
+        benign_threshold: float = SAFETY_BENIGN_THRESHOLD,
+        unsafe_threshold: float = SAFETY_UNSAFE_THRESHOLD,
+        shadow_rate: float = SAFETY_SHADOW_RATE,
+    ):
+        """
+        Initialize the engine.
+
+        Args:
+            escalate: Async Llama Guard check called with (query, timeout=...)
+            classifier: Local classifier (defaults to the built-in weights)
+            benign_threshold: Classifier scores at or below this are allowed locally
+            unsafe_threshold: Classifier scores at or above this are blocked locally
+            shadow_rate: Fraction (0-1) of local decisions also checked by Llama Guard
+        """
+        self.escalate = escalate
+        self.classifier = classifier or LinearSafetyClassifier.from_file(None)
+        self.benign_threshold = benign_threshold
+        self.unsafe_threshold = unsafe_threshold
+        self.shadow_rate = shadow_rate
+
+        self._block_rules = {
+            name: re.compile(pattern, re.IGNORECASE) for name, pattern in BLOCK_PATTERNS.items()
+        }
+
+        self.decisions = {
+            tier: {"safe": 0, "unsafe": 0}
+            for tier in ("rules", "classifier", "llama_guard", "fallback")
+        }
+        self.shadow = {tier: {"compared": 0, "agreed": 0} for tier in ("rules", "classifier")}
+        self._shadow_tasks = set()
+
+    def classify_locally(self, query: str) -> Tuple[Optional[bool], str, str]:
+        """
+        Run the local tiers only.
+
+        Returns:
+            (is_safe or None when ambiguous, reason, tier)
+        """
+        for name, rule in self._block_rules.items():
+            if rule.search(query):
+                return False, f"Request matches a disallowed category ({name})", "rules"
+
+        score = self.classifier.score(query)
+        if score >= self.unsafe_threshold:
+            return False, "Content may violate safety guidelines", "classifier"
+
+        # Queries with an unsafe token always go to Llama Guard, however benign they look
+        unsafe_tokens = self.classifier.unsafe_tokens(query)
+        if unsafe_tokens:
+            return (
+                None,
+                f"Ambiguous (unsafe tokens: {', '.join(sorted(unsafe_tokens))})",
+                "classifier",
+            )
+
+        if len(query) <= BENIGN_RULE_MAX_CHARS and score < BENIGN_RULE_MAX_SCORE:
+            if self._is_coursework_question(query):
+                return True, "Content is safe", "rules"
+
+        # A low score only counts from a calibrated model that knows every word of the query
+        unknown_tokens = self.classifier.unknown_tokens(query)
+        if self.classifier.calibrated and not unknown_tokens and score <= self.benign_threshold:
+            return True, "Content is safe", "classifier"
+        return None, f"Ambiguous (classifier score {score:.2f})", "classifier"
+
+    @staticmethod
+    def _is_coursework_question(query: str) -> bool:
+        """Whether every word of `query` is a coursework term or question word (and one is a term)."""
+        topic = False
+        for token in _TOKEN.findall(query.lower()):
+            stem = token[:-1] if token.endswith("s") else token
+            if token in COURSEWORK_WORDS or stem in COURSEWORK_WORDS:
+                topic = True
+            elif token not in QUESTION_WORDS:
+                return False
+        return topic
+
+    def _record(self, tier: str, is_safe: bool) -> None:
+        self.decisions[tier]["safe" if is_safe else "unsafe"] += 1
+
+    async def _compare_with_llama_guard(
+        self, query: str, tier: str, is_safe: bool, timeout: Optional[float]
+    ) -> None:
+        """Shadow check: ask Llama Guard and record whether it agrees with the local tier."""
+        try:
+            guard_safe, _ = await self.escalate(query, timeout=timeout)
+        except Exception as e:
+            logger.error(f"Shadow safety check failed: {e}")
+            return
+        self.shadow[tier]["compared"] += 1
+        if guard_safe == is_safe:
+            self.shadow[tier]["agreed"] += 1
+        else:
+            logger.warning(f"Shadow disagreement ({tier}): local={is_safe} guard={guard_safe}")
+
+    def _start_shadow_check(
+        self, query: str, tier: str, is_safe: bool, timeout: Optional[float]
+    ) -> None:
+        if self.shadow_rate <= 0 or random.random() >= self.shadow_rate:
+            return
+        task = asyncio.create_task(self._compare_with_llama_guard(query, tier, is_safe, timeout))
+        self._shadow_tasks.add(task)
+        task.add_done_callback(self._shadow_tasks.discard)
+
+    async def check(self, query: str, timeout: Optional[float] = None) -> Tuple[bool, str]:
+        """
+        Check if a query is safe, escalating to Llama Guard only when the local tiers are unsure.
+
+        Args:
+            query: The user query to check for safety
+            timeout: Timeout in seconds for the Llama Guard request (default: adaptive)
+
+        Returns:
+            Tuple of (is_safe, reason)
+        """
+        is_safe, reason, tier = self.classify_locally(query)
+        if is_safe is not None:
+            logger.info(f"Safety decided locally by {tier}: {'SAFE' if is_safe else 'UNSAFE'}")
+            self._record(tier, is_safe)
+            self._start_shadow_check(query, tier, is_safe, timeout)
+            return is_safe, reason
+
+        if get_stage("safety").breaker.state == CircuitBreaker.OPEN:
+            # Llama Guard is failing: an ambiguous query is refused, not guessed
+            logger.warning(f"{reason}, safety breaker open, blocking")
+            self._record("fallback", False)
+            return False, "Safety check unavailable, please retry shortly"
+
+        logger.info(f"{reason}, escalating to Llama Guard")
+        is_safe, reason = await self.escalate(query, timeout=timeout)
+        self._record("llama_guard", is_safe)
+        return is_safe, reason
+
+    async def check_shadow(self, query: str, timeout: Optional[float] = None) -> Tuple[bool, str]:
+        """
+        Check a query with Llama Guard and record whether the local tiers agree with it. The
+        local verdict is never used.
+
+        Args:
+            query: The user query to check for safety
+            timeout: Timeout in seconds for the Llama Guard request (default: adaptive)
+
+        Returns:
+            Tuple of (is_safe, reason) from Llama Guard
+        """
+        local_safe, _, tier = self.classify_locally(query)
+        is_safe, reason = await self.escalate(query, timeout=timeout)
+        self._record("llama_guard", is_safe)
+        if local_safe is not None:
+            self.shadow[tier]["compared"] += 1
+            if local_safe == is_safe:
+                self.shadow[tier]["agreed"] += 1
+            else:
+                logger.warning(f"Shadow disagreement ({tier}): local={local_safe} guard={is_safe}")
+        return is_safe, reason
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-tier decision counts and shadow-mode agreement rates."""
+        agreement = {
+            tier: {
+                **counts,
+                "agreement_rate": (
+                    counts["agreed"] / counts["compared"] if counts["compared"] else None
+                ),
+            }
+            for tier, counts in self.shadow.items()
+        }
+        return {"mode": SAFETY_MODE, "decisions": self.decisions, "shadow": agreement}
+
+
+# Singleton instance for reuse
+_engine = None
+
+
+def get_moderation_engine() -> ModerationEngine:
+    """
+    Get or create the shared moderation engine.
+
+    Returns:
+        ModerationEngine instance
+    """
+    global _engine
+    if _engine is None:
+        _engine = ModerationEngine(
+            classifier=LinearSafetyClassifier.from_file(SAFETY_CLASSIFIER_PATH)
+        )
+    return _engine
+
+
+async def check_query_safety(query: str, timeout: Optional[float] = None) -> Tuple[bool, str]:
+    """
+    Check if a query is safe. Llama Guard decides every query unless SAFETY_MODE is "tiered";
+    in "shadow" mode the local tiers are compared with it.
+
+    Returns:
+        Tuple of (is_safe, reason)
+    """
+    if SAFETY_MODE == "llama_guard":
+        return await check_query_safety_with_llama_guard(query, timeout=timeout)
+    if SAFETY_MODE == "tiered":
+        return await get_moderation_engine().check(query, timeout=timeout)
+    return await get_moderation_engine().check_shadow(query, timeout=timeout)
@@ -3,7 +3,8 @@ Main RAG Orchestration Module for Ollama with Multilingual Support and Extended
 
 This module defines the primary function `query_ollama_with_hybrid_search_multilingual`, which:
 - Detects the language of the user query
-- Translates non-English queries to English
+- Translates non-English queries to English, or (RETRIEVAL_MODE=multilingual) embeds them
+  directly with a multilingual model and asks the LLM to answer in the user's language
 - Performs a hybrid search over vector and BM25 indexes
 - Reranks results using an Ollama LLM
 - Queries an Ollama model to generate a response using retrieved context
@@ -11,9 +12,15 @@ This module defines the primary function `query_ollama_with_hybrid_search_multil
 - Logs all critical steps for auditability
 
 Key Features:
-- Integrated multilingual support with automatic language detection and translation
-- Configurable timeout handling for long-running safety checks, reranking, and generation
-- Contextual conversation memory support via `chat_history`
+- Tiered safety checks (local rules/classifier first, Llama Guard for ambiguous queries)
+- Integrated multilingual support with automatic language detection and non-blocking translation
+- Adaptive per-stage timeouts (p95-based, with ceilings) for safety checks, reranking, and
+  generation, and a degraded answer built from the retrieved passages when generation fails
+- Contextual conversation memory support via `chat_history`, sent as structured chat messages
+  (GENERATION_API=chat) with a stable prefix and per-chat host affinity for KV-cache reuse;
+  history beyond `CHAT_HISTORY_TOKENS` is replaced by the chat's rolling summary
+- Single-flight coalescing of identical concurrent requests (per user) and LLM calls
+- Token counts and model time per stage recorded with the audit row
 - Fine-grained metadata injection and source attribution in responses
 
 Designed for use in secure, production-grade, conversational RAG systems.
@@ -21,17 +28,71 @@ Designed for use in secure, production-grade, conversational RAG systems.
 
 from utils.database import log_audit
 
-from .config import DEFAULT_BM25_K, DEFAULT_VECTOR_K, RERANKER_MODEL, logger
-from .embedding import embed_query
-from .language import detect_language, translate_text
-from .ollama_api import format_prompt, query_llm, rerank_with_llm
-from .safety import check_query_safety_with_llama_guard
-from .search import hybrid_search, retrieve_document_metadata
+from .config import (
+    CHAT_HISTORY_TOKENS,
+    DEFAULT_BM25_K,
+    DEFAULT_VECTOR_K,
+    GENERATION_API,
+    MULTILINGUAL_EMBEDDING_COLUMN,
+    RERANKER_MODEL,
+    RETRIEVAL_MODE,
+    logger,
+)
+from .conversation_memory import select_history, summary_for_prompt
+from .embedding import embed_query, get_multilingual_embedding_model
+from .language import (
+    detect_language,
+    language_name,
+    translate_response_async,
+    translate_text_async,
+)
+from .ollama_api import (
+    build_chat_messages,
+    chat_llm,
+    format_prompt,
+    query_llm,
+    rerank_with_llm,
+)
+from .moderation import check_query_safety
+from .search import hybrid_search, multilingual_embeddings_ready, retrieve_document_metadata
+from .single_flight import make_key, pipeline_flight
+from .usage import start_request_usage
+
+# Default timeouts (in seconds); None uses the adaptive latency budget of each stage
+DEFAULT_SAFETY_TIMEOUT = None
+DEFAULT_RERANKER_TIMEOUT = None
+DEFAULT_QUERY_TIMEOUT = None
+
+# Passages and characters per passage included in a degraded answer
+DEGRADED_PASSAGES = 3
+DEGRADED_PASSAGE_CHARS = 600
+
+
+def build_degraded_answer(context_chunks):
+    """
+    Build a fallback answer from the retrieved passages for when the LLM is unavailable.
+
+    Args:
+        context_chunks: Retrieved chunks (dicts with chunk_text)
 
-# Define default timeouts (in seconds)
-DEFAULT_SAFETY_TIMEOUT = 3600
-DEFAULT_RERANKER_TIMEOUT = 3600
-DEFAULT_QUERY_TIMEOUT = 3600
+    Returns:
+        Answer text listing the most relevant passages
+    """
+    if not context_chunks:
+        return (
+            "The assistant is temporarily unavailable and no relevant passages were found. "
+            "Please try again in a few minutes."
+        )
+    passages = []
+    for i, chunk in enumerate(context_chunks[:DEGRADED_PASSAGES], 1):
+        text = chunk["chunk_text"].strip()
+        if len(text) > DEGRADED_PASSAGE_CHARS:
+            text = text[:DEGRADED_PASSAGE_CHARS].rsplit(" ", 1)[0] + "..."
+        passages.append(f"{i}. {text}")
+    return (
+        "The assistant is temporarily unavailable, so here are the most relevant passages "
+        "from your course documents:\n\n" + "\n\n".join(passages)
+    )
 
 
 async def query_ollama_with_hybrid_search_multilingual(
@@ -46,6 +107,9 @@ async def query_ollama_with_hybrid_search_multilingual(
     safety_timeout=DEFAULT_SAFETY_TIMEOUT,
     reranker_timeout=DEFAULT_RERANKER_TIMEOUT,
     query_timeout=DEFAULT_QUERY_TIMEOUT,
+    retrieval_mode=RETRIEVAL_MODE,
+    chat_id=None,
+    conversation_summary=None,
 ):
     """
     Query the Ollama model using hybrid search with multilingual support.
@@ -60,13 +124,85 @@ async def query_ollama_with_hybrid_search_multilingual(
         vector_k: Number of results to retrieve from vector search
         bm25_k: Number of results to retrieve from BM25 search
         chat_history: List of previous conversation messages
-        safety_timeout: Timeout in seconds for safety check calls (default: 10 minutes)
-        reranker_timeout: Timeout in seconds for reranking calls (default: 10 minutes)
-        query_timeout: Timeout in seconds for LLM query calls (default: 10 minutes)
+        safety_timeout: Timeout in seconds for safety check calls (default: adaptive)
+        reranker_timeout: Timeout in seconds for reranking calls (default: adaptive)
+        query_timeout: Timeout in seconds for LLM query calls (default: adaptive)
+        retrieval_mode: "translate" or "multilingual" (skip translation for non-English questions)
+        chat_id: Conversation id; turns of one chat are routed to the same Ollama host
+        conversation_summary: Rolling summary of the chat ({"text", "through_seq"}), sent in
+            place of the history beyond `CHAT_HISTORY_TOKENS`
+
+    Identical concurrent requests from the same user in the same chat (e.g. a resubmitted
+    turn: same question, history, model and retrieval settings) share one pipeline run; each
+    request still writes its own audit row.
     """
+    history_key = [(msg["role"], msg["content"]) for msg in chat_history or []]
+    summary_key = conversation_summary["text"] if conversation_summary else None
+    key = make_key(
+        "pipeline",
+        user_email,
+        chat_id,
+        model_name,
+        question,
+        history_key,
+        summary_key,
+        vector_k,
+        bm25_k,
+        retrieval_mode,
+    )
+    result, audit = await pipeline_flight.do(
+        key,
+        lambda: _run_pipeline(
+            session,
+            question,
+            embedding_model,
+            user_email,
+            model_name,
+            vector_k,
+            bm25_k,
+            chat_history,
+            safety_timeout,
+            reranker_timeout,
+            query_timeout,
+            retrieval_mode,
+            chat_id,
+            conversation_summary,
+        ),
+    )
+    if audit is not None:
+        # Logged by every caller, with its own session, not once for the shared run
+        log_audit(session=session, user_email=user_email, **audit)
+    return result
+
+
+async def _run_pipeline(
+    session,
+    question,
+    embedding_model,
+    user_email,
+    model_name,
+    vector_k=DEFAULT_VECTOR_K,
+    bm25_k=DEFAULT_BM25_K,
+    chat_history=None,
+    safety_timeout=DEFAULT_SAFETY_TIMEOUT,
+    reranker_timeout=DEFAULT_RERANKER_TIMEOUT,
+    query_timeout=DEFAULT_QUERY_TIMEOUT,
+    retrieval_mode=RETRIEVAL_MODE,
+    chat_id=None,
+    conversation_summary=None,
+):
+    """
+    Run the full RAG pipeline once (see `query_ollama_with_hybrid_search_multilingual`).
+
+    Returns:
+        (result, audit): the response, and the `log_audit` arguments of the answered question
+        (None if it was not answered), so that every caller sharing the run logs it
+    """
+    # Token counts of every Ollama call made for this run, stored with the audit row
+    usage = start_request_usage()
     try:
         # First safety check on original query (any language) with timeout
-        is_safe_original, reason_original = await check_query_safety_with_llama_guard(
+        is_safe_original, reason_original = await check_query_safety(
             question, timeout=safety_timeout
         )
         if not is_safe_original:
@@ -76,28 +212,38 @@ async def query_ollama_with_hybrid_search_multilingual(
                 "safety_issue": True,
                 "response": f"I cannot process this request: {reason_original}",
                 "context_count": 0,
-            }
+            }, None
 
         # Detect original language
         original_language = detect_language(question)
         logger.info(f"Detected language: {original_language}")
 
+        # In multilingual mode the native question is searched and answered directly, once
+        # every chunk has a multilingual embedding (the question is translated until then)
+        multilingual = retrieval_mode == "multilingual" and original_language != "en"
+        if multilingual and not multilingual_embeddings_ready(session):
+            logger.warning("Multilingual embeddings are incomplete, translating the question")
+            multilingual = False
+
         # Translate question to English if not already English
-        if original_language != "en":
-            english_question = translate_text(
+        if multilingual:
+            english_question = question
+            logger.info("Multilingual retrieval: skipping question translation")
+        elif original_language != "en":
+            english_question = await translate_text_async(
                 question, target_lang="en", source_lang=original_language
             )
             logger.info(f"Translated question to English: {english_question}")
 
             # Second safety check on translated English question with timeout
-            is_safe_translated, reason_translated = await check_query_safety_with_llama_guard(
+            is_safe_translated, reason_translated = await check_query_safety(
                 english_question, timeout=safety_timeout
             )
             if not is_safe_translated:
                 logger.warning(f"Translated query failed safety check: {reason_translated}")
                 # Translate the rejection reason back to the original language
                 rejection_message = f"I cannot process this request: {reason_translated}"
-                localized_rejection = translate_text(
+                localized_rejection = await translate_text_async(
                     rejection_message, target_lang=original_language, source_lang="en"
                 )
                 return {
@@ -106,17 +252,28 @@ async def query_ollama_with_hybrid_search_multilingual(
                     "safety_issue": True,
                     "response": localized_rejection,
                     "context_count": 0,
-                }
+                }, None
         else:
             english_question = question
 
-        # Embed the English query
-        query_embedding = embed_query(english_question, embedding_model)
+        # Embed the English query (or the native query with the multilingual model)
+        if multilingual:
+            query_embedding = embed_query(english_question, get_multilingual_embedding_model())
+            embedding_column = MULTILINGUAL_EMBEDDING_COLUMN
+        else:
+            query_embedding = embed_query(english_question, embedding_model)
+            embedding_column = "embedding"
         logger.info(f"Generated query embedding with {len(query_embedding)} dimensions")
 
         # Perform hybrid search
         context_chunks, sorted_results = hybrid_search(
-            session, english_question, query_embedding, vector_k, bm25_k, user_email
+            session,
+            english_question,
+            query_embedding,
+            vector_k,
+            bm25_k,
+            user_email,
+            embedding_column=embedding_column,
         )
 
         # Apply LLM reranking to combined results with timeout
@@ -147,19 +304,7 @@ async def query_ollama_with_hybrid_search_multilingual(
         ]
         context = "\n\n".join(contexts)
 
-        conversation_context = ""
-        if chat_history and len(chat_history) > 0:
-            # Format the last few interactions (limiting to prevent context window issues)
-            recent_history = chat_history[-6:]  # Last 3 user/assistant pairs
-
-            conversation_context = "PREVIOUS CONVERSATION:\n"
-            for msg in recent_history:
-                role = "User" if msg["role"] == "user" else "Assistant"
-                conversation_context += f"{role}: {msg['content']}\n\n"
-
-            conversation_context += "CURRENT QUESTION:\n"
-
-        # System prompt - add multilingual instruction if needed
+        # System prompt (kept identical across turns so chat mode can reuse it from the KV cache)
         system_prompt = """
         You are an AI assistant specialized in machine learning, deep learning, and data science.
         You provide helpful, accurate, and educational responses to questions about these topics.
@@ -183,16 +328,68 @@ async def query_ollama_with_hybrid_search_multilingual(
         - Remember details the user has shared about their project or needs throughout the conversation.
         """
 
-        # For non-English queries, specify that response should be in English first (we'll translate after)
-        if original_language != "en":
-            system_prompt += "\n\nPlease respond in English. The response will be translated later."
-
-        # Format the prompt with English question
-        prompt = format_prompt(system_prompt, context, english_question, conversation_context)
+        # For non-English queries, answer directly in the user's language (multilingual mode) or
+        # in English first (we'll translate after)
+        language_instruction = ""
+        if multilingual:
+            language_instruction = (
+                f"The user wrote in {language_name(original_language)}. "
+                f"Respond in {language_name(original_language)}."
+            )
+        elif original_language != "en":
+            language_instruction = (
+                "Please respond in English. The response will be translated later."
+            )
 
-        # Query the LLM with timeout
-        english_response = await query_llm(prompt, model_name, timeout=query_timeout)
-        logger.info("Successfully generated English response")
+        # Recent messages within the history token budget; older ones are sent as the summary.
+        # Until the chat has a summary, the whole history window is sent.
+        older_history, recent_history = select_history(
+            chat_history, CHAT_HISTORY_TOKENS if conversation_summary else None
+        )
+        summary = summary_for_prompt(conversation_summary, older_history)
+
+        if GENERATION_API == "chat":
+            # Structured messages: system prompt, summary and history, then this turn's context
+            # and question
+            messages = build_chat_messages(
+                system_prompt,
+                context,
+                english_question,
+                recent_history,
+                language_instruction,
+                summary,
+            )
+            english_response = await chat_llm(
+                messages, model_name, timeout=query_timeout, chat_id=chat_id
+            )
+        else:
+            conversation_context = ""
+            if summary:
+                conversation_context = f"SUMMARY OF THE EARLIER CONVERSATION:\n{summary}\n\n"
+            if recent_history:
+                conversation_context += "PREVIOUS CONVERSATION:\n"
+                for msg in recent_history:
+                    role = "User" if msg["role"] == "user" else "Assistant"
+                    conversation_context += f"{role}: {msg['content']}\n\n"
+
+                conversation_context += "CURRENT QUESTION:\n"
+
+            if language_instruction:
+                system_prompt += f"\n\n{language_instruction}"
+
+            # Format the prompt with English question
+            prompt = format_prompt(system_prompt, context, english_question, conversation_context)
+
+            # Query the LLM with timeout
+            english_response = await query_llm(prompt, model_name, timeout=query_timeout)
+
+        # Degrade instead of returning the error text when generation failed or is shed
+        degraded = english_response.startswith("Error:")
+        if degraded:
+            logger.warning(f"Generation failed, returning degraded answer: {english_response}")
+            english_response = build_degraded_answer(context_chunks)
+        else:
+            logger.info("Successfully generated English response")
 
         # Create the sources section with document metadata
         sources_section = "\n\nSOURCES:\n"
@@ -201,35 +398,40 @@ async def query_ollama_with_hybrid_search_multilingual(
                 meta = document_metadata[doc_id]
                 sources_section += f"{i}. [Document ID: {doc_id}] {meta.get('class_name', 'N/A')} by {meta.get('authors', 'N/A')} ({meta.get('term', 'N/A')})\n"
 
-        # Append sources to the English response
-        english_response += sources_section
-
-        # Translate response back to original language if not English
-        if original_language != "en":
-            final_response = translate_text(
-                english_response, target_lang=original_language, source_lang="en"
+        # Translate the answer back to the original language if not English; the SOURCES
+        # block (document ids, authors) is appended afterwards and never translated
+        if original_language != "en" and (not multilingual or degraded):
+            final_response = (
+                await translate_response_async(english_response, target_lang=original_language)
+                + sources_section
             )
             logger.info(f"Translated response to {original_language}")
         else:
-            final_response = english_response
+            final_response = english_response + sources_section
+
+        # Append sources to the English response
+        english_response += sources_section
 
-        # Log the original question, English translation, and English response
-        log_audit(
-            session=session,
-            user_email=user_email,
+        # Audit the original question, English translation, and English response
+        audit = dict(
             query=question,  # Log original question
-            query_embedding=query_embedding,
+            # The audit column holds default-model embeddings; multilingual ones are not stored
+            query_embedding=None if multilingual else query_embedding,
             chunks=context_chunks,
             response=english_response,  # Log English response for consistency
             detected_language=original_language,  # Pass the detected language
+            token_usage=usage.to_dict(),
         )
 
         # Don't close the session here - let the calling function handle it
         return {
             "original_question": question,
             "detected_language": original_language,
-            "english_question": english_question if original_language != "en" else None,
+            "english_question": (
+                english_question if original_language != "en" and not multilingual else None
+            ),
             "context_count": len(context_chunks),
+            "degraded": degraded,
             "response": final_response,  # Return response in original language
             "top_documents": [
                 {
@@ -248,7 +450,7 @@ async def query_ollama_with_hybrid_search_multilingual(
                 }
                 for doc_id in top_document_ids
             ],
-        }
+        }, audit
 
     except Exception as e:
         logger.exception(f"Error in query_ollama_with_hybrid_search_multilingual: {str(e)}")
@@ -256,10 +458,10 @@ async def query_ollama_with_hybrid_search_multilingual(
         error_response = "Sorry, I encountered an error while processing your question."
         if "original_language" in locals() and original_language != "en":
             try:
-                error_response = translate_text(
+                error_response = await translate_text_async(
                     error_response, target_lang=original_language, source_lang="en"
                 )
             except Exception:
                 pass  # If translation fails, use English error
 
-        return {"question": question, "error": str(e), "response": error_response}
+        return {"question": question, "error": str(e), "response": error_response}, None
@@ -7,146 +7,320 @@ the Ollama API to perform:
 - Text generation using LLMs via async HTTP requests.
 - Prompt-based reranking of document chunks for query relevance scoring.
 - Prompt formatting for conversational query responses.
+- Multi-turn generation via the chat API with a stable, cacheable message prefix.
+- Per-stage generation profiles sent as Ollama `options` (num_predict, num_ctx, stop), with
+  the output checked against the limit.
 
 Key Features:
-- Extended timeout handling (default 10 minutes) for long LLM operations.
+- Adaptive per-stage timeouts (recent p95 with ceilings) for long LLM operations.
+- Circuit breakers per stage: calls fail fast while Ollama is failing, reranking then keeps
+  the original order.
+- Single-flight coalescing: identical concurrent requests share one upstream call.
 - Graceful error recovery and fallback behavior.
+- Requests wait for a slot from the priority scheduler (answer > safety > rerank > batch).
+- Requests routed across Ollama hosts by the endpoint pool (least outstanding, model loaded).
+- Token counts and model time of every call recorded for the current request (`usage.py`).
+- `keep_alive` on every request and load-duration metrics via the model residency manager.
+- Chat turns stick to one Ollama host so the conversation prefix is reused from its KV cache.
 - Designed for integration into RAG (retrieval-augmented generation) pipelines.
 """
 
 import re
+import time
 import aiohttp
 import asyncio
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from .config import CHAT_HISTORY_MESSAGES, RERANKER_MODEL, logger
+from .generation_profiles import check_limits, profile_options
+from .model_residency import get_residency_manager
+from .ollama_pool import EndpointFailure, get_ollama_pool
+from .resilience import CircuitBreaker, get_stage
+from .scheduler import get_scheduler
+from .single_flight import llm_flight, make_key
+from .usage import record_usage
+
+# Timeout used when callers want a fixed budget instead of the adaptive stage timeout
+DEFAULT_TIMEOUT = 3600
 
-from .config import GENERATION_CONFIG, OLLAMA_URL, RERANKER_MODEL, logger
+# Default generation profile per stage
+STAGE_PROFILES = {"generate": "answer", "rerank": "rerank"}
 
-# Configure longer timeouts (10 minutes = 600 seconds)
-DEFAULT_TIMEOUT = 3600
+
+class OllamaRequestError(Exception):
+    """Raised by `AsyncOllamaAPIClient._request` with the error text returned to callers."""
 
 
 class AsyncOllamaAPIClient:
-    def __init__(self, model_name: str, timeout: int = DEFAULT_TIMEOUT):
+    def __init__(
+        self,
+        model_name: str,
+        timeout: Optional[float] = None,
+        stage: str = "generate",
+        profile: Optional[str] = None,
+        priority: Optional[str] = None,
+    ):
         """
         Initialize an async client for Ollama model interactions via API.
 
         Args:
             model_name: Name of the Ollama model
-            timeout: Timeout in seconds for API requests (default: 10 minutes)
+            timeout: Timeout in seconds for API requests (default: adaptive stage budget)
+            stage: Pipeline stage ("generate" or "rerank") for latency budget and breaker
+            profile: Generation profile (default: "rerank" for the rerank stage, else "answer")
+            priority: Scheduler priority class (default: the profile name)
         """
         self.model_name = model_name
-        self.api_base = OLLAMA_URL
+        self.pool = get_ollama_pool()
         self.timeout = timeout
+        self.stage = get_stage(stage)
+        self.profile = profile or STAGE_PROFILES.get(stage, "answer")
+        self.priority = priority or self.profile
         logger.info(
-            f"Initialized AsyncOllamaAPIClient for model: {model_name} with {timeout}s timeout"
+            f"Initialized AsyncOllamaAPIClient for model: {model_name} "
+            f"(stage {stage}, profile {self.profile}, timeout {timeout or 'adaptive'})"
         )
 
     async def generate_text(
         self,
         prompt: str,
-        temperature: float = 0.7,
-        top_p: float = 0.9,
-        repeat_penalty: float = 1.1,
-        max_tokens: int = 2048,
-        timeout: int = None,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        repeat_penalty: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> str:
+        """
+        Generate text using Ollama model via API. Concurrent calls with the same model, prompt
+        and generation options share one upstream request.
+
+        Args:
+            prompt: Input text prompt
+            temperature: Sampling temperature (default: from the generation profile)
+            top_p: Top-p sampling parameter (default: from the generation profile)
+            repeat_penalty: Penalty for repeating tokens (default: from the generation profile)
+            max_tokens: Maximum number of tokens to generate (default: profile's num_predict)
+            timeout: Optional request-specific timeout in seconds (overrides default)
+
+        Returns:
+            Generated text response
+        """
+        options = profile_options(
+            self.profile,
+            temperature=temperature,
+            top_p=top_p,
+            repeat_penalty=repeat_penalty,
+            max_tokens=max_tokens,
+        )
+        key = make_key("generate", self.model_name, prompt, options)
+        return await llm_flight.do(key, lambda: self._generate_text(prompt, options, timeout))
+
+    async def _generate_text(
+        self, prompt: str, options: Dict[str, Any], timeout: Optional[float] = None
     ) -> str:
         """
-        Generate text using Ollama model via API.
+        Generate text using Ollama model via API (one upstream request).
 
         Args:
             prompt: Input text prompt
-            temperature: Sampling temperature
-            top_p: Top-p sampling parameter
-            repeat_penalty: Penalty for repeating tokens
-            max_tokens: Maximum number of tokens to generate
+            options: Ollama options (see `profile_options`)
             timeout: Optional request-specific timeout in seconds (overrides default)
 
         Returns:
             Generated text response
         """
+        # Prepare the payload for the API request
+        payload = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "options": options,
+            "stream": False,  # We want the full response at once
+        }
         try:
-            # Use provided timeout or fall back to instance default
-            request_timeout = timeout if timeout is not None else self.timeout
-
-            # Prepare the payload for the API request
-            payload = {
-                "model": self.model_name,
-                "prompt": prompt,
-                "temperature": temperature,
-                "top_p": top_p,
-                "repeat_penalty": repeat_penalty,
-                "max_tokens": max_tokens,
-                "stream": False,  # We want the full response at once
-            }
+            response_data = await self._request("generate", payload, timeout)
+        except OllamaRequestError as e:
+            return f"Error: {str(e)}"
 
-            # Make the API request
+        api_response = response_data.get("response", "")
+
+        # Clean the output to match the CLI behavior
+        if prompt in api_response:
+            api_response = api_response[api_response.find(prompt) + len(prompt) :].strip()
+
+        return api_response
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        repeat_penalty: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        timeout: Optional[float] = None,
+        chat_id: Optional[str] = None,
+    ) -> str:
+        """
+        Generate the next assistant message via the Ollama chat API. Turns of the same chat are
+        routed to the same host, where the unchanged message prefix is served from the KV cache.
+        Concurrent calls with identical messages and options share one upstream request.
+
+        Args:
+            messages: Chat messages (dicts with role and content), see `build_chat_messages`
+            temperature: Sampling temperature (default: from the generation profile)
+            top_p: Top-p sampling parameter (default: from the generation profile)
+            repeat_penalty: Penalty for repeating tokens (default: from the generation profile)
+            max_tokens: Maximum number of tokens to generate (default: profile's num_predict)
+            timeout: Optional request-specific timeout in seconds (overrides default)
+            chat_id: Conversation id used for host affinity
+
+        Returns:
+            Generated assistant message, or a string starting with "Error:"
+        """
+        options = profile_options(
+            self.profile,
+            temperature=temperature,
+            top_p=top_p,
+            repeat_penalty=repeat_penalty,
+            max_tokens=max_tokens,
+        )
+        payload = {
+            "model": self.model_name,
+            "messages": messages,
+            "options": options,
+            "stream": False,
+        }
+
+        async def send() -> str:
+            try:
+                response_data = await self._request("chat", payload, timeout, affinity_key=chat_id)
+            except OllamaRequestError as e:
+                return f"Error: {str(e)}"
             logger.info(
-                f"Sending generate request to API for model: {self.model_name} with {request_timeout}s timeout"
+                f"Chat {chat_id or '-'}: {response_data.get('prompt_eval_count', 0)} prompt "
+                f"tokens evaluated for {len(messages)} messages"
             )
+            return response_data.get("message", {}).get("content", "")
+
+        return await llm_flight.do(make_key("chat", self.model_name, messages, options), send)
+
+    async def _request(
+        self,
+        api: str,
+        payload: Dict[str, Any],
+        timeout: Optional[float] = None,
+        affinity_key: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Send one request to `/api/{api}` ("generate" or "chat") on a pool endpoint, with the
+        stage's circuit breaker, latency budget and model residency metrics.
+
+        Args:
+            api: Ollama API name
+            payload: Request body (`keep_alive` is added)
+            timeout: Optional request-specific timeout in seconds (overrides default)
+            affinity_key: Optional key pinning the request to the host of earlier requests
+
+        Returns:
+            Decoded Ollama response (checked against the generation profile's output limit)
+
+        Raises:
+            OllamaRequestError: The request failed, timed out or the breaker is open
+        """
+        # Use provided timeout, the instance default, or the stage's adaptive budget
+        request_timeout = timeout or self.timeout or self.stage.timeout()
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.api_base,
-                    json=payload,
-                    headers={"Content-Type": "application/json"},
-                    timeout=aiohttp.ClientTimeout(total=request_timeout),  # Extended timeout
-                ) as response:
-                    if response.status != 200:
-                        error_msg = (
-                            f"Error generating text: {response.status} - {await response.text()}"
-                        )
-                        logger.error(error_msg)
-                        return f"Error: {error_msg}"
-
-                    # Extract the generated text from the response
-                    response_data = await response.json()
-                    api_response = response_data.get("response", "")
-
-                    # Clean the output to match the CLI behavior
-                    if prompt in api_response:
-                        api_response = api_response[
-                            api_response.find(prompt) + len(prompt) :
-                        ].strip()
-
-                    return api_response
+        if not self.stage.breaker.allow():
+            logger.warning(f"{self.stage.name} circuit breaker is open, failing fast")
+            raise OllamaRequestError(f"{self.stage.name} circuit breaker is open")
+
+        payload = {**payload, "keep_alive": get_residency_manager().keep_alive}
+        try:
+            # Make the API request
+            logger.info(
+                f"Sending {api} request to API for model: {self.model_name} with {request_timeout}s timeout"
+            )
 
+            async with get_scheduler().slot(self.priority), self.pool.acquire(
+                self.model_name, affinity_key
+            ) as endpoint:
+                start = time.monotonic()  # Service time only, queue wait excluded
+                async with aiohttp.ClientSession() as session:
+                    async with session.post(
+                        f"{endpoint.base_url}/api/{api}",
+                        json=payload,
+                        headers={"Content-Type": "application/json"},
+                        timeout=aiohttp.ClientTimeout(total=request_timeout),  # Extended timeout
+                    ) as response:
+                        if response.status != 200:
+                            error_msg = (
+                                f"Error generating text: {response.status} - "
+                                f"{await response.text()}"
+                            )
+                            logger.error(error_msg)
+                            self.stage.record_failure()
+                            if response.status >= 500:
+                                raise EndpointFailure(error_msg)
+                            raise OllamaRequestError(error_msg)
+
+                        response_data = await response.json()
+                        self.stage.record_success(time.monotonic() - start)
+                        get_residency_manager().record(self.model_name, response_data)
+                        check_limits(self.profile, payload.get("options", {}), response_data)
+                        record_usage(self.profile, response_data)
+                        return response_data
+
+        except OllamaRequestError:
+            raise
+        except asyncio.CancelledError:
+            # Says nothing about Ollama, but must not hold the breaker's trial slot
+            self.stage.breaker.release()
+            raise
         except aiohttp.ClientError as ce:
-            error_message = f"Network error in generate_text: {str(ce)}"
+            self.stage.record_failure()
+            error_message = f"Network error in {api} request: {str(ce)}"
             logger.exception(error_message)
-            return f"Error: {error_message}"
+            raise OllamaRequestError(error_message)
         except asyncio.TimeoutError:
+            self.stage.record_failure()
             error_message = f"Request timed out after {request_timeout} seconds"
             logger.exception(error_message)
-            return f"Error: {error_message}"
+            raise OllamaRequestError(error_message)
+        except EndpointFailure as ef:
+            raise OllamaRequestError(str(ef))
         except Exception as e:
-            error_message = f"Error in generate_text: {str(e)}"
-            logger.exception(error_message)
-            return f"Error: {str(e)}"
+            self.stage.record_failure()
+            logger.exception(f"Error in {api} request: {str(e)}")
+            raise OllamaRequestError(str(e))
 
 
 async def rerank_with_llm(
-    chunks: List[Dict[str, Any]], query: str, model_name: str = None, timeout: int = DEFAULT_TIMEOUT
+    chunks: List[Dict[str, Any]],
+    query: str,
+    model_name: str = None,
+    timeout: Optional[float] = None,
 ) -> List[Dict[str, Any]]:
     """
     Use an Ollama model to rerank chunks based on relevance to the query.
-    Falls back to original ordering if API calls fail.
+    Falls back to original ordering if API calls fail or the rerank circuit breaker is open.
 
     Args:
         chunks: List of document chunks to rerank
         query: The user's query
         model_name: Optional model name to override the RERANKER_MODEL from config
-        timeout: Timeout in seconds for API requests (default: 10 minutes)
+        timeout: Timeout in seconds per API request (default: adaptive "rerank" budget)
     """
     try:
         # Use RERANKER_MODEL if no specific model provided
         if model_name is None:
             model_name = RERANKER_MODEL
 
-        logger.info(f"Reranking using model: {model_name} with {timeout}s timeout")
         logger.info(f"Using prompt-based reranking with model: {model_name}")
 
-        # Initialize API client with extended timeout
-        model_client = AsyncOllamaAPIClient(model_name, timeout=timeout)
+        # Skip reranking entirely while the reranker is failing
+        model_client = AsyncOllamaAPIClient(model_name, timeout=timeout, stage="rerank")
+        if model_client.stage.breaker.state == CircuitBreaker.OPEN:
+            logger.warning("Rerank circuit breaker is open, keeping original order")
+            return chunks
 
         # If we got here, the test was successful - proceed with reranking
         reranking_results = []
@@ -162,11 +336,13 @@ On a scale of 0 to 10, how relevant is the text to the query?
 Respond with only a number from 0 to 10.
 """
                 # Process each chunk individually
-                score_text = await model_client.generate_text(
-                    prompt=prompt,
-                    temperature=0.1,  # Low temperature for consistent scoring
-                    max_tokens=50,  # We only need a short response
-                )
+                # The "rerank" profile keeps the temperature low and the output to a few tokens
+                score_text = await model_client.generate_text(prompt=prompt)
+
+                # Stop early if the breaker opened during this request
+                if model_client.stage.breaker.state == CircuitBreaker.OPEN:
+                    logger.warning("Rerank circuit breaker opened, keeping original order")
+                    return chunks
 
                 # Create a copy of the chunk to add the score
                 chunk_with_score = chunk.copy()
@@ -231,28 +407,110 @@ RESPONSE:
 """
 
 
-async def query_llm(prompt: str, model_name: str, timeout: int = DEFAULT_TIMEOUT) -> str:
+def history_window(
+    chat_history: Optional[List[Dict[str, Any]]], window: int = CHAT_HISTORY_MESSAGES
+) -> List[Dict[str, Any]]:
+    """
+    Select the history messages sent with a turn. The start of the window advances in blocks of
+    `window` messages, so consecutive turns share the same history prefix (and KV cache).
+    Blocks are aligned on each message's `seq` (its position in the whole conversation), so a
+    history loaded as only the latest messages of a chat selects the same window.
+    """
+    if not chat_history or window <= 0:
+        return []
+    offset = chat_history[0].get("seq", 0)
+    total = offset + len(chat_history)
+    start = max(0, total - window) // window * window
+    return chat_history[max(0, start - offset) :]
+
+
+def build_chat_messages(
+    system_prompt: str,
+    context: str,
+    question: str,
+    chat_history: Optional[List[Dict[str, Any]]] = None,
+    instructions: str = "",
+    summary: str = "",
+) -> List[Dict[str, str]]:
+    """
+    Build chat API messages with the stable parts first: the system prompt, then the summary of
+    the earlier conversation and the history, then the per-turn retrieved context and question.
+
+    Args:
+        system_prompt: Fixed system prompt (must not vary per turn)
+        context: Retrieved context for this turn
+        question: The user's question
+        chat_history: Previous conversation messages (dicts with role and content)
+        instructions: Per-turn instructions (e.g. response language) added to the last message
+        summary: Summary of the conversation before `chat_history` (see conversation_memory.py)
+
+    Returns:
+        List of message dicts for `AsyncOllamaAPIClient.chat`
+    """
+    messages = [{"role": "system", "content": system_prompt.strip()}]
+    if summary:
+        messages.append(
+            {"role": "system", "content": f"SUMMARY OF THE EARLIER CONVERSATION:\n{summary}"}
+        )
+    for msg in history_window(chat_history):
+        role = "user" if msg["role"] == "user" else "assistant"
+        messages.append({"role": role, "content": msg["content"]})
+
+    turn = f"CONTEXT:\n{context}\n\n"
+    if instructions:
+        turn += f"{instructions.strip()}\n\n"
+    turn += f"USER QUERY:\n{question}"
+    messages.append({"role": "user", "content": turn})
+    return messages
+
+
+async def query_llm(prompt: str, model_name: str, timeout: Optional[float] = None) -> str:
     """
     Query the Ollama model with a formatted prompt.
 
     Args:
         prompt: The formatted prompt to send to the model
         model_name: Name of the Ollama model to use
-        timeout: Timeout in seconds for API request (default: 10 minutes)
+        timeout: Timeout in seconds for API request (default: adaptive "generate" budget)
+
+    Returns:
+        Generated text, or a string starting with "Error:" (including when the breaker is open)
     """
     try:
-        # Initialize Ollama API client with extended timeout
+        # Initialize Ollama API client with the generation budget
         model_client = AsyncOllamaAPIClient(model_name, timeout=timeout)
 
         # Generate response using API model
-        response = await model_client.generate_text(
-            prompt=prompt,
-            temperature=GENERATION_CONFIG["temperature"],
-            top_p=GENERATION_CONFIG["top_p"],
-            repeat_penalty=GENERATION_CONFIG["repeat_penalty"],
-        )
+        # Sampling options and limits come from the "answer" generation profile
+        response = await model_client.generate_text(prompt=prompt)
 
         return response
     except Exception as e:
         logger.exception(f"Error querying LLM: {str(e)}")
         return f"Error: {str(e)}"
+
+
+async def chat_llm(
+    messages: List[Dict[str, str]],
+    model_name: str,
+    timeout: Optional[float] = None,
+    chat_id: Optional[str] = None,
+) -> str:
+    """
+    Query the Ollama model with chat messages.
+
+    Args:
+        messages: Chat messages built by `build_chat_messages`
+        model_name: Name of the Ollama model to use
+        timeout: Timeout in seconds for API request (default: adaptive "generate" budget)
+        chat_id: Conversation id; turns of the same chat are routed to the same host
+
+    Returns:
+        Generated text, or a string starting with "Error:" (including when the breaker is open)
+    """
+    try:
+        model_client = AsyncOllamaAPIClient(model_name, timeout=timeout)
+        return await model_client.chat(messages, chat_id=chat_id)
+    except Exception as e:
+        logger.exception(f"Error querying LLM: {str(e)}")
+        return f"Error: {str(e)}"
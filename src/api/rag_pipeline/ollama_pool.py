@@ -0,0 +1,270 @@
+"""
+Ollama Endpoint Pool for the Ollama RAG System
+
+This module spreads generation across several Ollama hosts without an external proxy:
+
+- `OLLAMA_HOSTS` lists the hosts (`host`, `host:port` or a full URL).
+- Each call is routed to a healthy host that already has the model loaded, choosing the one
+  with the fewest outstanding requests (hosts without the model are used only as a fallback).
+- A background health check polls `/api/ps` on every host, refreshing its loaded models.
+- Hosts that fail repeatedly (network errors, timeouts, 5xx) are ejected for a cooldown period.
+- Requests with an affinity key (e.g. a chat id) stick to the host that served the previous
+  turn while it is healthy, so Ollama can reuse the KV cache of the conversation prefix.
+
+Usage:
+    async with get_ollama_pool().acquire(model_name) as endpoint:
+        async with session.post(endpoint.generate_url, json=payload) as response:
+            ...
+
+Functions:
+- `get_ollama_pool()`: Return the shared pool configured from `config.py`.
+"""
+
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Set
+
+import aiohttp
+
+from .config import (
+    CHAT_AFFINITY_SIZE,
+    OLLAMA_EJECT_AFTER,
+    OLLAMA_EJECT_SECONDS,
+    OLLAMA_HEALTH_INTERVAL,
+    OLLAMA_HOSTS,
+    logger,
+)
+
+# Timeout for health-check requests
+HEALTH_CHECK_TIMEOUT = 5
+
+
+def normalize_host(host: str) -> str:
+    """Turn `host`, `host:port` or a URL into an Ollama base URL."""
+    host = host.strip().rstrip("/")
+    if not host.startswith(("http://", "https://")):
+        host = f"http://{host}"
+    if host.count(":") == 1:  # Only the scheme separator, no port
+        host = f"{host}:11434"
+    return host
+
+
+class OllamaEndpoint:
+    """One Ollama host with its load and health state."""
+
+    def __init__(self, base_url: str):
+        self.base_url = normalize_host(base_url)
+        self.outstanding = 0
+        self.loaded_models: Set[str] = set()
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    @property
+    def generate_url(self) -> str:
+        return f"{self.base_url}/api/generate"
+
+    @property
+    def chat_url(self) -> str:
+        return f"{self.base_url}/api/chat"
+
+    @property
+    def healthy(self) -> bool:
+        return time.time() >= self.ejected_until
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "loaded_models": sorted(self.loaded_models),
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+class EndpointFailure(Exception):
+    """Raised inside `acquire()` to count a response (e.g. HTTP 5xx) as a host failure."""
+
+
+class OllamaPool:
+    """Least-outstanding-requests router over a set of Ollama hosts."""
+
+    def __init__(
+        self,
+        hosts: List[str] = OLLAMA_HOSTS,
+        eject_after: int = OLLAMA_EJECT_AFTER,
+        eject_seconds: float = OLLAMA_EJECT_SECONDS,
+        health_interval: float = OLLAMA_HEALTH_INTERVAL,
+        affinity_size: int = CHAT_AFFINITY_SIZE,
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            hosts: Ollama hosts (`host`, `host:port` or base URLs)
+            eject_after: Consecutive failures after which a host is ejected
+            eject_seconds: How long an ejected host is skipped
+            health_interval: Seconds between background health checks
+            affinity_size: Affinity keys remembered (least recently used are dropped)
+        """
+        if not hosts:
+            raise ValueError("At least one Ollama host is required")
+        self.endpoints = [OllamaEndpoint(host) for host in dict.fromkeys(hosts)]
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.health_interval = health_interval
+        self.affinity_size = affinity_size
+        self._affinity: "OrderedDict[str, OllamaEndpoint]" = OrderedDict()
+        self.affinity_hits = 0
+        self.affinity_misses = 0
+        self._round_robin = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    def choose(
+        self, model: Optional[str] = None, affinity_key: Optional[str] = None
+    ) -> OllamaEndpoint:
+        """
+        Pick the endpoint for a request.
+
+        Preference order: the healthy host pinned to `affinity_key`, then healthy hosts with
+        `model` loaded, then any healthy host, then (if every host is ejected) the host whose
+        ejection ends first. Ties on outstanding requests are broken round-robin.
+        """
+        if affinity_key is not None:
+            pinned = self._affinity.get(affinity_key)
+            if pinned is not None and pinned.healthy:
+                self._affinity.move_to_end(affinity_key)
+                self.affinity_hits += 1
+                return pinned
+            self.affinity_misses += 1
+
+        healthy = [endpoint for endpoint in self.endpoints if endpoint.healthy]
+        if not healthy:
+            return min(self.endpoints, key=lambda endpoint: endpoint.ejected_until)
+
+        candidates = [e for e in healthy if model in e.loaded_models] if model else []
+        candidates = candidates or healthy
+        fewest = min(endpoint.outstanding for endpoint in candidates)
+        least_loaded = [e for e in candidates if e.outstanding == fewest]
+        return least_loaded[next(self._round_robin) % len(least_loaded)]
+
+    def report_success(self, endpoint: OllamaEndpoint, model: Optional[str] = None) -> None:
+        endpoint.consecutive_failures = 0
+        if model:
+            endpoint.loaded_models.add(model)
+
+    def pin(self, affinity_key: str, endpoint: OllamaEndpoint) -> None:
+        """Route later requests with `affinity_key` to `endpoint`."""
+        self._affinity[affinity_key] = endpoint
+        self._affinity.move_to_end(affinity_key)
+        while len(self._affinity) > self.affinity_size:
+            self._affinity.popitem(last=False)
+
+    def report_failure(self, endpoint: OllamaEndpoint, error: Exception) -> None:
+        endpoint.failures += 1
+        endpoint.consecutive_failures += 1
+        if endpoint.consecutive_failures >= self.eject_after and endpoint.healthy:
+            endpoint.ejected_until = time.time() + self.eject_seconds
+            logger.warning(
+                f"Ejecting Ollama host {endpoint.base_url} for {self.eject_seconds}s "
+                f"after {endpoint.consecutive_failures} failures: {error}"
+            )
+
+    @asynccontextmanager
+    async def acquire(self, model: Optional[str] = None, affinity_key: Optional[str] = None):
+        """
+        Reserve an endpoint for one request. Network errors, timeouts and `EndpointFailure`
+        raised inside the block count against the host; other exceptions do not. After a
+        successful request the host is pinned to `affinity_key`.
+        """
+        endpoint = self.choose(model, affinity_key)
+        endpoint.outstanding += 1
+        endpoint.requests += 1
+        try:
+            yield endpoint
+        except (aiohttp.ClientError, asyncio.TimeoutError, EndpointFailure) as e:
+            self.report_failure(endpoint, e)
+            raise
+        else:
+            self.report_success(endpoint, model)
+            if affinity_key is not None:
+                self.pin(affinity_key, endpoint)
+        finally:
+            endpoint.outstanding -= 1
+
+    async def check_endpoint(self, endpoint: OllamaEndpoint) -> bool:
+        """Poll `/api/ps` on one host, updating its loaded models and health."""
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(
+                    f"{endpoint.base_url}/api/ps",
+                    timeout=aiohttp.ClientTimeout(total=HEALTH_CHECK_TIMEOUT),
+                ) as response:
+                    if response.status >= 500:
+                        raise EndpointFailure(f"HTTP {response.status}")
+                    data = await response.json()
+        except Exception as e:
+            self.report_failure(endpoint, e)
+            return False
+
+        endpoint.loaded_models = {
+            entry.get("name") or entry.get("model") for entry in data.get("models", [])
+        }
+        endpoint.consecutive_failures = 0
+        if not endpoint.healthy:
+            logger.info(f"Ollama host {endpoint.base_url} is healthy again")
+        endpoint.ejected_until = 0.0
+        return True
+
+    async def check_health(self) -> Dict[str, bool]:
+        """Health-check every host concurrently."""
+        results = await asyncio.gather(*(self.check_endpoint(e) for e in self.endpoints))
+        return {endpoint.base_url: ok for endpoint, ok in zip(self.endpoints, results)}
+
+    async def _run(self) -> None:
+        while True:
+            await self.check_health()
+            await asyncio.sleep(self.health_interval)
+
+    def start(self) -> None:
+        """Start the background health checks."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background health checks."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-host load and health state."""
+        return [endpoint.stats() for endpoint in self.endpoints]
+
+
+# Singleton instance for reuse
+_pool = None
+
+
+def get_ollama_pool() -> OllamaPool:
+    """
+    Get or create the shared Ollama endpoint pool.
+
+    Returns:
+        OllamaPool instance
+    """
+    global _pool
+    if _pool is None:
+        _pool = OllamaPool()
+        logger.info(f"Ollama pool hosts: {[e.base_url for e in _pool.endpoints]}")
+    return _pool
@@ -0,0 +1,227 @@
+"""
+Quantized Embedding Search for the Ollama RAG System
+
+This module implements a two-stage retrieval mode over compact copies of the chunk embeddings:
+
+- Half-precision (`vecf16`) and binary sign-bit (`bvector`) encodings of each embedding,
+  written by the data pipeline next to the full `VECTOR(768)` column (`sql/upgrade.sql`
+  fills them for chunks embedded before they existed).
+- A fast candidate scan over the compact column (cosine on half precision, or Hamming
+  distance on sign bits), served by an HNSW index on each column, that returns the top-N
+  candidates. Chunks without the compact copy are not scanned.
+- Rescoring of only those candidates against the full-precision vectors.
+
+The SQL helpers target pgvecto.rs (`vecf16`/`bvector`); the NumPy helpers implement the
+same two-stage search in memory and are used by the recall benchmark.
+"""
+
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+from sqlalchemy import text
+
+from .config import QUANTIZED_CANDIDATE_K, VECTOR_SIMILARITY_THRESHOLD, logger
+
+# Supported quantization modes
+QUANTIZATION_MODES = ("off", "halfvec", "binary")
+
+# Chunk columns and candidate-scan distance expressions for each mode
+_CANDIDATE_SCAN = {
+    "halfvec": ("embedding_f16", "vecf16", "<=>"),  # cosine distance on half precision
+    "binary": ("embedding_bin", "bvector", "<->"),  # Hamming distance on sign bits
+}
+
+
+def _as_array(embedding) -> np.ndarray:
+    """Convert a list or array embedding to a 1-D float32 NumPy array."""
+    return np.asarray(embedding, dtype=np.float32).reshape(-1)
+
+
+def to_halfvec(embedding) -> List[float]:
+    """Round an embedding to half precision and return it as a list of floats."""
+    return _as_array(embedding).astype(np.float16).astype(np.float32).tolist()
+
+
+def binarize(embedding) -> List[int]:
+    """Return the sign bits of an embedding (1 for positive components, 0 otherwise)."""
+    return (_as_array(embedding) > 0).astype(np.uint8).tolist()
+
+
+def format_vector_literal(values: Sequence) -> str:
+    """Format a sequence of numbers as a pgvecto.rs vector literal: '[v1,v2,...]'."""
+    return "[" + ",".join(str(v) for v in values) + "]"
+
+
+def quantize_for_storage(embedding) -> Dict[str, str]:
+    """
+    Build the literals stored alongside a full embedding.
+
+    Args:
+        embedding: Full-precision embedding (list or NumPy array)
+
+    Returns:
+        Dictionary with `halfvec` and `binary` literals ready to be cast in SQL
+    """
+    return {
+        "halfvec": format_vector_literal(to_halfvec(embedding)),
+        "binary": format_vector_literal(binarize(embedding)),
+    }
+
+
+def quantized_vector_search(
+    session,
+    embedding,
+    limit,
+    user_email,
+    mode="binary",
+    candidate_k=QUANTIZED_CANDIDATE_K,
+    threshold=VECTOR_SIMILARITY_THRESHOLD,
+):
+    """
+    Two-stage vector search: scan the quantized column for candidates, then rescore
+    only those candidates with the full-precision embeddings.
+
+    Args:
+        session: Database session
+        embedding: Full-precision query embedding
+        limit: Number of results to return
+        user_email: User's email for document access control
+        mode: Quantization mode used for the candidate scan ("halfvec" or "binary")
+        candidate_k: Number of candidates to rescore (at least `limit`)
+        threshold: Minimum full-precision cosine similarity
+
+    Returns:
+        List of result dictionaries in the same shape as `vector_search`
+    """
+    if mode not in _CANDIDATE_SCAN:
+        raise ValueError(f"Unsupported quantization mode: {mode}")
+
+    try:
+        try:
+            # Require user email
+            if not user_email:
+                raise ValueError("User email is required for document access control")
+
+            column, vector_type, operator = _CANDIDATE_SCAN[mode]
+            quantized = quantize_for_storage(embedding)[mode]
+            full = format_vector_literal(_as_array(embedding).tolist())
+
+            sql = f"""
+            WITH candidates AS (
+                SELECT ch.document_id, ch.page_number, ch.chunk_text, ch.embedding
+                FROM chunk ch
+                JOIN document d ON ch.document_id = d.document_id
+                JOIN class c ON d.class_id = c.class_id
+                JOIN access a ON c.class_id = a.class_id
+                WHERE a.user_email = :user_email
+                AND ch.{column} IS NOT NULL
+                ORDER BY ch.{column} {operator} '{quantized}'::{vector_type}
+                LIMIT :candidate_k
+            )
+            SELECT
+                document_id,
+                page_number,
+                chunk_text,
+                1 - (embedding <=> '{full}'::vector) AS similarity
+            FROM candidates
+            WHERE 1 - (embedding <=> '{full}'::vector) >= :threshold
+            ORDER BY similarity DESC
+            LIMIT :limit
+            """
+
+            params = {
+                "limit": limit,
+                "candidate_k": max(int(candidate_k), int(limit)),
+                "threshold": threshold,
+                "user_email": user_email,
+            }
+
+            rows = session.execute(text(sql), params).fetchall()
+            logger.info(
+                f"Quantized ({mode}) search rescored {params['candidate_k']} candidates, "
+                f"returning {len(rows)} chunks"
+            )
+
+            return [
+                {
+                    "document_id": row[0],
+                    "page_number": row[1],
+                    "chunk_text": row[2],
+                    "score": row[3] if len(row) > 3 else 0,
+                }
+                for row in rows
+            ]
+
+        finally:
+            session.close()
+
+    except Exception as e:
+        logger.exception(f"Error in quantized vector search: {str(e)}")
+        raise
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def exact_top_k(query, corpus: np.ndarray, k: int) -> np.ndarray:
+    """Return the indices of the `k` corpus rows with the highest cosine similarity."""
+    scores = _normalize_rows(np.asarray(corpus, dtype=np.float32)) @ _normalize_rows(
+        _as_array(query)
+    )
+    return np.argsort(-scores, kind="stable")[:k]
+
+
+def two_stage_top_k(
+    query, corpus: np.ndarray, k: int, mode: str = "binary", candidate_k: int = 100
+) -> np.ndarray:
+    """
+    In-memory equivalent of `quantized_vector_search`, used for recall measurements.
+
+    Args:
+        query: Full-precision query embedding
+        corpus: Matrix of full-precision corpus embeddings (one row per chunk)
+        k: Number of results to return
+        mode: "halfvec" or "binary"
+        candidate_k: Number of candidates to rescore with full vectors
+
+    Returns:
+        Indices of the top `k` rows after rescoring
+    """
+    corpus = np.asarray(corpus, dtype=np.float32)
+    query = _as_array(query)
+    candidate_k = min(max(candidate_k, k), len(corpus))
+
+    if mode == "halfvec":
+        half_corpus = _normalize_rows(corpus.astype(np.float16).astype(np.float32))
+        half_query = _normalize_rows(query.astype(np.float16).astype(np.float32))
+        candidate_scores = half_corpus @ half_query
+        candidates = np.argsort(-candidate_scores, kind="stable")[:candidate_k]
+    elif mode == "binary":
+        corpus_bits = np.packbits(corpus > 0, axis=1)
+        query_bits = np.packbits(query > 0)
+        distances = np.unpackbits(np.bitwise_xor(corpus_bits, query_bits), axis=1).sum(axis=1)
+        candidates = np.argsort(distances, kind="stable")[:candidate_k]
+    else:
+        raise ValueError(f"Unsupported quantization mode: {mode}")
+
+    rescored = _normalize_rows(corpus[candidates]) @ _normalize_rows(query)
+    return candidates[np.argsort(-rescored, kind="stable")[:k]]
+
+
+def recall_at_k(expected: Sequence[Any], retrieved: Sequence[Any]) -> float:
+    """Fraction of the expected results that appear in the retrieved results."""
+    expected_set = set(np.asarray(expected).tolist())
+    if not expected_set:
+        return 1.0
+    return len(expected_set & set(np.asarray(retrieved).tolist())) / len(expected_set)
+
+
+def bytes_per_vector(dimensions: int, mode: str) -> int:
+    """Storage size of one vector (payload only) for the given mode."""
+    if mode == "halfvec":
+        return dimensions * 2
+    if mode == "binary":
+        return (dimensions + 7) // 8
+    return dimensions * 4
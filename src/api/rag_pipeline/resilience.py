@@ -0,0 +1,205 @@
+"""
+Latency Budgets and Circuit Breakers for Ollama Calls
+
+Every Ollama-backed stage of the pipeline ("safety", "rerank", "generate") gets:
+
+- A latency budget: the request timeout is derived from the recent p95 latency of the stage
+  (times a headroom multiplier), clamped between a floor and a configurable ceiling. Until
+  enough samples are collected the ceiling is used.
+- A circuit breaker: after `OLLAMA_BREAKER_FAILURES` consecutive failures the breaker opens
+  and calls fail fast for `OLLAMA_BREAKER_RESET_SECONDS`; then a single trial call is let
+  through (half-open) and its outcome closes or re-opens the breaker.
+
+Callers fall back instead of waiting when a breaker is open: reranking keeps the original
+order, the safety check decides locally, and generation returns a degraded answer.
+
+Functions:
+- `get_stage()`: Return the shared budget/breaker pair for a stage.
+- `stage_timeout()`: Current timeout for a stage.
+- `resilience_stats()`: Breaker states and latency percentiles for all stages.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from .config import (
+    OLLAMA_BREAKER_FAILURES,
+    OLLAMA_BREAKER_RESET_SECONDS,
+    STAGE_TIMEOUT_CEILINGS,
+    STAGE_TIMEOUT_FLOOR,
+    STAGE_TIMEOUT_MULTIPLIER,
+    logger,
+)
+
+# Samples kept per stage and samples required before the p95 is trusted
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because the stage's circuit breaker is open."""
+
+
+class LatencyTracker:
+    """Rolling window of call latencies with percentile lookup."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Return the q-th percentile (0-100) of the window, or None when empty."""
+        with self._lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return None
+        index = max(0, math.ceil(q / 100 * len(ordered)) - 1)
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a half-open trial call."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = OLLAMA_BREAKER_FAILURES,
+        reset_seconds: float = OLLAMA_BREAKER_RESET_SECONDS,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at == 0.0:
+            return self.CLOSED
+        if time.time() - self.opened_at >= self.reset_seconds:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        """Return True if a call may proceed (at most one trial call while half-open)."""
+        with self._lock:
+            state = self.state
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.opened_at:
+                logger.info(f"Circuit breaker {self.name} closed")
+            self.consecutive_failures = 0
+            self.opened_at = 0.0
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """
+        End an allowed call that recorded no outcome (e.g. it was cancelled), so a half-open
+        breaker can start another trial call.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            reopen = self._trial_in_flight
+            self._trial_in_flight = False
+            if reopen or (
+                self.opened_at == 0.0 and self.consecutive_failures >= self.failure_threshold
+            ):
+                self.opened_at = time.time()
+                self.times_opened += 1
+                logger.warning(
+                    f"Circuit breaker {self.name} opened after "
+                    f"{self.consecutive_failures} consecutive failures"
+                )
+
+
+class Stage:
+    """Latency budget and circuit breaker for one pipeline stage."""
+
+    def __init__(
+        self,
+        name: str,
+        ceiling: float,
+        floor: float = STAGE_TIMEOUT_FLOOR,
+        multiplier: float = STAGE_TIMEOUT_MULTIPLIER,
+    ):
+        self.name = name
+        self.ceiling = ceiling
+        self.floor = floor
+        self.multiplier = multiplier
+        self.latency = LatencyTracker()
+        self.breaker = CircuitBreaker(name)
+
+    def timeout(self) -> float:
+        """Current timeout: p95 x multiplier, clamped to [floor, ceiling]."""
+        if len(self.latency.samples) < MIN_LATENCY_SAMPLES:
+            return self.ceiling
+        p95 = self.latency.percentile(95)
+        return min(self.ceiling, max(self.floor, p95 * self.multiplier))
+
+    def record_success(self, seconds: float) -> None:
+        self.latency.record(seconds)
+        self.breaker.record_success()
+
+    def record_failure(self) -> None:
+        self.breaker.record_failure()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "times_opened": self.breaker.times_opened,
+            "rejected": self.breaker.rejected,
+            "p50_seconds": self.latency.percentile(50),
+            "p95_seconds": self.latency.percentile(95),
+            "timeout_seconds": self.timeout(),
+            "timeout_ceiling_seconds": self.ceiling,
+        }
+
+
+# Shared stages, created on first use
+_stages: Dict[str, Stage] = {}
+
+
+def get_stage(name: str) -> Stage:
+    """Get or create the shared Stage for `name` ("safety", "rerank" or "generate")."""
+    if name not in _stages:
+        ceiling = STAGE_TIMEOUT_CEILINGS.get(name, max(STAGE_TIMEOUT_CEILINGS.values()))
+        _stages[name] = Stage(name, ceiling=ceiling)
+    return _stages[name]
+
+
+def stage_timeout(name: str) -> float:
+    """Return the current adaptive timeout for a stage, in seconds."""
+    return get_stage(name).timeout()
+
+
+def resilience_stats() -> Dict[str, Dict[str, Any]]:
+    """Breaker state and latency metrics for every stage."""
+    return {name: get_stage(name).stats() for name in STAGE_TIMEOUT_CEILINGS}
@@ -5,33 +5,96 @@ This module performs content moderation for user queries using Ollama's Llama Gu
 It uses a custom prompt to classify user input as either "SAFE" or "UNSAFE", with optional reasoning.
 
 Key Features:
-- Asynchronous HTTP request with aiohttp and extended timeout (default: 10 minutes)
+- Asynchronous HTTP request with aiohttp and an adaptive timeout (p95-based latency budget)
+- Circuit breaker: when Llama Guard keeps failing, checks fail fast instead of queueing
+- Single-flight: concurrent checks of the same query share one Llama Guard request
 - Graceful fallback behavior on network failure, timeouts, or malformed responses
 - Structured return type: (is_safe: bool, reason: str)
 - Designed to integrate directly with safety-first RAG pipelines
+- Bulk re-evaluation of historic queries (from a file or the `audit` table) with bounded
+  concurrency, incremental JSONL output and resume support, also available as a CLI:
+
+    python -m rag_pipeline.safety --from-audit --output verdicts.jsonl --concurrency 8
 """
 
-from typing import Tuple
+import argparse
+import json
+import os
+import time
+from contextlib import nullcontext
+from functools import partial
+from typing import AsyncIterator, Dict, Iterable, Optional, Set, Tuple, Union
 import aiohttp
 import asyncio
-from .config import OLLAMA_URL, SAFETY_MODEL, logger
+from .config import SAFETY_BULK_CONCURRENCY, SAFETY_MODEL, logger
+from .generation_profiles import check_limits, profile_options
+from .model_residency import get_residency_manager
+from .ollama_pool import EndpointFailure, get_ollama_pool
+from .resilience import CircuitOpenError, get_stage
+from .scheduler import get_scheduler
+from .single_flight import llm_flight, make_key
+from .usage import record_usage
 
 # Configure timeout
 DEFAULT_TIMEOUT = 3600
 
 
 async def check_query_safety_with_llama_guard(
-    query: str, timeout: int = DEFAULT_TIMEOUT
+    query: str,
+    timeout: Optional[float] = None,
+    http_session: Optional[aiohttp.ClientSession] = None,
+    fail_open: bool = True,
+    priority: str = "safety",
+) -> Tuple[bool, str]:
+    """
+    Check if a query is safe using Ollama's llama-guard3 model. Concurrent checks of the same
+    query share one upstream request.
+    Returns (is_safe, reason)
+
+    Args:
+        query: The user query to check for safety
+        timeout: Timeout in seconds for API request (default: adaptive "safety" stage budget)
+        http_session: Optional shared aiohttp session (a new one is opened per call otherwise)
+        fail_open: If True, errors and an open circuit breaker allow the query; if False they
+            are raised (used by bulk evaluation so failures are retried, not recorded as safe)
+        priority: Scheduler priority class ("safety", or "batch" for offline evaluation)
+    """
+    key = make_key("safety", SAFETY_MODEL, query, fail_open, priority)
+    return await llm_flight.do(
+        key, lambda: _check_with_llama_guard(query, timeout, http_session, fail_open, priority)
+    )
+
+
+async def _check_with_llama_guard(
+    query: str,
+    timeout: Optional[float] = None,
+    http_session: Optional[aiohttp.ClientSession] = None,
+    fail_open: bool = True,
+    priority: str = "safety",
 ) -> Tuple[bool, str]:
     """
-    Check if a query is safe using Ollama's llama-guard3 model.
+    Check if a query is safe using Ollama's llama-guard3 model (one upstream request).
     Returns (is_safe, reason)
 
     Args:
         query: The user query to check for safety
-        timeout: Timeout in seconds for API request (default: 10 minutes)
+        timeout: Timeout in seconds for API request (default: adaptive "safety" stage budget)
+        http_session: Optional shared aiohttp session (a new one is opened per call otherwise)
+        fail_open: If True, errors and an open circuit breaker allow the query; if False they
+            are raised (used by bulk evaluation so failures are retried, not recorded as safe)
+        priority: Scheduler priority class ("safety", or "batch" for offline evaluation)
     """
     model_name = SAFETY_MODEL
+    stage = get_stage("safety")
+    if timeout is None:
+        timeout = stage.timeout()
+
+    if not stage.breaker.allow():
+        logger.warning("Safety circuit breaker is open, skipping Llama Guard")
+        if not fail_open:
+            raise CircuitOpenError("Safety circuit breaker is open")
+        return True, "Safety check unavailable (circuit open), defaulting to allow"
+
     try:
         # Create a safety prompt for Llama Guard 3
         safety_prompt = f"""
@@ -42,72 +105,303 @@ Provide your evaluation as a single word: "SAFE" or "UNSAFE".
 If unsafe, briefly explain why in one short sentence after the word.
 </safety_prompt>
 """
-        # Prepare the request payload for Ollama with llama-guard3
+        # Prepare the request payload for Ollama with llama-guard3; the "safety" profile caps
+        # the verdict to a few dozen tokens
+        options = profile_options("safety")
         payload = {
             "model": model_name,
             "prompt": safety_prompt,
-            "temperature": 0.0,
-            "max_tokens": 100,
+            "options": options,
             "stream": False,  # Ensure we get a complete response
+            "keep_alive": get_residency_manager().keep_alive,
         }
 
         # Call Ollama API using aiohttp with extended timeout
-        logger.info(f"Sending safety check request to llama-guard3 with {timeout}s timeout")
-        async with aiohttp.ClientSession() as session:
+        logger.info(f"Sending safety check request to llama-guard3 with {timeout:.0f}s timeout")
+        session_context = nullcontext(http_session) if http_session else aiohttp.ClientSession()
+        async with get_scheduler().slot(priority), get_ollama_pool().acquire(
+            model_name
+        ) as endpoint, session_context as session:
+            start = time.monotonic()  # Service time only, queue wait excluded
             async with session.post(
-                OLLAMA_URL,
+                endpoint.generate_url,
                 json=payload,
-                timeout=aiohttp.ClientTimeout(total=timeout),  # 10-minute timeout
+                timeout=aiohttp.ClientTimeout(total=timeout),
             ) as response:
-                if response.status == 200:
-                    try:
-                        result = await response.json()
-                        moderation_result = result.get("response", "").strip()
-                        logger.info(f"Llama Guard 3 result: {moderation_result}")
-
-                        # Check if the response indicates the query is safe
-                        is_safe = moderation_result.upper().startswith("SAFE")
-
-                        # Extract reason if unsafe
-                        if not is_safe:
-                            parts = moderation_result.split(" ", 1)
-                            reason = (
-                                parts[1]
-                                if len(parts) > 1
-                                else "Content may violate safety guidelines"
-                            )
-                        else:
-                            reason = "Content is safe"
-
-                        return is_safe, reason
-
-                    except ValueError as json_err:
-                        # Handle JSON parsing errors by examining the raw text
-                        text_response = await response.text()
-                        logger.warning(
-                            f"JSON decode error: {json_err}. Response: {text_response[:200]}..."
-                        )
+                if response.status != 200:
+                    error_text = await response.text()
+                    logger.error(f"Error from Ollama API: {response.status} - {error_text[:200]}")
+                    raise EndpointFailure(f"HTTP {response.status}")
 
-                        # Extract result directly from text response
-                        text_response = text_response.strip()
-                        is_safe = (
-                            "SAFE" in text_response.upper()
-                            and "UNSAFE" not in text_response.upper()
+                stage.record_success(time.monotonic() - start)
+                try:
+                    result = await response.json()
+                    get_residency_manager().record(model_name, result)
+                    check_limits("safety", options, result)
+                    record_usage("safety", result)
+                    moderation_result = result.get("response", "").strip()
+                    logger.info(f"Llama Guard 3 result: {moderation_result}")
+
+                    # Check if the response indicates the query is safe
+                    is_safe = moderation_result.upper().startswith("SAFE")
+
+                    # Extract reason if unsafe
+                    if not is_safe:
+                        parts = moderation_result.split(" ", 1)
+                        reason = (
+                            parts[1] if len(parts) > 1 else "Content may violate safety guidelines"
                         )
+                    else:
+                        reason = "Content is safe"
 
-                        logger.info(f"Extracted safety result from text: {is_safe}")
-                        return is_safe, "Content evaluation based on text parsing"
-                else:
-                    error_text = await response.text()
-                    logger.error(f"Error from Ollama API: {response.status} - {error_text[:200]}")
-                    return True, "Safety check failed, defaulting to allow"
+                    return is_safe, reason
 
+                except ValueError as json_err:
+                    # Handle JSON parsing errors by examining the raw text
+                    text_response = await response.text()
+                    logger.warning(
+                        f"JSON decode error: {json_err}. Response: {text_response[:200]}..."
+                    )
+
+                    # Extract result directly from text response
+                    text_response = text_response.strip()
+                    is_safe = (
+                        "SAFE" in text_response.upper() and "UNSAFE" not in text_response.upper()
+                    )
+
+                    logger.info(f"Extracted safety result from text: {is_safe}")
+                    return is_safe, "Content evaluation based on text parsing"
+
+    except asyncio.CancelledError:
+        # Says nothing about Llama Guard, but must not hold the breaker's trial slot
+        stage.breaker.release()
+        raise
+    except EndpointFailure:
+        stage.record_failure()
+        if not fail_open:
+            raise
+        return True, "Safety check failed, defaulting to allow"
     except aiohttp.ClientError as ce:
+        stage.record_failure()
         logger.exception(f"Network error in safety check: {ce}")
+        if not fail_open:
+            raise
         return True, f"Safety check network error: {str(ce)}"
     except asyncio.TimeoutError:
+        stage.record_failure()
         logger.exception(f"Safety check timed out after {timeout} seconds")
+        if not fail_open:
+            raise
         return True, f"Safety check timed out after {timeout} seconds, defaulting to allow"
     except Exception as e:
+        stage.record_failure()
         logger.exception(f"Error in Llama Guard 3 safety check: {e}")
+        if not fail_open:
+            raise
         return True, f"Safety check error: {str(e)}"
+
+
+# Query sources for bulk evaluation yield (query_id, query) pairs
+QuerySource = Union[Iterable[Tuple[str, str]], AsyncIterator[Tuple[str, str]]]
+
+
+def iter_queries_from_file(path: str) -> Iterable[Tuple[str, str]]:
+    """
+    Stream queries from a file: JSONL with "id" and "query" fields, or plain text with one
+    query per line (the line number is used as the id).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                record = json.loads(line)
+                yield str(record.get("id", line_number)), record["query"]
+            else:
+                yield str(line_number), line
+
+
+def iter_queries_from_audit(
+    session_factory, batch_size: int = 500, after_id: int = 0
+) -> Iterable[Tuple[str, str]]:
+    """
+    Stream queries from the `audit` table in `audit_id` order, one batch per round trip.
+
+    Args:
+        session_factory: Callable returning a SQLAlchemy session
+        batch_size: Rows fetched per query
+        after_id: Only rows with a larger audit_id are returned
+    """
+    from sqlalchemy import text
+
+    session = session_factory()
+    try:
+        while True:
+            rows = session.execute(
+                text(
+                    """
+                    SELECT audit_id, query FROM audit
+                    WHERE audit_id > :after_id AND query IS NOT NULL
+                    ORDER BY audit_id
+                    LIMIT :limit
+                    """
+                ),
+                {"after_id": after_id, "limit": batch_size},
+            ).fetchall()
+            if not rows:
+                return
+            for audit_id, query in rows:
+                yield str(audit_id), query
+            after_id = rows[-1][0]
+    finally:
+        session.close()
+
+
+def load_completed_ids(output_path: str) -> Set[str]:
+    """Return the ids already present in a verdict file (for resuming an interrupted run)."""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                completed.add(str(json.loads(line)["id"]))
+            except (ValueError, KeyError):
+                continue  # Partially written last line of an interrupted run
+    return completed
+
+
+def _terminate_last_line(output_path: str) -> None:
+    """Add a newline after a line left incomplete by an interrupted run."""
+    if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+        return
+    with open(output_path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+async def _iterate(source: QuerySource) -> AsyncIterator[Tuple[str, str]]:
+    if hasattr(source, "__aiter__"):
+        async for item in source:
+            yield item
+    else:
+        for item in source:
+            yield item
+
+
+async def evaluate_queries_bulk(
+    source: QuerySource,
+    output_path: str,
+    concurrency: int = SAFETY_BULK_CONCURRENCY,
+    timeout: int = DEFAULT_TIMEOUT,
+    check=None,
+) -> Dict[str, int]:
+    """
+    Evaluate many queries with bounded concurrency, appending one JSON verdict per line to
+    `output_path` as soon as it is available. Ids already in the output file are skipped, so
+    an interrupted run can simply be started again.
+
+    Args:
+        source: Iterable or async iterable of (query_id, query) pairs
+        output_path: JSONL file receiving {"id", "query", "is_safe", "reason", "model"}
+        concurrency: Maximum number of in-flight safety requests
+        timeout: Timeout in seconds per safety request
+        check: Safety check coroutine called with (query, timeout=...); defaults to Llama Guard
+            over one shared HTTP session
+
+    Returns:
+        Dictionary with counts of evaluated, skipped, safe and unsafe queries
+    """
+    completed = load_completed_ids(output_path)
+    _terminate_last_line(output_path)
+    summary = {"evaluated": 0, "skipped": 0, "failed": 0, "safe": 0, "unsafe": 0}
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    start = time.time()
+
+    async def worker(output, run_check):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            query_id, query = item
+            try:
+                while True:
+                    try:
+                        is_safe, reason = await run_check(query, timeout=timeout)
+                        break
+                    except CircuitOpenError:
+                        # Llama Guard is failing: wait for the breaker's trial window
+                        await asyncio.sleep(get_stage("safety").breaker.reset_seconds)
+            except Exception as e:
+                # Not written, so the query is retried when the run is resumed
+                logger.error(f"Safety evaluation failed for {query_id}: {e}")
+                summary["failed"] += 1
+                continue
+            record = {
+                "id": query_id,
+                "query": query,
+                "is_safe": is_safe,
+                "reason": reason,
+                "model": SAFETY_MODEL,
+            }
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+            summary["evaluated"] += 1
+            summary["safe" if is_safe else "unsafe"] += 1
+            if summary["evaluated"] % 100 == 0:
+                rate = summary["evaluated"] / max(time.time() - start, 1e-9)
+                logger.info(f"Evaluated {summary['evaluated']} queries ({rate:.1f}/s)")
+
+    async with aiohttp.ClientSession() as http_session:
+        run_check = check or partial(
+            check_query_safety_with_llama_guard,
+            http_session=http_session,
+            fail_open=False,
+            priority="batch",
+        )
+        with open(output_path, "a", encoding="utf-8") as output:
+            workers = [asyncio.create_task(worker(output, run_check)) for _ in range(concurrency)]
+            async for query_id, query in _iterate(source):
+                if str(query_id) in completed:
+                    summary["skipped"] += 1
+                    continue
+                await queue.put((str(query_id), query))
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+
+    logger.info(f"Bulk safety evaluation finished: {summary}")
+    return summary
+
+
+def main(argv=None) -> None:
+    """Command-line entry point for bulk safety evaluation."""
+    parser = argparse.ArgumentParser(description="Re-evaluate queries with the safety model")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="JSONL ({id, query}) or text file with one query per line")
+    source.add_argument("--from-audit", action="store_true", help="Read queries from audit table")
+    parser.add_argument("--output", required=True, help="JSONL verdict file (appended, resumable)")
+    parser.add_argument("--concurrency", type=int, default=SAFETY_BULK_CONCURRENCY)
+    parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT)
+    parser.add_argument("--batch-size", type=int, default=500, help="Audit rows per query")
+    args = parser.parse_args(argv)
+
+    if args.from_audit:
+        from utils.database import SessionLocal
+
+        queries = iter_queries_from_audit(SessionLocal, batch_size=args.batch_size)
+    else:
+        queries = iter_queries_from_file(args.input)
+
+    summary = asyncio.run(
+        evaluate_queries_bulk(
+            queries, args.output, concurrency=args.concurrency, timeout=args.timeout
+        )
+    )
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Priority Scheduler for Ollama Requests
+
+Every Ollama call waits for a slot from the shared scheduler before it is sent. Requests belong
+to a priority class, served in this order when a slot frees up:
+
+    answer (interactive generation) > safety > rerank > batch (offline jobs)
+
+- `SCHEDULER_MAX_CONCURRENCY` bounds the calls in flight across all classes, and
+  `SCHEDULER_CLASS_LIMITS` bounds each class, so reranking or batch jobs cannot take every slot.
+- Within a class requests are served first-come, first-served.
+- Queue depth, in-flight calls, queue wait and service time are tracked per class.
+- Admission control: once more than `SCHEDULER_MAX_QUEUE` interactive requests are waiting,
+  `retry_after()` returns an estimate and the chat endpoints answer 429 with `Retry-After`.
+
+Usage:
+    async with get_scheduler().slot("rerank"):
+        ...  # call Ollama
+
+Functions:
+- `get_scheduler()`: Return the shared scheduler configured from `config.py`.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional
+
+from .config import (
+    SCHEDULER_CLASS_LIMITS,
+    SCHEDULER_MAX_CONCURRENCY,
+    SCHEDULER_MAX_QUEUE,
+    logger,
+)
+from .resilience import LatencyTracker
+
+# Priority classes, highest first
+PRIORITY_CLASSES = ("answer", "safety", "rerank", "batch")
+
+# Classes counted for admission control (batch jobs queue without rejecting chat requests)
+INTERACTIVE_CLASSES = ("answer", "safety", "rerank")
+
+# Bounds of the Retry-After estimate, in seconds
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 120
+
+
+class PriorityScheduler:
+    """Grants Ollama call slots by priority class under global and per-class caps."""
+
+    def __init__(
+        self,
+        max_concurrency: int = SCHEDULER_MAX_CONCURRENCY,
+        class_limits: Dict[str, int] = SCHEDULER_CLASS_LIMITS,
+        max_queue: int = SCHEDULER_MAX_QUEUE,
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_concurrency: Ollama calls in flight across all classes
+            class_limits: Calls in flight per class
+            max_queue: Waiting interactive requests above which new chat requests are rejected
+        """
+        self.max_concurrency = max_concurrency
+        self.class_limits = {
+            name: class_limits.get(name, max_concurrency) for name in PRIORITY_CLASSES
+        }
+        self.max_queue = max_queue
+        self._queues: Dict[str, Deque[asyncio.Future]] = {
+            name: deque() for name in PRIORITY_CLASSES
+        }
+        self._running = {name: 0 for name in PRIORITY_CLASSES}
+        self.wait = {name: LatencyTracker() for name in PRIORITY_CLASSES}
+        self.service = {name: LatencyTracker() for name in PRIORITY_CLASSES}
+        self.completed = {name: 0 for name in PRIORITY_CLASSES}
+        self.rejected = 0
+
+    @property
+    def running(self) -> int:
+        return sum(self._running.values())
+
+    def queue_depth(self, priority: Optional[str] = None) -> int:
+        """Waiting requests in one class (or all classes)."""
+        if priority is not None:
+            return len(self._queues[priority])
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _can_run(self, priority: str) -> bool:
+        return (
+            self.running < self.max_concurrency
+            and self._running[priority] < self.class_limits[priority]
+        )
+
+    def _dispatch(self) -> None:
+        """Grant free slots to waiting requests, highest priority class first."""
+        for priority in PRIORITY_CLASSES:
+            queue = self._queues[priority]
+            while queue and self._can_run(priority):
+                waiter = queue.popleft()
+                if waiter.done():  # Cancelled while waiting
+                    continue
+                self._running[priority] += 1
+                waiter.set_result(None)
+
+    def _release(self, priority: str) -> None:
+        self._running[priority] -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: str):
+        """
+        Wait for a slot in `priority`'s class and hold it for the duration of the block.
+
+        Args:
+            priority: Priority class ("answer", "safety", "rerank" or "batch")
+        """
+        if priority not in self._queues:
+            raise ValueError(f"Unknown priority class: {priority}")
+
+        queued_at = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues[priority].append(waiter)
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release(priority)  # Granted just before the cancellation
+            else:
+                waiter.cancel()
+                try:
+                    self._queues[priority].remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+        started_at = time.monotonic()
+        self.wait[priority].record(started_at - queued_at)
+        try:
+            yield
+        finally:
+            self.service[priority].record(time.monotonic() - started_at)
+            self.completed[priority] += 1
+            self._release(priority)
+
+    def retry_after(self) -> Optional[int]:
+        """
+        Admission check for new interactive requests.
+
+        Returns:
+            None if the request may proceed, otherwise the suggested Retry-After in seconds
+        """
+        waiting = sum(self.queue_depth(name) for name in INTERACTIVE_CLASSES)
+        if waiting <= self.max_queue:
+            return None
+
+        self.rejected += 1
+        service_seconds = self.service["answer"].percentile(50) or 1.0
+        estimate = math.ceil(waiting * service_seconds / max(1, self.max_concurrency))
+        retry_after = min(MAX_RETRY_AFTER, max(MIN_RETRY_AFTER, estimate))
+        logger.warning(f"LLM queue full ({waiting} waiting), rejecting request for {retry_after}s")
+        return retry_after
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, in-flight calls and wait/service times per class."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "rejected": self.rejected,
+            "classes": {
+                name: {
+                    "limit": self.class_limits[name],
+                    "running": self._running[name],
+                    "queued": self.queue_depth(name),
+                    "completed": self.completed[name],
+                    "wait_p50_seconds": self.wait[name].percentile(50),
+                    "wait_p95_seconds": self.wait[name].percentile(95),
+                    "service_p50_seconds": self.service[name].percentile(50),
+                }
+                for name in PRIORITY_CLASSES
+            },
+        }
+
+
+# Singleton instance for reuse
+_scheduler = None
+
+
+def get_scheduler() -> PriorityScheduler:
+    """
+    Get or create the shared LLM request scheduler.
+
+    Returns:
+        PriorityScheduler instance
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = PriorityScheduler()
+    return _scheduler
@@ -5,6 +5,9 @@ This module implements core search functionality, including:
 
 - BM25 full-text search using PGroonga
 - Vector similarity search using pgvector
+- Optional two-stage quantized vector search (half precision or binary) with rescoring
+- Search against an alternate embedding column (e.g. multilingual embeddings), and a cached
+  check that the multilingual column is filled for every chunk
 - Hybrid search combining BM25 and vector results
 - Robust deduplication and scoring for hybrid ranking
 - Access-controlled filtering using user_email
@@ -14,9 +17,23 @@ All search functions require a SQLAlchemy session and support structured chunk s
 """
 
 import re
+import time
 from nltk.corpus import stopwords
 from sqlalchemy import text
-from .config import VECTOR_SIMILARITY_THRESHOLD, logger
+from .config import (
+    MULTILINGUAL_CHECK_TTL,
+    MULTILINGUAL_EMBEDDING_COLUMN,
+    QUANTIZED_SEARCH_MODE,
+    VECTOR_SIMILARITY_THRESHOLD,
+    logger,
+)
+from .quantization import quantized_vector_search
+
+# Embedding columns that can be searched (interpolated into SQL, so kept to a fixed set)
+EMBEDDING_COLUMNS = ("embedding", MULTILINGUAL_EMBEDDING_COLUMN)
+
+# Last result of `multilingual_embeddings_ready` and when it was checked
+_multilingual_check = {"ready": False, "checked_at": None}
 
 
 def format_for_pgroonga(query: str) -> str:
@@ -93,10 +110,30 @@ def bm25_search(session, query: str, limit, user_email):
         raise
 
 
-def vector_search(session, embedding, limit, user_email, threshold=VECTOR_SIMILARITY_THRESHOLD):
+def vector_search(
+    session,
+    embedding,
+    limit,
+    user_email,
+    threshold=VECTOR_SIMILARITY_THRESHOLD,
+    quantization=QUANTIZED_SEARCH_MODE,
+    column="embedding",
+):
     """
     Perform vector similarity search on the chunk embeddings using SQLAlchemy.
+    When `quantization` is "halfvec" or "binary", candidates come from the compact
+    column and only those are rescored with the full vectors. `column` selects the
+    embedding column ("embedding" or "embedding_multilingual"); quantized copies only
+    exist for the default column.
     """
+    if column not in EMBEDDING_COLUMNS:
+        raise ValueError(f"Unknown embedding column: {column}")
+
+    if quantization and quantization != "off" and column == "embedding":
+        return quantized_vector_search(
+            session, embedding, limit, user_email, mode=quantization, threshold=threshold
+        )
+
     try:
         try:
             # Require user email
@@ -109,13 +146,13 @@ def vector_search(session, embedding, limit, user_email, threshold=VECTOR_SIMILA
                 ch.document_id,
                 ch.page_number,
                 ch.chunk_text,
-                1 - (embedding <=> '{str(embedding)}'::vector) AS similarity
+                1 - (ch.{column} <=> '{str(embedding)}'::vector) AS similarity
             FROM chunk ch
             JOIN document d ON ch.document_id = d.document_id
             JOIN class c ON d.class_id = c.class_id
             JOIN access a ON c.class_id = a.class_id
             WHERE a.user_email = :user_email
-            AND 1 - (embedding <=> '{str(embedding)}'::vector) >= :threshold
+            AND 1 - (ch.{column} <=> '{str(embedding)}'::vector) >= :threshold
             ORDER BY similarity DESC
             LIMIT :limit
             """
@@ -148,13 +185,17 @@ def vector_search(session, embedding, limit, user_email, threshold=VECTOR_SIMILA
         raise
 
 
-def hybrid_search(session, query, embedding, vector_k, bm25_k, user_email):
+def hybrid_search(
+    session, query, embedding, vector_k, bm25_k, user_email, embedding_column="embedding"
+):
     """
     Perform a hybrid search using both vector similarity and BM25.
     """
     try:
         # Get results from vector search
-        vector_results = vector_search(session, embedding, vector_k, user_email)
+        vector_results = vector_search(
+            session, embedding, vector_k, user_email, column=embedding_column
+        )
         logger.info(f"Retrieved {len(vector_results)} chunks using vector search")
 
         # Get results from BM25 search
@@ -205,6 +246,33 @@ def hybrid_search(session, query, embedding, vector_k, bm25_k, user_email):
         raise
 
 
+def multilingual_embeddings_ready(session, ttl=MULTILINGUAL_CHECK_TTL) -> bool:
+    """
+    Check whether every chunk has a multilingual embedding, so that searching that column
+    cannot miss chunks. The result is cached for `ttl` seconds; errors count as not ready.
+    """
+    now = time.monotonic()
+    checked_at = _multilingual_check["checked_at"]
+    if checked_at is not None and now - checked_at < ttl:
+        return _multilingual_check["ready"]
+
+    try:
+        ready = session.execute(
+            text(
+                f"""
+            SELECT EXISTS (SELECT 1 FROM chunk)
+               AND NOT EXISTS (SELECT 1 FROM chunk WHERE {MULTILINGUAL_EMBEDDING_COLUMN} IS NULL)
+            """
+            )
+        ).scalar()
+    except Exception as e:
+        logger.warning(f"Could not check multilingual embeddings: {str(e)}")
+        ready = False
+
+    _multilingual_check.update(ready=bool(ready), checked_at=now)
+    return bool(ready)
+
+
 def retrieve_document_metadata(session, document_ids):
     """
     Retrieve metadata for the documents.
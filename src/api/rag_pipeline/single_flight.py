@@ -0,0 +1,100 @@
+"""
+Single-Flight Request Coalescing for the Ollama RAG System
+
+When several identical requests are in flight at the same time (e.g. a class announcement
+makes many students ask the same question), only the first one ("leader") runs; the others
+("followers") wait for and share its result. Nothing is cached: once the leader finishes,
+the next identical request runs again.
+
+The work runs in its own task, so a cancelled caller (client disconnect) does not cancel the
+shared request for the other callers.
+
+Usage:
+    result = await llm_flight.do(make_key("generate", model, prompt, options), lambda: call())
+
+Functions:
+- `make_key()`: Build a stable key from request parts (hashed, so prompts are not kept).
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict
+
+from .config import SINGLE_FLIGHT_ENABLED, logger
+
+
+def make_key(*parts: Any) -> str:
+    """Build a stable SHA-256 key from JSON-serializable request parts."""
+    encoded = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution."""
+
+    def __init__(self, name: str, copy_result: bool = False, enabled: bool = SINGLE_FLIGHT_ENABLED):
+        """
+        Initialize the group.
+
+        Args:
+            name: Name used in logs and stats
+            copy_result: Give followers a deep copy of the result (for mutable results)
+            enabled: If False, every call runs independently
+        """
+        self.name = name
+        self.copy_result = copy_result
+        self.enabled = enabled
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {"leaders": 0, "followers": 0}
+
+    async def do(self, key: str, work: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `work()` unless an identical call is already in flight, in which case wait for it.
+
+        Args:
+            key: Request key (see `make_key`)
+            work: Zero-argument callable returning the awaitable to run
+
+        Returns:
+            The result of the shared execution (exceptions are shared as well)
+        """
+        if not self.enabled:
+            return await work()
+
+        task = self._inflight.get(key)
+        if task is not None and not task.done():
+            self.stats["followers"] += 1
+            logger.info(f"Single-flight {self.name}: joining in-flight request")
+            result = await asyncio.shield(task)
+            return copy.deepcopy(result) if self.copy_result else result
+
+        self.stats["leaders"] += 1
+        task = asyncio.ensure_future(work())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._forget(key, task))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved even if every caller was cancelled
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+
+# Shared groups: upstream Ollama calls (generate, safety) and whole pipeline runs
+llm_flight = SingleFlight("llm")
+pipeline_flight = SingleFlight("pipeline", copy_result=True)
+
+
+def single_flight_stats() -> Dict[str, Dict[str, int]]:
+    """Leader/follower counts and in-flight requests per group."""
+    return {
+        group.name: {**group.stats, "inflight": group.inflight}
+        for group in (llm_flight, pipeline_flight)
+    }
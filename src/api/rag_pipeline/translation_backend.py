@@ -0,0 +1,191 @@
+"""
+Pluggable Translation Backends for the Ollama RAG System
+
+This module defines the translation provider interface used by `language.py`. Backends expose
+a blocking `translate_batch()` and an awaitable `atranslate_batch()`; blocking providers are
+run on a dedicated thread pool so translation never stalls the event loop.
+
+Timeouts: callers bound `atranslate_batch()` with `asyncio.wait_for`. A timed-out call that is
+still queued is dropped, but one that already started cannot be interrupted: its thread keeps
+running until the provider returns (`deep_translator` has no request timeout). The pool is
+bounded by `TRANSLATION_MAX_WORKERS`, so a hung provider holds at most that many threads, and
+further calls wait in the queue (and time out) instead of starting new threads.
+
+Backends:
+- `GoogleTranslationBackend`: `deep_translator` GoogleTranslator (network, default).
+- `LocalModelTranslationBackend`: Offline MarianMT models via `transformers`.
+- `StandInTranslationBackend`: Deterministic, instant stand-in for tests and benchmarks.
+
+Functions:
+- `get_translation_backend()`: Return the shared backend selected by `TRANSLATION_BACKEND`.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+from deep_translator import GoogleTranslator
+
+from .config import TRANSLATION_BACKEND, TRANSLATION_MAX_WORKERS, logger
+
+# Separator used to send several segments to the provider in one request
+BATCH_SEPARATOR = "\n"
+
+# Maximum characters per provider request (Google Translate rejects longer input)
+MAX_PROVIDER_CHARS = 5000
+
+# Thread pool for blocking providers, kept separate from the loop's default executor
+_executor = ThreadPoolExecutor(
+    max_workers=TRANSLATION_MAX_WORKERS, thread_name_prefix="translation"
+)
+
+
+class TranslationBackend:
+    """Base class for translation providers."""
+
+    name = "base"
+
+    def translate_batch(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        """
+        Translate texts from `source_lang` to `target_lang` (blocking).
+
+        Returns:
+            Translations in the same order as `texts`
+        """
+        raise NotImplementedError
+
+    async def atranslate_batch(
+        self, texts: List[str], source_lang: str, target_lang: str
+    ) -> List[str]:
+        """
+        Translate texts without blocking the event loop, on the bounded translation pool.
+        Cancelling the await does not stop a call that already started (see module docstring).
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _executor, self.translate_batch, texts, source_lang, target_lang
+        )
+
+
+class GoogleTranslationBackend(TranslationBackend):
+    """Google Translate through `deep_translator`, with one translator per language pair."""
+
+    name = "google"
+
+    def __init__(self):
+        self._translators: Dict[Tuple[str, str], GoogleTranslator] = {}
+        self._lock = threading.Lock()
+
+    def _translator(self, source_lang: str, target_lang: str) -> GoogleTranslator:
+        key = (source_lang, target_lang)
+        with self._lock:
+            if key not in self._translators:
+                self._translators[key] = GoogleTranslator(source=source_lang, target=target_lang)
+            return self._translators[key]
+
+    def translate_batch(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        """
+        Translate several texts with as few provider requests as possible.
+
+        Segments are joined with a newline and sent together; if a segment contains the
+        separator, the request would exceed the provider limit, or the provider does not return
+        the same number of lines, the batch falls back to the provider's per-segment batch API.
+        """
+        translator = self._translator(source_lang, target_lang)
+        if len(texts) == 1:
+            return [translator.translate(texts[0]) or ""]
+
+        joined = BATCH_SEPARATOR.join(texts)
+        if len(joined) <= MAX_PROVIDER_CHARS and not any(BATCH_SEPARATOR in t for t in texts):
+            parts = (translator.translate(joined) or "").split(BATCH_SEPARATOR)
+            if len(parts) == len(texts):
+                return [part.strip() for part in parts]
+            logger.warning(
+                f"Batched translation returned {len(parts)} segments for {len(texts)}, retrying"
+            )
+        return [t or "" for t in translator.translate_batch(texts)]
+
+
+class LocalModelTranslationBackend(TranslationBackend):
+    """Offline translation with Helsinki-NLP MarianMT models, loaded lazily per language pair."""
+
+    name = "local"
+
+    def __init__(self, model_template: str = "Helsinki-NLP/opus-mt-{source}-{target}"):
+        self.model_template = model_template
+        self._pipelines: Dict[Tuple[str, str], object] = {}
+        self._lock = threading.Lock()
+
+    def _pipeline(self, source_lang: str, target_lang: str):
+        key = (source_lang, target_lang)
+        with self._lock:
+            if key not in self._pipelines:
+                from transformers import pipeline
+
+                model_name = self.model_template.format(source=source_lang, target=target_lang)
+                logger.info(f"Loading local translation model: {model_name}")
+                self._pipelines[key] = pipeline("translation", model=model_name)
+            return self._pipelines[key]
+
+    def translate_batch(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        outputs = self._pipeline(source_lang, target_lang)(texts)
+        return [output["translation_text"] for output in outputs]
+
+
+class StandInTranslationBackend(TranslationBackend):
+    """
+    Deterministic stand-in that tags each text with the target language, e.g. "[es] Hello".
+    An optional delay simulates provider latency in benchmarks.
+    """
+
+    name = "standin"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def translate_batch(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        self.calls += 1
+        return [f"[{target_lang}] {text}" for text in texts]
+
+    async def atranslate_batch(
+        self, texts: List[str], source_lang: str, target_lang: str
+    ) -> List[str]:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self.translate_batch(texts, source_lang, target_lang)
+
+
+_BACKENDS = {
+    "google": GoogleTranslationBackend,
+    "local": LocalModelTranslationBackend,
+    "standin": StandInTranslationBackend,
+}
+
+# Singleton instance for reuse
+_backend = None
+
+
+def get_translation_backend() -> TranslationBackend:
+    """
+    Get or create the shared translation backend.
+
+    Returns:
+        TranslationBackend selected by TRANSLATION_BACKEND (defaults to Google)
+    """
+    global _backend
+    if _backend is None:
+        backend_class = _BACKENDS.get(TRANSLATION_BACKEND)
+        if backend_class is None:
+            logger.warning(f"Unknown translation backend {TRANSLATION_BACKEND}, using google")
+            backend_class = GoogleTranslationBackend
+        _backend = backend_class()
+        logger.info(f"Using translation backend: {_backend.name}")
+    return _backend
+
+
+def set_translation_backend(backend: TranslationBackend) -> None:
+    """Replace the shared backend (used by tests and benchmarks)."""
+    global _backend
+    _backend = backend
@@ -0,0 +1,275 @@
+"""
+Translation Cache for the Ollama RAG System
+
+This module provides a two-tier cache for translations so that repeated questions, repeated
+answers and fixed UI/error strings are only ever sent to the translation provider once:
+
+- An in-process LRU tier (bounded `OrderedDict`) for the hot set.
+- An optional persistent tier shared across restarts and replicas, backed by a local SQLite
+  file, the `translation_cache` table in PostgreSQL, or the shared key-value store.
+
+Entries are keyed by (source language, target language, SHA-256 of the text).
+
+Functions:
+- `make_cache_key()`: Build the cache key for a translation.
+- `get_translation_cache()`: Return the shared cache configured from `config.py`.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from .config import (
+    TRANSLATION_CACHE_BACKEND,
+    TRANSLATION_CACHE_PATH,
+    TRANSLATION_CACHE_SIZE,
+    logger,
+)
+
+
+def make_cache_key(source_lang: str, target_lang: str, text: str) -> str:
+    """Build the cache key for translating `text` from `source_lang` to `target_lang`."""
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{source_lang}:{target_lang}:{digest}"
+
+
+class SQLiteTranslationStore:
+    """Persistent translation tier stored in a local SQLite file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translation_cache ("
+            "cache_key TEXT PRIMARY KEY, translation TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        if not keys:
+            return {}
+        placeholders = ",".join("?" for _ in keys)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT cache_key, translation FROM translation_cache "
+                f"WHERE cache_key IN ({placeholders})",
+                keys,
+            ).fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def set_many(self, items: Dict[str, str]) -> None:
+        if not items:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translation_cache (cache_key, translation) VALUES (?, ?)",
+                list(items.items()),
+            )
+            self._conn.commit()
+
+
+class PostgresTranslationStore:
+    """Persistent translation tier stored in the PostgreSQL `translation_cache` table."""
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        if not keys:
+            return {}
+        from sqlalchemy import text
+
+        session = self.session_factory()
+        try:
+            rows = session.execute(
+                text(
+                    "SELECT cache_key, translation FROM translation_cache "
+                    "WHERE cache_key = ANY(:keys)"
+                ),
+                {"keys": list(keys)},
+            ).fetchall()
+            return {row[0]: row[1] for row in rows}
+        finally:
+            session.close()
+
+    def set_many(self, items: Dict[str, str]) -> None:
+        if not items:
+            return
+        from sqlalchemy import text
+
+        session = self.session_factory()
+        try:
+            session.execute(
+                text(
+                    """
+                    INSERT INTO translation_cache (cache_key, translation)
+                    VALUES (:cache_key, :translation)
+                    ON CONFLICT (cache_key) DO UPDATE SET translation = EXCLUDED.translation
+                    """
+                ),
+                [{"cache_key": k, "translation": v} for k, v in items.items()],
+            )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+
+class KVTranslationStore:
+    """Persistent translation tier stored in the shared key-value store (`utils.kv_store`)."""
+
+    KEY_PREFIX = "translation:"
+    # Translations never change; the TTL only lets unused entries age out of the store
+    TTL_SECONDS = 30 * 24 * 3600
+
+    def __init__(self, store):
+        self.store = store
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        found = self.store.get_many(self.KEY_PREFIX + key for key in keys)
+        return {key[len(self.KEY_PREFIX) :]: value for key, value in found.items()}
+
+    def set_many(self, items: Dict[str, str]) -> None:
+        self.store.set_many(
+            {self.KEY_PREFIX + key: value for key, value in items.items()}, ttl=self.TTL_SECONDS
+        )
+
+
+class TranslationCache:
+    """
+    Two-tier translation cache: an in-process LRU in front of an optional persistent store.
+    Persistent-store failures are logged and treated as misses so translation keeps working.
+    """
+
+    def __init__(self, max_entries: int = TRANSLATION_CACHE_SIZE, store=None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries kept in the in-process LRU tier
+            store: Optional persistent store with `get_many` and `set_many` methods
+        """
+        self.max_entries = max_entries
+        self.store = store
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "store_hits": 0, "misses": 0}
+
+    def _remember(self, key: str, translation: str) -> None:
+        with self._lock:
+            self._entries[key] = translation
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, source_lang: str, target_lang: str, text: str) -> Optional[str]:
+        """Return the cached translation of `text`, or None on a miss."""
+        return self.get_many(source_lang, target_lang, [text]).get(text)
+
+    def get_many(self, source_lang: str, target_lang: str, texts: Iterable[str]) -> Dict[str, str]:
+        """
+        Look up several texts at once.
+
+        Returns:
+            Dictionary mapping each cached text to its translation (misses are omitted)
+        """
+        found: Dict[str, str] = {}
+        pending: Dict[str, str] = {}
+
+        with self._lock:
+            for text in texts:
+                key = make_cache_key(source_lang, target_lang, text)
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[text] = self._entries[key]
+                    self.stats["hits"] += 1
+                else:
+                    pending[key] = text
+
+        if pending and self.store is not None:
+            try:
+                stored = self.store.get_many(list(pending))
+            except Exception as e:
+                logger.error(f"Translation cache store lookup failed: {e}")
+                stored = {}
+            for key, translation in stored.items():
+                found[pending.pop(key)] = translation
+                self._remember(key, translation)
+                self.stats["store_hits"] += 1
+
+        self.stats["misses"] += len(pending)
+        return found
+
+    def set(self, source_lang: str, target_lang: str, text: str, translation: str) -> None:
+        """Cache a single translation."""
+        self.set_many(source_lang, target_lang, {text: translation})
+
+    def set_many(self, source_lang: str, target_lang: str, translations: Dict[str, str]) -> None:
+        """Cache several translations of texts from `source_lang` to `target_lang`."""
+        items = {
+            make_cache_key(source_lang, target_lang, text): translation
+            for text, translation in translations.items()
+            if translation
+        }
+        for key, translation in items.items():
+            self._remember(key, translation)
+
+        if items and self.store is not None:
+            try:
+                self.store.set_many(items)
+            except Exception as e:
+                logger.error(f"Translation cache store write failed: {e}")
+
+    def clear(self) -> None:
+        """Clear the in-process tier (the persistent tier is left untouched)."""
+        with self._lock:
+            self._entries.clear()
+
+
+def _build_store():
+    """Create the persistent store selected by TRANSLATION_CACHE_BACKEND."""
+    if TRANSLATION_CACHE_BACKEND == "sqlite":
+        directory = os.path.dirname(TRANSLATION_CACHE_PATH) or "."
+        if not os.path.isdir(directory):
+            logger.warning(
+                f"Translation cache directory {directory} does not exist, using memory only"
+            )
+            return None
+        return SQLiteTranslationStore(TRANSLATION_CACHE_PATH)
+    if TRANSLATION_CACHE_BACKEND == "postgres":
+        from utils.database import SessionLocal
+
+        return PostgresTranslationStore(SessionLocal)
+    if TRANSLATION_CACHE_BACKEND == "kv":
+        from utils.kv_store import get_kv_store
+
+        return KVTranslationStore(get_kv_store())
+    return None
+
+
+# Singleton instance for reuse
+_cache = None
+
+
+def get_translation_cache() -> TranslationCache:
+    """
+    Get or create the shared translation cache.
+
+    Returns:
+        TranslationCache instance
+    """
+    global _cache
+    if _cache is None:
+        try:
+            store = _build_store()
+        except Exception as e:
+            logger.error(f"Could not open translation cache store, using memory only: {e}")
+            store = None
+        _cache = TranslationCache(store=store)
+    return _cache
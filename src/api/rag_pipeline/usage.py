@@ -0,0 +1,101 @@
+"""
+Token and Throughput Accounting for Ollama Calls
+
+Every non-streamed Ollama response reports `prompt_eval_count`, `prompt_eval_duration`,
+`eval_count`, `eval_duration` and `total_duration` (durations in nanoseconds). This module
+collects them per stage ("safety", "rerank", "answer") for the request being processed, so
+the totals can be written with the request's `audit` row.
+
+The current request's usage lives in a context variable: `start_request_usage()` is called at
+the beginning of a pipeline run and every Ollama call made from it (including calls in tasks
+it spawns) is added with `record_usage()`. Calls made outside a request are not recorded.
+
+Functions:
+- `start_request_usage()`: Begin accounting for the current request.
+- `record_usage()`: Add one Ollama response to the current request.
+- `current_usage()`: The current request's usage, if any.
+"""
+
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+# Ollama reports durations in nanoseconds
+NANOSECONDS = 1e9
+
+
+class RequestUsage:
+    """Token counts and model time of one request, per stage."""
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def add(self, stage: str, response_data: Dict[str, Any]) -> None:
+        """Add the counters of one Ollama response to `stage`."""
+        stats = self.stages.setdefault(
+            stage,
+            {
+                "calls": 0,
+                "prompt_tokens": 0,
+                "output_tokens": 0,
+                "prompt_eval_seconds": 0.0,
+                "eval_seconds": 0.0,
+                "total_seconds": 0.0,
+            },
+        )
+        stats["calls"] += 1
+        stats["prompt_tokens"] += response_data.get("prompt_eval_count") or 0
+        stats["output_tokens"] += response_data.get("eval_count") or 0
+        stats["prompt_eval_seconds"] += (
+            response_data.get("prompt_eval_duration") or 0
+        ) / NANOSECONDS
+        stats["eval_seconds"] += (response_data.get("eval_duration") or 0) / NANOSECONDS
+        stats["total_seconds"] += (response_data.get("total_duration") or 0) / NANOSECONDS
+
+    def totals(self) -> Dict[str, float]:
+        """Counters summed over all stages."""
+        keys = (
+            "calls",
+            "prompt_tokens",
+            "output_tokens",
+            "prompt_eval_seconds",
+            "eval_seconds",
+            "total_seconds",
+        )
+        return {key: sum(stats[key] for stats in self.stages.values()) for key in keys}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Totals plus the per-stage breakdown (as stored in `audit.token_usage`)."""
+        return {**self.totals(), "stages": self.stages}
+
+
+_current_usage: ContextVar[Optional[RequestUsage]] = ContextVar("request_usage", default=None)
+
+
+def start_request_usage() -> RequestUsage:
+    """
+    Begin token accounting for the current request (context).
+
+    Returns:
+        The new RequestUsage, filled in by later `record_usage()` calls
+    """
+    usage = RequestUsage()
+    _current_usage.set(usage)
+    return usage
+
+
+def current_usage() -> Optional[RequestUsage]:
+    """Return the current request's usage, or None outside a request."""
+    return _current_usage.get()
+
+
+def record_usage(stage: str, response_data: Dict[str, Any]) -> None:
+    """
+    Add one Ollama response to the current request's usage (no-op outside a request).
+
+    Args:
+        stage: Stage that made the call ("safety", "rerank" or "answer")
+        response_data: Decoded Ollama generate/chat response
+    """
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.add(stage, response_data)
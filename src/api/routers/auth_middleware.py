@@ -9,6 +9,7 @@ Key Functions:
 1. Extracts tokens from either secure cookies or `Authorization: Bearer` headers.
 2. Verifies token validity by checking the `user_tokens` table in PostgreSQL.
 3. Returns the authenticated user's email if the token is valid.
+4. Restricts admin endpoints to the users listed in `ADMIN_EMAILS`.
 
 Requirements:
 - PostgreSQL database with a `user_tokens` table containing valid tokens.
@@ -18,8 +19,10 @@ Functions:
 - `get_db`: Provides a database session.
 - `get_token_from_request`: Retrieves a token from cookies or headers.
 - `verify_token`: Confirms token validity and retrieves associated user email.
+- `verify_admin`: Like `verify_token`, but only for admin users.
 """
 
+import os
 from typing import Optional
 
 from fastapi import Cookie, Depends, HTTPException, Request, status
@@ -28,6 +31,11 @@ from sqlalchemy.orm import Session
 from sqlalchemy.sql import text
 from utils.database import SessionLocal
 
+# Users allowed on admin endpoints (comma-separated emails)
+ADMIN_EMAILS = {
+    email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()
+}
+
 # Optional OAuth2 scheme for token extraction from Authorization header
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
 
@@ -99,3 +107,16 @@ async def verify_token(
             detail=f"Authentication error: {str(e)}",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+
+async def verify_admin(user_email: str = Depends(verify_token)):
+    """
+    Verify that the authenticated user is an admin and return their email
+    Admins are configured with the `ADMIN_EMAILS` environment variable
+    """
+    if user_email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return user_email
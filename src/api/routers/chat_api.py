@@ -10,6 +10,9 @@ Features:
 - Supports multilingual, context-aware hybrid retrieval using Ollama models.
 - Integrates with persistent storage for chat history and access control.
 - Works with frontend session tracking and user tokens via secure cookies.
+- Chats of other users are refused with 403 when they are loaded, before any answer is generated.
+- Admission control: while the LLM request queue is over its bound, requests that generate
+  answers are rejected with 429 and a `Retry-After` header.
 
 Requirements:
 - PostgreSQL database for session persistence and access control.
@@ -17,28 +20,44 @@ Requirements:
 - Vector and BM25 search indices for document chunks.
 
 Routes:
-- `GET /chats`: List recent chat sessions for a user (with optional limit).
-- `GET /chats/{chat_id}`: Retrieve a specific chat session by ID.
+- `GET /chats`: List recent chat sessions for a user (with optional limit); `summary=true` returns
+  pages of chat_id/title/dts/message_count with a `next_cursor`.
+- `GET /chats/export`: (Admins) Stream all chats as NDJSON, one chat per line, optionally filtered by
+  user, class and a `start`/`end` date range of last activity.
+- `GET /chats/{chat_id}`: Retrieve a specific chat session by ID, optionally a page of its messages
+  (`limit`, `before`/`after` a message `seq`).
 - `POST /chats`: Start a new chat with an initial user message.
-- `POST /chats/{chat_id}`: Continue an existing chat session with a new user message.
+- `POST /chats/{chat_id}`: Continue an existing chat session with a new user message (the response
+  holds the latest messages only).
 - `DELETE /chats/{chat_id}`: Delete a chat session by ID.
 - `POST /query`: Alternate unified endpoint for initiating or continuing chat sessions via structured payload.
 """
 
+import json
 import time
 import uuid
-from typing import Dict, Optional
+from datetime import datetime
+from typing import Dict, Iterator, Optional
 
 from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from rag_pipeline.config import DEFAULT_BM25_K, DEFAULT_VECTOR_K, OLLAMA_MODEL
+from rag_pipeline.config import (
+    CHAT_CONTEXT_MESSAGES,
+    DEFAULT_BM25_K,
+    DEFAULT_VECTOR_K,
+    OLLAMA_MODEL,
+)
+from rag_pipeline.conversation_memory import ConversationMemory
 from rag_pipeline.embedding import get_ch_embedding_model
 from rag_pipeline.ollama import query_ollama_with_hybrid_search_multilingual
-from utils.chat_history import ChatHistoryManager
+from rag_pipeline.scheduler import get_scheduler
+from utils.chat_history import CHAT_PAGE_SIZE, ChatHistoryManager, StaleChatError
 from utils.database import SessionLocal
+from utils.kv_store import get_kv_store
 from utils.llm_rag_utils import chat_sessions, create_chat_session, rebuild_chat_session
-from .auth_middleware import verify_token
+from .auth_middleware import verify_admin, verify_token
 
 
 class QueryRequest(BaseModel):
@@ -48,42 +67,153 @@ class QueryRequest(BaseModel):
     session_id: str
 
 
+# Largest page of chat summaries returned by GET /chats?summary=true
+MAX_CHAT_PAGE_SIZE = 200
+
+# Messages returned per page by GET /chats/{chat_id} (default and largest page)
+MESSAGE_PAGE_SIZE = 50
+MAX_MESSAGE_PAGE_SIZE = 200
+
 # Define Router
 router = APIRouter()
 
-# Initialize chat history manager and sessions
-chat_manager = ChatHistoryManager(model="ollama-rag")
+# Initialize chat history manager (with the write-through chat cache) and sessions
+chat_manager = ChatHistoryManager(model="ollama-rag", cache=get_kv_store())
+
+# Rolling summaries of older turns, updated in the background after each answer
+conversation_memory = ConversationMemory(chat_manager.save_summary, chat_manager.get_chat)
 
 # Load embedding model
 embedding_model = get_ch_embedding_model()
 
 
+def load_own_chat(chat_id: str, user_email: str, **window) -> Dict:
+    """
+    Load a chat (or a window of its messages, see `ChatHistoryManager.get_chat`) of the user.
+
+    Raises:
+        HTTPException: 404 if the chat does not exist, 403 if it belongs to another user
+    """
+    chat = chat_manager.get_chat(chat_id, **window)
+    if not chat:
+        raise HTTPException(status_code=404, detail="Chat not found")
+    if chat.get("user_email") != user_email:
+        raise HTTPException(status_code=403, detail="Chat belongs to another user")
+    return chat
+
+
+def save_turn(chat: Dict, user_email: str, session_id: str) -> None:
+    """
+    Save a chat with its new messages. If the chat was loaded stale (messages were appended
+    meanwhile, e.g. by another replica), append the new messages after the latest ones instead.
+    """
+    try:
+        try:
+            chat_manager.save_chat(chat, user_email, session_id)
+        except StaleChatError as e:
+            print(f"Chat {chat['chat_id']} was stale, saving after the latest messages: {e}")
+            latest = load_own_chat(chat["chat_id"], user_email, last_n=CHAT_CONTEXT_MESSAGES)
+            new_messages = [message for message in chat["messages"] if "seq" not in message]
+            chat["messages"] = latest["messages"] + new_messages
+            chat_manager.save_chat(chat, user_email, session_id)
+    except PermissionError:
+        raise HTTPException(status_code=403, detail="Chat belongs to another user")
+
+
+def admission_control():
+    """Reject new LLM requests with 429 while the scheduler queue is over its bound."""
+    retry_after = get_scheduler().retry_after()
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=429,
+            detail="The assistant is busy, please retry shortly",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
 @router.get("/chats")
 async def get_chats(
     x_session_id: str = Header(None, alias="X-Session-ID"),
     limit: Optional[int] = None,
+    summary: bool = False,
+    cursor: Optional[str] = None,
     user_email: str = Depends(verify_token),
 ):
-    """Get all chats, optionally limited to a specific number"""
+    """
+    Get all chats, optionally limited to a specific number. With `summary=true`, return one
+    page of chat summaries (no messages) and the cursor of the next page.
+    """
     print(f"User {user_email} retrieving chats with session: {x_session_id}")
+    if summary:
+        page_size = min(max(limit or CHAT_PAGE_SIZE, 1), MAX_CHAT_PAGE_SIZE)
+        try:
+            return chat_manager.list_chats(user_email, page_size, cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     return chat_manager.get_recent_chats(user_email, limit)
 
 
+def ndjson_lines(chats: Iterator[Dict]) -> Iterator[str]:
+    """Encode chats as newline-delimited JSON."""
+    for chat in chats:
+        yield json.dumps(chat, ensure_ascii=False) + "\n"
+
+
+@router.get("/chats/export")
+async def export_chats(
+    user: Optional[str] = None,
+    class_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user_email: str = Depends(verify_admin),
+):
+    """
+    Export chats as NDJSON (admins only). Chats are streamed from the database as they are
+    read, so exports of any size use constant memory.
+    """
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    print(
+        f"Admin {user_email} exporting chats (user={user}, class_id={class_id}, "
+        f"start={start}, end={end})"
+    )
+
+    chats = chat_manager.export_chats(
+        user_email=user,
+        class_id=class_id,
+        start_dts=int(start.timestamp()) if start else None,
+        end_dts=int(end.timestamp()) if end else None,
+    )
+    filename = f"chats-{int(time.time())}.ndjson"
+    return StreamingResponse(
+        ndjson_lines(chats),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.get("/chats/{chat_id}")
 async def get_chat(
     chat_id: str,
     x_session_id: str = Header(None, alias="X-Session-ID"),
+    limit: Optional[int] = None,
+    before: Optional[int] = None,
+    after: Optional[int] = None,
     user_email: str = Depends(verify_token),
 ):
-    """Get a specific chat by ID"""
+    """
+    Get a specific chat by ID. With `limit`, return only the latest `limit` messages; with
+    `before`/`after` (a message `seq`), the page of messages before or after that message.
+    """
     print(f"User {user_email} retrieving chat {chat_id} with session: {x_session_id}")
-    chat = chat_manager.get_chat(chat_id)
-    if not chat:
-        raise HTTPException(status_code=404, detail="Chat not found")
-    return chat
+    if before is not None and after is not None:
+        raise HTTPException(status_code=400, detail="Only one of before and after can be given")
+    if limit is not None or before is not None or after is not None:
+        limit = min(max(limit or MESSAGE_PAGE_SIZE, 1), MAX_MESSAGE_PAGE_SIZE)
+    return load_own_chat(chat_id, user_email, last_n=limit, before_seq=before, after_seq=after)
 
 
-@router.post("/chats")
+@router.post("/chats", dependencies=[Depends(admission_control)])
 async def start_chat_with_llm(
     message: Dict,
     x_session_id: str = Header(None, alias="X-Session-ID"),
@@ -111,6 +241,7 @@ async def start_chat_with_llm(
         bm25_k=DEFAULT_BM25_K,
         model_name=message.get("model", OLLAMA_MODEL),
         user_email=user_email,
+        chat_id=chat_id,
     )
 
     # Create a new chat session
@@ -143,7 +274,7 @@ async def start_chat_with_llm(
     return chat_response
 
 
-@router.post("/chats/{chat_id}")
+@router.post("/chats/{chat_id}", dependencies=[Depends(admission_control)])
 async def continue_chat_with_llm(
     chat_id: str,
     message: Dict,
@@ -160,10 +291,9 @@ async def continue_chat_with_llm(
     if not question:
         raise HTTPException(status_code=400, detail="Message content is required")
 
-    # Get existing chat
-    chat = chat_manager.get_chat(chat_id)
-    if not chat:
-        raise HTTPException(status_code=404, detail="Chat not found")
+    # Get existing chat with the latest messages (enough for the prompt's history window),
+    # checking its owner before any work is done for it
+    chat = load_own_chat(chat_id, user_email, last_n=CHAT_CONTEXT_MESSAGES)
 
     # Get or rebuild chat session
     chat_session = chat_sessions.get(chat_id)
@@ -195,6 +325,8 @@ async def continue_chat_with_llm(
         model_name=message.get("model", OLLAMA_MODEL),
         user_email=user_email,
         chat_history=chat["messages"][:-1],
+        chat_id=chat_id,
+        conversation_summary=chat.get("conversation_summary"),
     )
 
     # Create assistant message with response
@@ -211,8 +343,9 @@ async def continue_chat_with_llm(
     if "top_documents" in result:
         chat["top_documents"] = result["top_documents"]
 
-    # Save updated chat
-    chat_manager.save_chat(chat, user_email, x_session_id)
+    # Save updated chat, then summarize the turns that left the history window
+    save_turn(chat, user_email, x_session_id)
+    conversation_memory.schedule_update(chat)
     return chat
 
 
@@ -226,8 +359,7 @@ async def delete_chat(
     print(f"User {user_email} deleting chat {chat_id} in session: {x_session_id}")
 
     # Remove from chat sessions if present
-    if chat_id in chat_sessions:
-        del chat_sessions[chat_id]
+    chat_sessions.pop(chat_id, None)
 
     # Delete from database
     success = chat_manager.delete_chat(chat_id)
@@ -237,7 +369,7 @@ async def delete_chat(
     return {"status": "success", "message": f"Chat {chat_id} deleted successfully"}
 
 
-@router.post("/query")
+@router.post("/query", dependencies=[Depends(admission_control)])
 async def process_query(request: QueryRequest, user_email: str = Depends(verify_token)):
     """
     Process a query from the frontend with user authentication
@@ -257,10 +389,8 @@ async def process_query(request: QueryRequest, user_email: str = Depends(verify_
 
     # If chat_id is provided, add to existing chat, otherwise create new chat
     if chat_id:
-        # Get existing chat
-        chat = chat_manager.get_chat(chat_id)
-        if not chat:
-            raise HTTPException(status_code=404, detail="Chat not found")
+        # Get existing chat with the latest messages, before any work is done for it
+        chat = load_own_chat(chat_id, user_email, last_n=CHAT_CONTEXT_MESSAGES)
 
         # Get or rebuild chat session
         chat_session = chat_sessions.get(chat_id)
@@ -296,6 +426,8 @@ async def process_query(request: QueryRequest, user_email: str = Depends(verify_
             model_name=model_name,
             user_email=user_email,
             chat_history=chat["messages"][:-1],
+            chat_id=chat_id,
+            conversation_summary=chat.get("conversation_summary"),
         )
 
         # Create assistant message with response
@@ -308,8 +440,9 @@ async def process_query(request: QueryRequest, user_email: str = Depends(verify_
         # Add the assistant response to chat history
         chat["messages"].append(assistant_message)
 
-        # Save updated chat
-        chat_manager.save_chat(chat, user_email, session_id)
+        # Save updated chat, then summarize the turns that left the history window
+        save_turn(chat, user_email, session_id)
+        conversation_memory.schedule_update(chat)
 
         # Add document information if available
         if "top_documents" in result:
@@ -335,6 +468,7 @@ async def process_query(request: QueryRequest, user_email: str = Depends(verify_
             bm25_k=DEFAULT_BM25_K,
             model_name=model_name,
             user_email=user_email,
+            chat_id=new_chat_id,
         )
 
         # Create chat response structure
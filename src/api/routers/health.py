@@ -4,10 +4,26 @@ This FastAPI router defines a simple health check endpoint to verify that the ba
 Routes:
 - `GET /`: Returns HTTP 200 OK if the service is alive.
 - `GET /eat-mem`: Memory test endpoint that allocates 10MB on each call.
+- `GET /safety`: Per-tier safety decision counts and shadow-mode agreement rates.
+- `GET /models`: Ollama model residency and load-duration metrics.
+- `GET /ollama`: Per-host load and health state of the Ollama endpoint pool.
+- `GET /breakers`: Circuit breaker state and latency budgets of the Ollama-backed stages.
+- `GET /single_flight`: Coalesced (follower) vs executed (leader) request counts.
+- `GET /generation`: Output-token limits and usage per generation profile.
+- `GET /scheduler`: LLM request queue depth, in-flight calls and wait times per priority class.
+- `GET /chat_sessions`: Size, hit rate and evictions of the in-memory chat session cache.
 """
 
 from fastapi import APIRouter, Request, Response
+from rag_pipeline.generation_profiles import generation_profile_stats
+from rag_pipeline.model_residency import get_residency_manager
+from rag_pipeline.moderation import get_moderation_engine
+from rag_pipeline.ollama_pool import get_ollama_pool
+from rag_pipeline.resilience import resilience_stats
+from rag_pipeline.scheduler import get_scheduler
+from rag_pipeline.single_flight import single_flight_stats
 from starlette.status import HTTP_200_OK
+from utils.llm_rag_utils import chat_sessions
 
 router = APIRouter()
 
@@ -26,3 +42,43 @@ async def eat_memory(_: Request):
     # Allocate 10MB of memory on each call
     router.garbage.append([b"0" * 1024 * 1024 * 10])
     return Response(status_code=HTTP_200_OK)
+
+
+@router.get("/safety")
+async def safety_stats(_: Request):
+    return get_moderation_engine().stats()
+
+
+@router.get("/models")
+async def model_residency(_: Request):
+    return get_residency_manager().stats()
+
+
+@router.get("/ollama")
+async def ollama_hosts(_: Request):
+    return get_ollama_pool().stats()
+
+
+@router.get("/breakers")
+async def breakers(_: Request):
+    return resilience_stats()
+
+
+@router.get("/single_flight")
+async def single_flight(_: Request):
+    return single_flight_stats()
+
+
+@router.get("/generation")
+async def generation_profiles(_: Request):
+    return generation_profile_stats()
+
+
+@router.get("/scheduler")
+async def scheduler(_: Request):
+    return get_scheduler().stats()
+
+
+@router.get("/chat_sessions")
+async def chat_session_cache(_: Request):
+    return chat_sessions.stats()
@@ -19,6 +19,9 @@ Routes:
 - `/reports/user_activity`: Most active users ranked by query count and activity span.
 - `/reports/daily_active_users`: Unique users submitting queries per day.
 - `/reports/system_stats`: Aggregated system-level metrics (total queries, chunks, classes, users, etc.).
+- `/reports/token_usage`: LLM token volume, tokens/sec per stage and prompt-size distribution.
+- `/reports/backfill_languages`: Detects and stores `language_code` for audit rows missing it
+  (admins only).
 """
 
 from typing import Optional
@@ -28,8 +31,9 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy import text
 from nltk.corpus import stopwords
 
+from rag_pipeline.language import detect_languages
 from utils.database import SessionLocal
-from .auth_middleware import verify_token
+from .auth_middleware import verify_admin, verify_token
 
 # Define a router for reports
 router = APIRouter()
@@ -405,3 +409,160 @@ async def get_system_stats(user_email: str = Depends(verify_token)):
         return stats
     finally:
         db.close()
+
+
+@router.get("/reports/token_usage")
+async def get_token_usage(
+    days: Optional[int] = Query(30, description="Number of days to include in the report"),
+    bucket_size: Optional[int] = Query(512, description="Prompt tokens per histogram bucket"),
+    user_email: str = Depends(verify_token),
+):
+    """Get LLM token usage, generation throughput and prompt sizes for the past X days"""
+
+    db = SessionLocal()
+    try:
+        params = {"days": days}
+
+        # Request-level totals and prompt-size percentiles
+        totals = db.execute(
+            text(
+                """
+            SELECT
+                COUNT(*) AS requests,
+                COALESCE(SUM(llm_calls), 0) AS llm_calls,
+                COALESCE(SUM(prompt_tokens), 0) AS prompt_tokens,
+                COALESCE(SUM(output_tokens), 0) AS output_tokens,
+                COALESCE(SUM(eval_seconds), 0) AS eval_seconds,
+                COALESCE(SUM(llm_seconds), 0) AS llm_seconds,
+                percentile_cont(0.5) WITHIN GROUP (ORDER BY prompt_tokens) AS prompt_p50,
+                percentile_cont(0.9) WITHIN GROUP (ORDER BY prompt_tokens) AS prompt_p90,
+                percentile_cont(0.99) WITHIN GROUP (ORDER BY prompt_tokens) AS prompt_p99,
+                MAX(prompt_tokens) AS prompt_max
+            FROM audit
+            WHERE
+                event_time > CURRENT_TIMESTAMP - make_interval(days => :days)
+                AND token_usage IS NOT NULL
+            """
+            ),
+            params,
+        ).fetchone()
+
+        # Per-stage totals from the JSONB breakdown
+        stages = db.execute(
+            text(
+                """
+            SELECT
+                stage.key AS stage,
+                SUM((stage.value->>'calls')::int) AS calls,
+                SUM((stage.value->>'prompt_tokens')::int) AS prompt_tokens,
+                SUM((stage.value->>'output_tokens')::int) AS output_tokens,
+                SUM((stage.value->>'prompt_eval_seconds')::float) AS prompt_eval_seconds,
+                SUM((stage.value->>'eval_seconds')::float) AS eval_seconds
+            FROM audit, jsonb_each(audit.token_usage->'stages') AS stage
+            WHERE event_time > CURRENT_TIMESTAMP - make_interval(days => :days)
+            GROUP BY stage.key
+            ORDER BY stage.key
+            """
+            ),
+            params,
+        ).fetchall()
+
+        # Histogram of prompt tokens per request
+        histogram = db.execute(
+            text(
+                """
+            SELECT (prompt_tokens / :bucket_size) * :bucket_size AS bucket_start, COUNT(*) AS count
+            FROM audit
+            WHERE
+                event_time > CURRENT_TIMESTAMP - make_interval(days => :days)
+                AND prompt_tokens IS NOT NULL
+            GROUP BY bucket_start
+            ORDER BY bucket_start
+            """
+            ),
+            {**params, "bucket_size": max(1, bucket_size)},
+        ).fetchall()
+
+        def rate(tokens, seconds):
+            return round(tokens / seconds, 2) if seconds else None
+
+        return {
+            "days": days,
+            "requests": totals[0],
+            "llm_calls": totals[1],
+            "prompt_tokens": totals[2],
+            "output_tokens": totals[3],
+            "output_tokens_per_second": rate(totals[3], totals[4]),
+            "llm_seconds": totals[5],
+            "prompt_tokens_per_request": {
+                "p50": totals[6],
+                "p90": totals[7],
+                "p99": totals[8],
+                "max": totals[9],
+            },
+            "stages": [
+                {
+                    "stage": row[0],
+                    "calls": row[1],
+                    "prompt_tokens": row[2],
+                    "output_tokens": row[3],
+                    "prompt_tokens_per_second": rate(row[2], row[4]),
+                    "output_tokens_per_second": rate(row[3], row[5]),
+                }
+                for row in stages
+            ],
+            "prompt_size_distribution": [
+                {"bucket_start": row[0], "bucket_end": row[0] + bucket_size - 1, "count": row[1]}
+                for row in histogram
+            ],
+        }
+    finally:
+        db.close()
+
+
+@router.post("/reports/backfill_languages")
+def backfill_languages(
+    batch_size: Optional[int] = Query(500, description="Audit rows to detect per batch"),
+    max_rows: Optional[int] = Query(10000, description="Maximum number of rows to backfill"),
+    user_email: str = Depends(verify_admin),
+):
+    """
+    Detect and store the language of audit queries that have no language_code (admins only).
+    Declared without async so FastAPI runs the detection and database work in its threadpool.
+    """
+
+    db = SessionLocal()
+    try:
+        updated = 0
+        while updated < max_rows:
+            rows = db.execute(
+                text(
+                    """
+                SELECT audit_id, query
+                FROM audit
+                WHERE language_code IS NULL
+                ORDER BY audit_id
+                LIMIT :limit
+                """
+                ),
+                {"limit": min(batch_size, max_rows - updated)},
+            ).fetchall()
+
+            if not rows:
+                break
+
+            # Detect the whole batch at once, then write it back in a single statement
+            languages = detect_languages([row[1] or "" for row in rows])
+            db.execute(
+                text("UPDATE audit SET language_code = :language_code WHERE audit_id = :audit_id"),
+                [
+                    {"audit_id": row[0], "language_code": language}
+                    for row, language in zip(rows, languages)
+                ],
+            )
+            db.commit()
+            updated += len(rows)
+
+        return {"updated": updated}
+    finally:
+        db.close()
@@ -5,80 +5,287 @@ This module defines the `ChatHistoryManager` class for managing user chat sessio
 It supports saving, retrieving, listing, and deleting chat records, including message history and metadata.
 
 Requirements:
-- PostgreSQL database with a `chat_history` table (fields: chat_id, session_id, user_email, model, title, messages, timestamps).
-- JSON-serializable `messages` field storing user/assistant messages.
+- PostgreSQL database with a `chat_history` table (fields: chat_id, session_id, user_email, model, title, messages, timestamps, version).
+- A `chat_message` table with one row per user/assistant message (chat_id, seq, role, content, message_id, created_at).
+  Messages are only ever appended; the `messages` JSONB column is read only for chats saved before it existed.
+- A `chat_summary` table with the rolling summary of each chat's older turns (see rag_pipeline/conversation_memory.py).
 
 Functions:
-- `save_chat`: Inserts or updates a chat session with user messages and metadata.
-- `get_chat`: Retrieves a single chat session by chat ID.
+- `save_chat`: Upserts the chat metadata and appends the new messages (one statement).
+  Recently active chats are kept in a write-through cache, so consecutive turns skip the read;
+  a stale cached chat is detected by the write (`StaleChatError`).
+- `get_chat`: Retrieves a single chat session by chat ID, optionally only a window of its messages
+  (the latest N, or N before/after a message `seq`).
 - `get_recent_chats`: Lists recent chats by user, optionally limiting the number of results.
+- `list_chats`: Lists chat summaries (no messages) a page at a time, with an opaque cursor.
+- `export_chats`: Streams all chats matching user/class/date filters from a server-side cursor.
+- `save_summary`: Stores the rolling summary of a chat.
 - `delete_chat`: Deletes a chat session by ID.
 """
 
+import base64
+import binascii
 import json
+import os
 import traceback
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
 
 from .database import SessionLocal
+from .kv_store import KVStore
+
+# JSON array of the `chat_message` rows aliased `m`, in conversation order
+MESSAGES_JSON = """COALESCE(
+    jsonb_agg(
+        jsonb_build_object(
+            'seq', m.seq, 'message_id', m.message_id, 'role', m.role, 'content', m.content
+        ) ORDER BY m.seq
+    ),
+    '[]'::jsonb
+)"""
+
+# Keeps only the latest header row `h` of each chat: chats saved before headers were shared
+# across sessions have one row per session. Unlike DISTINCT ON, the listing still reads the
+# (user_email, model, dts, chat_id) index in keyset order.
+LATEST_HEADER = """NOT EXISTS (
+    SELECT 1 FROM chat_history newer
+    WHERE newer.chat_id = h.chat_id AND newer.model = h.model
+      AND (newer.dts, newer.id) > (h.dts, h.id)
+)"""
+
+
+# Chat summaries returned per page by `list_chats`
+CHAT_PAGE_SIZE = 50
+
+# Chats fetched per round trip by `export_chats` (rows are streamed from a server-side cursor)
+CHAT_EXPORT_BATCH_SIZE = int(os.getenv("CHAT_EXPORT_BATCH_SIZE", "200"))
+
+# Write-through chat cache: latest messages kept per chat, and seconds an idle chat is kept
+CHAT_CACHE_MESSAGES = int(os.getenv("CHAT_CACHE_MESSAGES", "50"))
+CHAT_CACHE_TTL = float(os.getenv("CHAT_CACHE_TTL", "600"))
+CHAT_CACHE_PREFIX = "chat:"
+
+# PostgreSQL error code of a unique constraint violation
+UNIQUE_VIOLATION = "23505"
+
+
+class StaleChatError(Exception):
+    """Raised by `save_chat` when messages were appended since the chat was loaded."""
+
+
+def encode_cursor(dts: int, chat_id: str) -> str:
+    """Encode the position after the chat (`dts`, `chat_id`) as an opaque cursor."""
+    raw = json.dumps([dts, chat_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """
+    Decode a cursor made by `encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        dts, chat_id = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(dts, int) or not isinstance(chat_id, str):
+        raise ValueError("Invalid cursor")
+    return dts, chat_id
+
+
+def _decode_messages(value) -> List[Dict]:
+    return value if isinstance(value, list) else json.loads(value)
+
+
+def _window_flags(chat_data: Dict) -> Dict:
+    """Add `has_older`/`has_newer`: whether messages exist outside the loaded window."""
+    messages = chat_data["messages"]
+    chat_data["has_older"] = bool(messages) and messages[0].get("seq", 0) > 0
+    chat_data["has_newer"] = (
+        bool(messages)
+        and "seq" in messages[-1]
+        and messages[-1]["seq"] < chat_data["message_count"] - 1
+    )
+    return chat_data
+
+
+def _messages_from_row(legacy_messages, stored_messages, message_count: int) -> Dict:
+    """Messages of a chat: from `chat_message`, or from the JSONB column for chats saved before."""
+    if message_count:
+        return {"messages": _decode_messages(stored_messages), "message_count": message_count}
+    # Not migrated yet: returned in full and without `seq`, so the next save appends them all
+    messages = _decode_messages(legacy_messages) if legacy_messages else []
+    return {"messages": messages, "message_count": len(messages)}
 
 
 class ChatHistoryManager:
-    def __init__(self, model):
-        """Initialize the chat history manager with PostgreSQL connection"""
+    def __init__(
+        self,
+        model,
+        cache: Optional[KVStore] = None,
+        cache_messages: int = CHAT_CACHE_MESSAGES,
+        cache_ttl: float = CHAT_CACHE_TTL,
+    ):
+        """
+        Initialize the chat history manager with PostgreSQL connection
+
+        Args:
+            model: Model name the chats are stored under
+            cache: Key-value store for the write-through cache of active chats (None disables it)
+            cache_messages: Latest messages kept per cached chat
+            cache_ttl: Seconds a chat stays cached after its last read or write
+        """
         self.model = model
+        self.cache = cache
+        self.cache_messages = cache_messages
+        self.cache_ttl = cache_ttl
 
         # Connect to PostgreSQL
         self.SessionLocal = SessionLocal
 
-    def save_chat(self, chat_to_save: Dict, user_email: str, session_id: str) -> None:
-        """Save a chat to PostgreSQL database"""
+    def _cache_chat(self, chat: Dict, version: Optional[int]) -> None:
+        """Keep the chat header and its latest stored messages in the cache."""
+        if self.cache is None or any("seq" not in message for message in chat["messages"]):
+            return
+        entry = {
+            key: value
+            for key, value in chat.items()
+            if key not in ("messages", "top_documents", "has_older", "has_newer")
+        }
+        entry["messages"] = chat["messages"][-self.cache_messages :] if self.cache_messages else []
+        entry["version"] = version
+
+        # The chat's summary may have been updated in the background since it was loaded:
+        # keep whichever summary covers more messages
+        cached = self.cache.get(CHAT_CACHE_PREFIX + chat["chat_id"])
+        cached_summary = cached.get("conversation_summary") if cached else None
+        summary = entry.get("conversation_summary")
+        if cached_summary and (
+            not summary or cached_summary["through_seq"] > summary["through_seq"]
+        ):
+            entry["conversation_summary"] = cached_summary
+        self.cache.set(CHAT_CACHE_PREFIX + chat["chat_id"], entry, ttl=self.cache_ttl)
+
+    def _cached_chat(self, chat_id: str, last_n: Optional[int]) -> Optional[Dict]:
+        """Serve the latest `last_n` messages (all if None) from the cache if it holds them."""
+        if self.cache is None:
+            return None
+        chat = self.cache.get(CHAT_CACHE_PREFIX + chat_id)
+        if chat is None or "user_email" not in chat:
+            # Entries cached before the owner was stored are read again
+            return None
+        messages = chat["messages"]
+        needed = chat["message_count"] if last_n is None else min(last_n, chat["message_count"])
+        if len(messages) < needed:
+            return None
+        chat["messages"] = messages[len(messages) - needed :]
+        return _window_flags(chat)
+
+    def invalidate(self, chat_id: str) -> None:
+        """Drop a chat from the cache."""
+        if self.cache is not None:
+            self.cache.delete(CHAT_CACHE_PREFIX + chat_id)
+
+    def save_chat(self, chat_to_save: Dict, user_email: str, session_id: str) -> int:
+        """
+        Save a chat to PostgreSQL database with a single statement. The chat header is upserted
+        and only the messages not stored yet (those without a `seq`) are appended to the
+        `chat_message` table; stored messages are never rewritten. The saved chat is written
+        through to the cache.
+
+        Returns:
+            The row version after the write (1 for a new chat, incremented on every update)
+
+        Raises:
+            StaleChatError: If messages were appended since the chat was loaded (for example
+                from a stale cache entry or by another replica); nothing is written
+            PermissionError: If the chat belongs to another user
+        """
         try:
             # Create a new database session
             db_session = self.SessionLocal()
 
-            # Convert messages to JSON string
-            messages_json = json.dumps(chat_to_save["messages"], ensure_ascii=False)
+            # Messages loaded from chat_message carry their position; new ones do not. The new
+            # messages must follow the last stored one, otherwise the loaded chat is stale.
+            new_messages = [message for message in chat_to_save["messages"] if "seq" not in message]
+            stored = [message for message in chat_to_save["messages"] if "seq" in message]
+            expected_seq = stored[-1]["seq"] + 1 if stored else 0
+            messages_json = json.dumps(
+                [
+                    {
+                        "message_id": message.get("message_id"),
+                        "role": message["role"],
+                        "content": message.get("content", ""),
+                    }
+                    for message in new_messages
+                ],
+                ensure_ascii=False,
+            )
 
-            # Check if chat exists and update or insert accordingly
+            # Update the chat's header, whichever session created it, or insert it if the chat
+            # has none for this model. Nothing is written if any row of the chat belongs to
+            # another user (no version is returned and no messages are appended), or if the
+            # next seq is not the expected one. A concurrent first save of the same chat fails
+            # on the chat_message primary key. The JSONB column is cleared: messages of chats
+            # saved before chat_message existed are moved over by this save.
             sql = """
-            SELECT COUNT(*) FROM chat_history
-            WHERE chat_id = :chat_id AND user_email = :user_email AND model = :model
-            """
-
-            result = db_session.execute(
-                text(sql),
-                {
-                    "chat_id": chat_to_save["chat_id"],
-                    "user_email": user_email,
-                    "model": self.model,
-                },
-            ).scalar()
-
-            if result > 0:
-                # Update existing chat
-                sql = """
+            WITH next_seq AS (
+                SELECT COALESCE(MAX(seq) + 1, 0) AS seq FROM chat_message WHERE chat_id = :chat_id
+            ),
+            allowed AS (
+                SELECT 1 FROM next_seq
+                WHERE next_seq.seq = :expected_seq
+                  AND NOT EXISTS (
+                      SELECT 1 FROM chat_history
+                      WHERE chat_id = :chat_id AND user_email <> :user_email
+                  )
+            ),
+            updated AS (
                 UPDATE chat_history
                 SET title = :title,
-                    messages = :messages,
+                    messages = '[]'::jsonb,
                     dts = :dts,
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE chat_id = :chat_id AND session_id = :session_id AND model = :model
-                """
-            else:
-                # Insert new chat
-                sql = """
+                    updated_at = CURRENT_TIMESTAMP,
+                    version = chat_history.version + 1
+                WHERE chat_id = :chat_id AND model = :model AND EXISTS (SELECT 1 FROM allowed)
+                RETURNING version
+            ),
+            inserted AS (
                 INSERT INTO chat_history (
                     chat_id, session_id, user_email, model, title, messages, dts, created_at, updated_at
-                ) VALUES (
-                    :chat_id, :session_id, :user_email, :model, :title, :messages, :dts, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
                 )
-                """
+                SELECT :chat_id, :session_id, :user_email, :model, :title, '[]'::jsonb, :dts, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+                FROM allowed
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM chat_history WHERE chat_id = :chat_id AND model = :model
+                )
+                RETURNING version
+            ),
+            header AS (
+                SELECT MAX(version) AS version FROM (
+                    SELECT version FROM updated UNION ALL SELECT version FROM inserted
+                ) AS written
+            ),
+            appended AS (
+                INSERT INTO chat_message (chat_id, seq, role, content, message_id)
+                SELECT :chat_id, next_seq.seq + appended_message.ordinality - 1,
+                       appended_message.value->>'role', appended_message.value->>'content',
+                       appended_message.value->>'message_id'
+                FROM header, next_seq,
+                     jsonb_array_elements(CAST(:messages AS JSONB)) WITH ORDINALITY AS appended_message(value, ordinality)
+                WHERE header.version IS NOT NULL
+            )
+            SELECT header.version, next_seq.seq FROM next_seq, header
+            """
 
             # Execute the query
-            db_session.execute(
+            result = db_session.execute(
                 text(sql),
                 {
                     "chat_id": chat_to_save["chat_id"],
@@ -88,12 +295,43 @@ class ChatHistoryManager:
                     "title": chat_to_save.get("title", "Untitled Chat"),
                     "messages": messages_json,
                     "dts": chat_to_save.get("dts", int(datetime.now().timestamp())),
+                    "expected_seq": expected_seq,
                 },
-            )
+            ).fetchone()
+
+            version, next_seq = result if result is not None else (None, expected_seq)
+            if next_seq != expected_seq:
+                raise StaleChatError(
+                    f"Chat {chat_to_save['chat_id']} has {next_seq} stored messages, "
+                    f"expected {expected_seq}"
+                )
+            if version is None:
+                raise PermissionError(f"Chat {chat_to_save['chat_id']} belongs to another user")
 
             # Commit the changes
             db_session.commit()
 
+            # The appended messages are stored now: record their positions
+            for offset, message in enumerate(new_messages):
+                message["seq"] = next_seq + offset
+            chat_to_save["message_count"] = next_seq + len(new_messages)
+            chat_to_save["session_id"] = session_id
+            chat_to_save["user_email"] = user_email
+            chat_to_save["updated_at"] = datetime.now().isoformat()
+            self._cache_chat(chat_to_save, version)
+            return version
+
+        except IntegrityError as e:
+            db_session.rollback()
+            if getattr(e.orig, "pgcode", None) != UNIQUE_VIOLATION:
+                raise
+            # A concurrent save appended the same seq first
+            self.invalidate(chat_to_save["chat_id"])
+            raise StaleChatError(f"Chat {chat_to_save['chat_id']} was saved concurrently")
+        except StaleChatError:
+            db_session.rollback()
+            self.invalidate(chat_to_save["chat_id"])
+            raise
         except Exception as e:
             db_session.rollback()
             print(f"Error saving chat {chat_to_save['chat_id']}: {str(e)}")
@@ -102,39 +340,95 @@ class ChatHistoryManager:
         finally:
             db_session.close()
 
-    def get_chat(self, chat_id: str) -> Optional[Dict]:
-        """Get a specific chat by ID from the database"""
+    def get_chat(
+        self,
+        chat_id: str,
+        last_n: Optional[int] = None,
+        before_seq: Optional[int] = None,
+        after_seq: Optional[int] = None,
+    ) -> Optional[Dict]:
+        """
+        Get a specific chat by ID from the database, with all its messages or a window of them.
+
+        Args:
+            chat_id: Chat to load
+            last_n: Load at most `last_n` messages (all messages if None)
+            before_seq: Load the latest messages with a `seq` below this one (older messages)
+            after_seq: Load the earliest messages with a `seq` above this one (newer messages)
+
+        Returns:
+            The chat with its owner (`user_email`), its messages in order (each with its
+            `seq`), `message_count`, `version`, its `conversation_summary` ({"text",
+            "through_seq"} or None), and `has_older`/`has_newer` telling whether messages exist
+            outside the window, or None if not found. The latest messages of active chats are
+            served from the cache.
+        """
+        if before_seq is not None and after_seq is not None:
+            raise ValueError("Only one of before_seq and after_seq can be given")
+
+        latest = before_seq is None and after_seq is None
+        if latest:
+            cached = self._cached_chat(chat_id, last_n)
+            if cached is not None:
+                return cached
+
+        # The window is read from the chat_message primary key in both directions
+        params = {"chat_id": chat_id, "last_n": last_n}
+        window, order = "", "DESC"
+        if before_seq is not None:
+            window, params["before_seq"] = "AND seq < :before_seq", before_seq
+        elif after_seq is not None:
+            window, params["after_seq"], order = "AND seq > :after_seq", after_seq, "ASC"
+
         try:
             # Create a new database session
             db_session = self.SessionLocal()
 
-            # Query the database
-            sql = """
-            SELECT chat_id, session_id, model, title, messages, dts, created_at, updated_at
-            FROM chat_history
-            WHERE chat_id = :chat_id
+            # Query the database: the header plus the window of messages from chat_message
+            sql = f"""
+            SELECT h.chat_id, h.session_id, h.model, h.title, h.messages, h.dts,
+                   h.created_at, h.updated_at, stored.messages, stored.message_count, h.version,
+                   s.summary, s.through_seq, h.user_email
+            FROM chat_history h
+            LEFT JOIN chat_summary s ON s.chat_id = h.chat_id
+            CROSS JOIN LATERAL (
+                SELECT {MESSAGES_JSON} AS messages,
+                       (SELECT COALESCE(MAX(seq) + 1, 0) FROM chat_message WHERE chat_id = h.chat_id)
+                           AS message_count
+                FROM (
+                    SELECT seq, message_id, role, content FROM chat_message
+                    WHERE chat_id = h.chat_id {window}
+                    ORDER BY seq {order}
+                    LIMIT :last_n
+                ) AS m
+            ) AS stored
+            WHERE h.chat_id = :chat_id
+            ORDER BY h.updated_at DESC
+            LIMIT 1
             """
 
-            result = db_session.execute(
-                text(sql),
-                {"chat_id": chat_id},
-            ).fetchone()
+            result = db_session.execute(text(sql), params).fetchone()
 
             if result:
                 # Convert to dictionary
                 chat_data = {
                     "chat_id": result[0],
                     "session_id": result[1],
+                    "user_email": result[13],
                     "model": result[2],
                     "title": result[3],
-                    "messages": (
-                        result[4] if isinstance(result[4], list) else json.loads(result[4])
-                    ),
                     "dts": result[5],
                     "created_at": result[6].isoformat() if result[6] else None,
                     "updated_at": result[7].isoformat() if result[7] else None,
                 }
-                return chat_data
+                chat_data.update(_messages_from_row(result[4], result[8], result[9]))
+                chat_data["version"] = result[10]
+                chat_data["conversation_summary"] = (
+                    {"text": result[11], "through_seq": result[12]} if result[11] else None
+                )
+                if latest:
+                    self._cache_chat(chat_data, chat_data["version"])
+                return _window_flags(chat_data)
             else:
                 return None
 
@@ -153,11 +447,17 @@ class ChatHistoryManager:
             db_session = self.SessionLocal()
 
             # Query the database
-            sql = """
-            SELECT chat_id, session_id, model, title, messages, dts, created_at, updated_at
-            FROM chat_history
-            WHERE user_email = :user_email AND model = :model
-            ORDER BY dts DESC
+            sql = f"""
+            SELECT h.chat_id, h.session_id, h.model, h.title, h.messages, h.dts,
+                   h.created_at, h.updated_at, stored.messages, stored.message_count
+            FROM chat_history h
+            CROSS JOIN LATERAL (
+                SELECT {MESSAGES_JSON} AS messages, COALESCE(MAX(m.seq) + 1, 0) AS message_count
+                FROM chat_message m
+                WHERE m.chat_id = h.chat_id
+            ) AS stored
+            WHERE h.user_email = :user_email AND h.model = :model AND {LATEST_HEADER}
+            ORDER BY h.dts DESC, h.chat_id DESC
             """
 
             if limit:
@@ -174,13 +474,11 @@ class ChatHistoryManager:
                     "session_id": result[1],
                     "model": result[2],
                     "title": result[3],
-                    "messages": (
-                        result[4] if isinstance(result[4], list) else json.loads(result[4])
-                    ),
                     "dts": result[5],
                     "created_at": result[6].isoformat() if result[6] else None,
                     "updated_at": result[7].isoformat() if result[7] else None,
                 }
+                chat_data.update(_messages_from_row(result[4], result[8], result[9]))
                 recent_chats.append(chat_data)
 
             return recent_chats
@@ -192,14 +490,207 @@ class ChatHistoryManager:
         finally:
             db_session.close()
 
+    def list_chats(
+        self, user_email: str, limit: int = CHAT_PAGE_SIZE, cursor: Optional[str] = None
+    ) -> Dict:
+        """
+        List a user's chats, most recent first, without their messages. Pages are read with
+        keyset pagination on (dts, chat_id), so every page costs the same.
+
+        Args:
+            user_email: Owner of the chats
+            limit: Chats per page
+            cursor: `next_cursor` of the previous page (None for the first page)
+
+        Returns:
+            {"chats": [{chat_id, title, dts, message_count}], "next_cursor": str or None}
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        params = {"user_email": user_email, "model": self.model, "limit": limit + 1}
+        after = ""
+        if cursor:
+            params["cursor_dts"], params["cursor_chat_id"] = decode_cursor(cursor)
+            after = "AND (h.dts, h.chat_id) < (:cursor_dts, :cursor_chat_id)"
+
+        try:
+            # Create a new database session
+            db_session = self.SessionLocal()
+
+            # One more row than the page size tells whether there is a next page; the message
+            # count comes from the chat_message primary key (or the JSONB column if not migrated)
+            sql = f"""
+            SELECT h.chat_id, h.title, h.dts,
+                   COALESCE(
+                       (SELECT MAX(seq) + 1 FROM chat_message WHERE chat_id = h.chat_id),
+                       jsonb_array_length(h.messages)
+                   ) AS message_count
+            FROM chat_history h
+            WHERE h.user_email = :user_email AND h.model = :model AND {LATEST_HEADER} {after}
+            ORDER BY h.dts DESC, h.chat_id DESC
+            LIMIT :limit
+            """
+
+            results = db_session.execute(text(sql), params).fetchall()
+
+            chats = [
+                {"chat_id": row[0], "title": row[1], "dts": row[2], "message_count": row[3]}
+                for row in results[:limit]
+            ]
+            next_cursor = None
+            if len(results) > limit:
+                next_cursor = encode_cursor(chats[-1]["dts"], chats[-1]["chat_id"])
+            return {"chats": chats, "next_cursor": next_cursor}
+
+        except Exception as e:
+            print(f"Error listing chats: {str(e)}")
+            traceback.print_exc()
+            return {"chats": [], "next_cursor": None}
+        finally:
+            db_session.close()
+
+    def export_chats(
+        self,
+        user_email: Optional[str] = None,
+        class_id: Optional[str] = None,
+        start_dts: Optional[int] = None,
+        end_dts: Optional[int] = None,
+        batch_size: int = CHAT_EXPORT_BATCH_SIZE,
+    ) -> Iterator[Dict]:
+        """
+        Stream chats with all their messages, oldest activity first. Rows are read from a
+        server-side cursor `batch_size` chats at a time, so memory use does not depend on the
+        number of chats exported.
+
+        Args:
+            user_email: Only chats of this user
+            class_id: Only chats of users with access to this class
+            start_dts: Only chats last active at or after this time (epoch seconds)
+            end_dts: Only chats last active before this time (epoch seconds)
+            batch_size: Chats fetched per round trip
+
+        Yields:
+            One chat per row of `chat_history` (the latest session row of each chat), with
+            `user_email`, `message_count` and its messages
+        """
+        params = {"model": self.model}
+        filters = ""
+        if user_email:
+            filters += " AND h.user_email = :user_email"
+            params["user_email"] = user_email
+        if class_id:
+            filters += (
+                " AND h.user_email IN (SELECT user_email FROM access WHERE class_id = :class_id)"
+            )
+            params["class_id"] = class_id
+        if start_dts is not None:
+            filters += " AND h.dts >= :start_dts"
+            params["start_dts"] = start_dts
+        if end_dts is not None:
+            filters += " AND h.dts < :end_dts"
+            params["end_dts"] = end_dts
+
+        # Create a new database session (closed when the generator finishes or is closed)
+        db_session = self.SessionLocal()
+        try:
+            # The latest header of each chat is picked among all its rows, then filtered: an
+            # older session row matching the filters is not exported in place of it
+            sql = f"""
+            SELECT h.chat_id, h.user_email, h.session_id, h.model, h.title, h.messages, h.dts,
+                   h.created_at, h.updated_at, stored.messages, stored.message_count
+            FROM chat_history h
+            CROSS JOIN LATERAL (
+                SELECT {MESSAGES_JSON} AS messages, COALESCE(MAX(m.seq) + 1, 0) AS message_count
+                FROM chat_message m
+                WHERE m.chat_id = h.chat_id
+            ) AS stored
+            WHERE h.model = :model AND {LATEST_HEADER} {filters}
+            ORDER BY h.dts, h.chat_id
+            """
+
+            results = db_session.execute(
+                text(sql), params, execution_options={"yield_per": batch_size}
+            )
+            for result in results:
+                chat_data = {
+                    "chat_id": result[0],
+                    "user_email": result[1],
+                    "session_id": result[2],
+                    "model": result[3],
+                    "title": result[4],
+                    "dts": result[6],
+                    "created_at": result[7].isoformat() if result[7] else None,
+                    "updated_at": result[8].isoformat() if result[8] else None,
+                }
+                chat_data.update(_messages_from_row(result[5], result[9], result[10]))
+                yield chat_data
+
+        except Exception as e:
+            print(f"Error exporting chats: {str(e)}")
+            traceback.print_exc()
+            raise e
+        finally:
+            db_session.close()
+
+    def save_summary(self, chat_id: str, summary: str, through_seq: int) -> bool:
+        """
+        Store the rolling summary of a chat, covering its messages up to `through_seq`. A summary
+        never replaces one covering more messages. The cached chat is updated too.
+
+        Returns:
+            True if the summary was stored
+        """
+        try:
+            # Create a new database session
+            db_session = self.SessionLocal()
+
+            sql = """
+            INSERT INTO chat_summary (chat_id, summary, through_seq, updated_at)
+            VALUES (:chat_id, :summary, :through_seq, CURRENT_TIMESTAMP)
+            ON CONFLICT (chat_id) DO UPDATE
+            SET summary = EXCLUDED.summary,
+                through_seq = EXCLUDED.through_seq,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE chat_summary.through_seq < EXCLUDED.through_seq
+            """
+
+            result = db_session.execute(
+                text(sql), {"chat_id": chat_id, "summary": summary, "through_seq": through_seq}
+            )
+            db_session.commit()
+            if result.rowcount == 0:
+                return False
+
+            if self.cache is not None:
+                cached = self.cache.get(CHAT_CACHE_PREFIX + chat_id)
+                if cached is not None:
+                    cached["conversation_summary"] = {"text": summary, "through_seq": through_seq}
+                    self.cache.set(CHAT_CACHE_PREFIX + chat_id, cached, ttl=self.cache_ttl)
+            return True
+
+        except Exception as e:
+            db_session.rollback()
+            print(f"Error saving summary of chat {chat_id}: {str(e)}")
+            traceback.print_exc()
+            return False
+        finally:
+            db_session.close()
+
     def delete_chat(self, chat_id: str) -> bool:
         """Delete a chat from the database"""
         try:
             # Create a new database session
             db_session = self.SessionLocal()
 
-            # Delete from database
+            # Delete the chat, its messages and its summary in one statement
             sql = """
+            WITH deleted_messages AS (
+                DELETE FROM chat_message WHERE chat_id = :chat_id
+            ),
+            deleted_summary AS (
+                DELETE FROM chat_summary WHERE chat_id = :chat_id
+            )
             DELETE FROM chat_history
             WHERE chat_id = :chat_id
             """
@@ -208,6 +699,8 @@ class ChatHistoryManager:
                 text(sql),
                 {"chat_id": chat_id},
             )
+            self.invalidate(chat_id)
+
             # Check if any row was actually deleted
             rows_affected = result.rowcount
             if rows_affected == 0:
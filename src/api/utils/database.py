@@ -12,9 +12,10 @@ Requirements:
 Functions:
 - `connect_to_postgres`: Establishes and returns a SQLAlchemy database engine.
 - `SessionLocal`: Reusable session factory bound to the active engine.
-- `log_audit`: Logs detailed query metadata (e.g., query, embedding, chunks, language) into the audit table.
+- `log_audit`: Logs detailed query metadata (e.g., query, embedding, chunks, language, token usage) into the audit table.
 """
 
+import json
 import os
 
 from sqlalchemy import create_engine, text
@@ -47,27 +48,35 @@ def log_audit(
     chunks,
     response,
     detected_language=None,
+    token_usage=None,
 ):
     """
-    Log audit information for a query, including language detection.
+    Log audit information for a query, including language detection and, if given, the
+    token usage of the request (`RequestUsage.to_dict()`: totals plus per-stage breakdown).
     """
     try:
         document_ids = [chunk["document_id"] for chunk in chunks] if chunks else []
         chunk_texts = [chunk["chunk_text"] for chunk in chunks] if chunks else []
 
-        # Format the embedding into a pgvector-compatible string
-        embedding_str = str(
-            query_embedding.tolist() if hasattr(query_embedding, "tolist") else query_embedding
-        )
+        # Format the embedding into a pgvector-compatible string (NULL if there is none)
+        embedding_sql = "NULL"
+        if query_embedding is not None:
+            embedding_str = str(
+                query_embedding.tolist() if hasattr(query_embedding, "tolist") else query_embedding
+            )
+            embedding_sql = f"'{embedding_str}'::vector"
 
-        # Include language_code in the SQL insertion
+        # Include language_code and token usage in the SQL insertion
         sql = f"""
         INSERT INTO audit (
-            user_email, query, query_embedding, document_ids, chunk_texts, response, language_code
+            user_email, query, query_embedding, document_ids, chunk_texts, response, language_code,
+            llm_calls, prompt_tokens, output_tokens, eval_seconds, llm_seconds, token_usage
         ) VALUES (
-            :user_email, :query, '{embedding_str}'::vector, :document_ids, :chunk_texts, :response, :language_code
+            :user_email, :query, {embedding_sql}, :document_ids, :chunk_texts, :response, :language_code,
+            :llm_calls, :prompt_tokens, :output_tokens, :eval_seconds, :llm_seconds, CAST(:token_usage AS JSONB)
         )
         """
+        usage = token_usage or {}
 
         params = {
             "user_email": user_email,
@@ -76,6 +85,12 @@ def log_audit(
             "chunk_texts": chunk_texts,
             "response": response,
             "language_code": detected_language or "en",  # Default to English if not provided
+            "llm_calls": usage.get("calls"),
+            "prompt_tokens": usage.get("prompt_tokens"),
+            "output_tokens": usage.get("output_tokens"),
+            "eval_seconds": usage.get("eval_seconds"),
+            "llm_seconds": usage.get("total_seconds"),
+            "token_usage": json.dumps(token_usage) if token_usage else None,
         }
 
         session.execute(text(sql), params)
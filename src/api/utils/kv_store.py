@@ -0,0 +1,360 @@
+"""
+Shared Key-Value Store for SMART System
+
+This module provides the key-value backend that API replicas use to share session state and
+caches, so a follow-up request can be served by any pod (no sticky sessions):
+
+- `RedisKVStore`: speaks the Redis protocol (RESP) over a plain socket, so it works with Redis,
+  Valkey or KeyDB without extra dependencies.
+- `MemoryKVStore`: in-process stand-in with the same interface, for single-replica deployments
+  and tests.
+
+Values are JSON-serializable objects stored in a compact binary encoding (a format byte
+followed by compact JSON, zlib-compressed when large). Every key can have a TTL.
+
+Store failures are logged and treated as misses, so a Redis outage degrades to per-pod state.
+
+Functions:
+- `dumps()` / `loads()`: Encode and decode stored values.
+- `get_kv_store()`: Return the shared store selected by `KV_STORE_BACKEND`.
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+# Backend ("memory" or "redis"), server URL and key prefix of the shared store
+KV_STORE_BACKEND = os.getenv("KV_STORE_BACKEND", "memory").lower()
+KV_STORE_URL = os.getenv("KV_STORE_URL", "redis://localhost:6379/0")
+KV_STORE_PREFIX = os.getenv("KV_STORE_PREFIX", "smart:")
+KV_STORE_TIMEOUT = float(os.getenv("KV_STORE_TIMEOUT", "0.5"))
+# Entries kept by the in-memory store
+KV_STORE_MEMORY_SIZE = int(os.getenv("KV_STORE_MEMORY_SIZE", "10000"))
+
+# Encoded values larger than this are compressed
+COMPRESS_THRESHOLD = 512
+FORMAT_JSON = b"\x01"
+FORMAT_JSON_ZLIB = b"\x02"
+
+logger = logging.getLogger("kv_store")
+
+
+def dumps(value: Any) -> bytes:
+    """Encode a JSON-serializable value as format byte + compact JSON (zlib when large)."""
+    raw = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(raw) > COMPRESS_THRESHOLD:
+        return FORMAT_JSON_ZLIB + zlib.compress(raw)
+    return FORMAT_JSON + raw
+
+
+def loads(data: bytes) -> Any:
+    """Decode a value encoded by `dumps`."""
+    fmt, payload = data[:1], data[1:]
+    if fmt == FORMAT_JSON_ZLIB:
+        payload = zlib.decompress(payload)
+    elif fmt != FORMAT_JSON:
+        raise ValueError(f"Unknown value format {fmt!r}")
+    return json.loads(payload.decode("utf-8"))
+
+
+class KVStore:
+    """
+    Interface of the key-value stores. Subclasses implement the raw byte operations; values
+    are serialized here.
+    """
+
+    # True when other replicas see the same data
+    shared = False
+
+    def __init__(self, prefix: str = KV_STORE_PREFIX):
+        self.prefix = prefix
+        self.stats_counters = {"hits": 0, "misses": 0, "writes": 0, "errors": 0}
+
+    def _get_raw(self, keys: List[str]) -> List[Optional[bytes]]:
+        raise NotImplementedError
+
+    def _set_raw(self, items: List[Tuple[str, bytes]], ttl: Optional[float]) -> None:
+        raise NotImplementedError
+
+    def _delete_raw(self, keys: List[str]) -> int:
+        raise NotImplementedError
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value stored under `key`, or None if missing, expired or unreadable."""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Look up several keys at once.
+
+        Returns:
+            Dictionary of the keys found (misses are omitted)
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+        try:
+            values = self._get_raw([self.prefix + key for key in keys])
+        except Exception as e:
+            self.stats_counters["errors"] += 1
+            logger.error(f"Key-value store read failed: {e}")
+            return {}
+
+        found = {}
+        for key, data in zip(keys, values):
+            if data is None:
+                continue
+            try:
+                found[key] = loads(data)
+            except Exception as e:
+                logger.error(f"Could not decode key-value store entry {key}: {e}")
+        self.stats_counters["hits"] += len(found)
+        self.stats_counters["misses"] += len(keys) - len(found)
+        return found
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Store `value` under `key`, expiring after `ttl` seconds (never if None)."""
+        return self.set_many({key: value}, ttl)
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> bool:
+        """Store several values with the same TTL. Returns False if the write failed."""
+        if not items:
+            return True
+        try:
+            encoded = [(self.prefix + key, dumps(value)) for key, value in items.items()]
+            self._set_raw(encoded, ttl)
+        except Exception as e:
+            self.stats_counters["errors"] += 1
+            logger.error(f"Key-value store write failed: {e}")
+            return False
+        self.stats_counters["writes"] += len(items)
+        return True
+
+    def delete(self, key: str) -> bool:
+        """Delete `key`. Returns True if it existed."""
+        try:
+            return self._delete_raw([self.prefix + key]) > 0
+        except Exception as e:
+            self.stats_counters["errors"] += 1
+            logger.error(f"Key-value store delete failed: {e}")
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__, "shared": self.shared, **self.stats_counters}
+
+
+class MemoryKVStore(KVStore):
+    """In-process store: a bounded LRU of encoded values with per-key expiry."""
+
+    def __init__(
+        self,
+        max_entries: int = KV_STORE_MEMORY_SIZE,
+        prefix: str = KV_STORE_PREFIX,
+        shared: bool = False,
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            max_entries: Entries kept at most (least recently used are dropped)
+            prefix: Prefix added to every key
+            shared: Report the store as shared (tests use it as a stand-in for Redis)
+        """
+        super().__init__(prefix)
+        self.max_entries = max_entries
+        self.shared = shared
+        # key -> (encoded value, expiry epoch or None)
+        self._entries: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_raw(self, keys: List[str]) -> List[Optional[bytes]]:
+        now = time.time()
+        values = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] is not None and entry[1] <= now:
+                    del self._entries[key]
+                    entry = None
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                values.append(entry[0] if entry else None)
+        return values
+
+    def _set_raw(self, items: List[Tuple[str, bytes]], ttl: Optional[float]) -> None:
+        expires = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            for key, data in items:
+                self._entries[key] = (data, expires)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _delete_raw(self, keys: List[str]) -> int:
+        with self._lock:
+            return sum(self._entries.pop(key, None) is not None for key in keys)
+
+
+class RedisProtocolError(Exception):
+    """Raised when the server returns an error reply."""
+
+
+class RedisKVStore(KVStore):
+    """Store on a Redis-protocol server, using one pipelined connection per store."""
+
+    shared = True
+
+    def __init__(
+        self,
+        url: str = KV_STORE_URL,
+        prefix: str = KV_STORE_PREFIX,
+        timeout: float = KV_STORE_TIMEOUT,
+    ):
+        """
+        Initialize the store (the connection is opened on first use).
+
+        Args:
+            url: `redis://[:password@]host[:port][/db]`
+            prefix: Prefix added to every key
+            timeout: Socket timeout in seconds
+        """
+        super().__init__(prefix)
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def encode_command(*args: Any) -> bytes:
+        """Encode a command as a RESP array of bulk strings."""
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+        return b"".join(parts)
+
+    @staticmethod
+    def read_reply(reader) -> Any:
+        """Read one RESP reply from a buffered binary reader."""
+        line = reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Connection closed by the key-value server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RedisProtocolError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(body)
+            if count < 0:
+                return None
+            return [RedisKVStore.read_reply(reader) for _ in range(count)]
+        raise RedisProtocolError(f"Unexpected reply type {kind!r}")
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._sock.makefile("rb")
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        if setup:
+            self._send(setup)
+
+    def _close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._reader.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._reader = None
+
+    def _send(self, commands: List[Tuple[Any, ...]]) -> List[Any]:
+        """Send pipelined commands and read their replies (caller holds the lock)."""
+        self._sock.sendall(b"".join(self.encode_command(*command) for command in commands))
+        replies = []
+        error = None
+        for _ in commands:
+            try:
+                replies.append(self.read_reply(self._reader))
+            except RedisProtocolError as e:
+                error = error or e
+                replies.append(None)
+        if error is not None:
+            raise error
+        return replies
+
+    def execute(self, commands: List[Tuple[Any, ...]]) -> List[Any]:
+        """Run pipelined commands, reconnecting once if the connection was dropped."""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._send(commands)
+                except RedisProtocolError:
+                    raise
+                except (OSError, ConnectionError):
+                    self._close()
+                    if attempt:
+                        raise
+
+    def _get_raw(self, keys: List[str]) -> List[Optional[bytes]]:
+        return self.execute([("MGET", *keys)])[0]
+
+    def _set_raw(self, items: List[Tuple[str, bytes]], ttl: Optional[float]) -> None:
+        expiry = ("PX", max(1, int(ttl * 1000))) if ttl is not None else ()
+        self.execute([("SET", key, data, *expiry) for key, data in items])
+
+    def _delete_raw(self, keys: List[str]) -> int:
+        return self.execute([("DEL", *keys)])[0]
+
+    def ping(self) -> bool:
+        try:
+            return self.execute([("PING",)])[0] == "PONG"
+        except Exception:
+            return False
+
+
+# Singleton instance for reuse
+_store = None
+
+
+def get_kv_store() -> KVStore:
+    """
+    Get or create the shared key-value store selected by `KV_STORE_BACKEND`.
+
+    Returns:
+        KVStore instance (`RedisKVStore` for "redis", otherwise `MemoryKVStore`)
+    """
+    global _store
+    if _store is None:
+        if KV_STORE_BACKEND == "redis":
+            _store = RedisKVStore()
+            logger.info(f"Shared key-value store: {_store.host}:{_store.port}/{_store.db}")
+        else:
+            _store = MemoryKVStore()
+    return _store
@@ -6,19 +6,40 @@ the SMART system's Retrieval-Augmented Generation (RAG) pipeline. It supports:
 
 1. Creating isolated chat sessions to track multi-turn user interactions.
 2. Rebuilding chat context from historical messages for follow-up queries.
-3. Maintaining consistent in-memory state using the `chat_sessions` dictionary.
+3. Maintaining consistent in-memory state using the bounded `chat_sessions` cache.
 
 Functions:
 - `create_chat_session`: Initializes an empty session with message history and metadata.
 - `rebuild_chat_session`: Reconstructs session context from past chat message records.
 
 Global State:
-- `chat_sessions`: Dictionary to track active sessions keyed by chat ID.
+- `chat_sessions`: `ChatSessionCache` of active sessions keyed by chat ID. Sessions are evicted
+  least recently used first when the entry or memory limit is reached, and after being idle
+  for `CHAT_SESSION_IDLE_SECONDS`; an evicted session is rebuilt from the database on next use.
+  With a shared key-value store (`KV_STORE_BACKEND=redis`), sessions are written through to it
+  so any replica can continue a chat.
 """
 
 import logging
-from typing import Any, Dict, List
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
 
+from .kv_store import KVStore, get_kv_store
+
+# Limits of the in-memory chat session cache
+CHAT_SESSION_CACHE_SIZE = int(os.getenv("CHAT_SESSION_CACHE_SIZE", "1000"))
+CHAT_SESSION_CACHE_BYTES = int(os.getenv("CHAT_SESSION_CACHE_BYTES", str(64 * 1024 * 1024)))
+CHAT_SESSION_IDLE_SECONDS = float(os.getenv("CHAT_SESSION_IDLE_SECONDS", "1800"))
+
+# Key prefix of chat sessions in the shared key-value store
+SESSION_KEY_PREFIX = "chat_session:"
+
+# Approximate per-object overhead used by the session size estimate, in bytes
+SESSION_OVERHEAD_BYTES = 512
+MESSAGE_OVERHEAD_BYTES = 200
 
 # Setup
 logging.basicConfig(
@@ -26,8 +47,165 @@ logging.basicConfig(
 )
 logger = logging.getLogger("llm_rag_utils")
 
+
+def estimate_session_size(session: Dict[str, Any]) -> int:
+    """Rough memory footprint of a chat session in bytes (message text plus fixed overheads)."""
+    size = SESSION_OVERHEAD_BYTES
+    for message in session.get("messages", []):
+        size += (
+            MESSAGE_OVERHEAD_BYTES + len(message.get("role", "")) + len(message.get("content", ""))
+        )
+    return size
+
+
+class ChatSessionCache:
+    """
+    Dict-like LRU cache of chat sessions with an idle TTL and a memory budget.
+
+    Supports the mapping operations the routers use (`get`, `[]`, `in`, `del`, `len`, `clear`).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CHAT_SESSION_CACHE_SIZE,
+        max_bytes: int = CHAT_SESSION_CACHE_BYTES,
+        idle_seconds: float = CHAT_SESSION_IDLE_SECONDS,
+        store: Optional[KVStore] = None,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Sessions kept at most
+            max_bytes: Estimated memory kept at most (see `estimate_session_size`)
+            idle_seconds: Sessions not used for this long are dropped
+            store: Key-value store sessions are written through to (used only if shared)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.store = store if store is not None and store.shared else None
+        self.store_hits = 0
+        # chat_id -> (session, estimated size, last access time), least recently used first
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = {"lru": 0, "idle": 0, "memory": 0}
+
+    def _remove(self, chat_id: str) -> Dict[str, Any]:
+        session, size, _ = self._entries.pop(chat_id)
+        self._bytes -= size
+        return session
+
+    def _evict(self, now: float) -> None:
+        """Drop idle sessions, then the least recently used ones while over a limit."""
+        while self._entries:
+            chat_id, (_, _, last_used) = next(iter(self._entries.items()))
+            if now - last_used < self.idle_seconds:
+                break
+            self._remove(chat_id)
+            self.evictions["idle"] += 1
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions["lru"] += 1
+        # Keep the most recent session even if it alone exceeds the budget
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            self._remove(next(iter(self._entries)))
+            self.evictions["memory"] += 1
+
+    def get(self, chat_id: str, default: Optional[Dict[str, Any]] = None) -> Optional[Dict]:
+        """
+        Return the session of `chat_id` (marking it recently used), or `default`. Sessions
+        missing locally are looked up in the shared store.
+        """
+        with self._lock:
+            now = time.time()
+            self._evict(now)
+            entry = self._entries.get(chat_id)
+            if entry is not None:
+                self.hits += 1
+                session, size, _ = entry
+                self._entries[chat_id] = (session, size, now)
+                self._entries.move_to_end(chat_id)
+                return session
+
+        session = self.store.get(SESSION_KEY_PREFIX + chat_id) if self.store else None
+        if session is None:
+            self.misses += 1
+            return default
+        self.store_hits += 1
+        self._put(chat_id, session)
+        return session
+
+    def _put(self, chat_id: str, session: Dict[str, Any]) -> None:
+        with self._lock:
+            if chat_id in self._entries:
+                self._remove(chat_id)
+            size = estimate_session_size(session)
+            now = time.time()
+            self._entries[chat_id] = (session, size, now)
+            self._bytes += size
+            self._evict(now)
+
+    def __getitem__(self, chat_id: str) -> Dict[str, Any]:
+        session = self.get(chat_id)
+        if session is None:
+            raise KeyError(chat_id)
+        return session
+
+    def __setitem__(self, chat_id: str, session: Dict[str, Any]) -> None:
+        self._put(chat_id, session)
+        if self.store:
+            self.store.set(SESSION_KEY_PREFIX + chat_id, session, ttl=self.idle_seconds)
+
+    def __delitem__(self, chat_id: str) -> None:
+        if self.pop(chat_id) is None:
+            raise KeyError(chat_id)
+
+    def __contains__(self, chat_id: object) -> bool:
+        with self._lock:
+            entry = self._entries.get(chat_id)
+            return entry is not None and time.time() - entry[2] < self.idle_seconds
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def pop(self, chat_id: str, default: Any = None) -> Any:
+        """Remove the session of `chat_id` here and from the shared store."""
+        if self.store:
+            self.store.delete(SESSION_KEY_PREFIX + chat_id)
+        with self._lock:
+            if chat_id in self._entries:
+                return self._remove(chat_id)
+        return default
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Size, limits and hit/miss/eviction counters."""
+        lookups = self.hits + self.store_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "estimated_bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "idle_seconds": self.idle_seconds,
+            "hits": self.hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.store_hits) / lookups if lookups else None,
+            "store": self.store.stats() if self.store else None,
+            "evictions": dict(self.evictions),
+        }
+
+
 # Initialize chat sessions
-chat_sessions: Dict[str, Any] = {}
+chat_sessions = ChatSessionCache(store=get_kv_store())
 
 
 def create_chat_session():
@@ -10,7 +10,8 @@ This script orchestrates an end-to-end document processing pipeline that:
    - Recursive chunking (`RecursiveCharacterTextSplitter`), or
    - Semantic chunking (`AdvancedSemanticChunker`) with sentence-transformer embeddings.
 5. Creates dense vector embeddings for each chunk using a sentence-transformer model.
-6. Inserts metadata and chunk embeddings into a PostgreSQL database using `pgvector`.
+6. Inserts metadata and chunk embeddings into a PostgreSQL database using `pgvector`,
+   together with half-precision and binary (sign bit) copies used for quantized search.
 
 Key Features:
 - Optional semantic chunking with cosine-similarity-based sentence segmentation.
@@ -29,6 +30,7 @@ import logging
 import os
 import tempfile
 
+import numpy as np
 import pandas as pd
 import torch
 from google.cloud import storage
@@ -72,6 +74,18 @@ DB_PORT = "5432"
 DEFAULT_CHUNK_SIZE = 2000
 DEFAULT_CHUNK_OVERLAP = 200
 
+# Store half-precision and binary copies of each embedding for quantized search
+STORE_QUANTIZED_EMBEDDINGS = os.getenv("STORE_QUANTIZED_EMBEDDINGS", "1") == "1"
+
+# Also store a multilingual embedding of each chunk for native-language retrieval (on by
+# default when the API runs with RETRIEVAL_MODE=multilingual)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "translate").lower()
+STORE_MULTILINGUAL_EMBEDDINGS = (
+    os.getenv("STORE_MULTILINGUAL_EMBEDDINGS", "1" if RETRIEVAL_MODE == "multilingual" else "0")
+    == "1"
+)
+MULTILINGUAL_EMBEDDING_MODEL = "paraphrase-multilingual-mpnet-base-v2"
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -492,10 +506,9 @@ def chunk_documents_from_gcs(bucket, chunk_method):
     return all_chunks
 
 
-def get_ch_embedding_model():
+def get_ch_embedding_model(model_name="all-mpnet-base-v2"):
     """Load and return the embedding model."""
     try:
-        model_name = "all-mpnet-base-v2"
         # model_name = 'multi-qa-mpnet-base-dot-v1'
         model = SentenceTransformer(model_name).to("cuda" if torch.cuda.is_available() else "cpu")
         logger.info(f"Successfully loaded Embedding model: {model_name}")
@@ -521,6 +534,14 @@ def create_chunk_embeddings(chunk_texts, embedding_model, batch_size=4):
         raise RuntimeError(f"Critical failure: Unable to create embeddings: {str(e)}")
 
 
+def quantize_embedding(embedding):
+    """Return the (half precision, binary) pgvecto.rs literals for an embedding."""
+    values = np.asarray(embedding, dtype=np.float32).reshape(-1)
+    halfvec = values.astype(np.float16).astype(np.float32).tolist()
+    bits = (values > 0).astype(np.uint8).tolist()
+    return str(halfvec).replace(" ", ""), str(bits).replace(" ", "")
+
+
 def create_and_insert_chunks(all_chunks):
     """Process chunks and insert directly into the database with document_id, page,
     chunk_text, and vector embeddings."""
@@ -543,6 +564,13 @@ def create_and_insert_chunks(all_chunks):
     logger.info(f"Creating embeddings for {len(chunk_texts)} chunks")
     embeddings = create_chunk_embeddings(chunk_texts, embedding_model)
 
+    multilingual_embeddings = None
+    if STORE_MULTILINGUAL_EMBEDDINGS:
+        logger.info(f"Creating multilingual embeddings with {MULTILINGUAL_EMBEDDING_MODEL}")
+        multilingual_model = get_ch_embedding_model(MULTILINGUAL_EMBEDDING_MODEL)
+        multilingual_embeddings = create_chunk_embeddings(chunk_texts, multilingual_model)
+        del multilingual_model
+
     for i, chunk in enumerate(all_chunks):
         # Get the document_id (GCS path) from the metadata
         document_id = chunk.metadata.get("source", "unknown")
@@ -562,9 +590,20 @@ def create_and_insert_chunks(all_chunks):
 
         try:
             # Insert directly into the database
+            columns = ["document_id", "page_number", "chunk_text", "embedding"]
+            values = [":document_id", ":page_number", ":chunk_text", f"'{embedding_str}'::vector"]
+            if STORE_QUANTIZED_EMBEDDINGS:
+                halfvec_str, binary_str = quantize_embedding(embedding)
+                columns += ["embedding_f16", "embedding_bin"]
+                values += [f"'{halfvec_str}'::vecf16", f"'{binary_str}'::bvector"]
+            if multilingual_embeddings is not None:
+                multilingual_str = str(multilingual_embeddings[i].tolist())
+                columns.append("embedding_multilingual")
+                values.append(f"'{multilingual_str}'::vector")
+
             sql = f"""
-            INSERT INTO chunk (document_id, page_number, chunk_text, embedding)
-            VALUES (:document_id, :page_number, :chunk_text, '{embedding_str}'::vector)
+            INSERT INTO chunk ({", ".join(columns)})
+            VALUES ({", ".join(values)})
             """
 
             session.execute(
@@ -595,6 +634,58 @@ def create_and_insert_chunks(all_chunks):
     return inserted_count
 
 
+def backfill_multilingual_embeddings(batch_size=256):
+    """
+    Store the multilingual embedding of chunks inserted without one, in batches. The chunk
+    table has no primary key, so rows are updated by their ctid within each batch.
+
+    Returns:
+        Number of chunks updated
+    """
+    engine = connect_to_postgres()
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    logger.info(f"Backfilling multilingual embeddings with {MULTILINGUAL_EMBEDDING_MODEL}")
+    multilingual_model = get_ch_embedding_model(MULTILINGUAL_EMBEDDING_MODEL)
+
+    updated_count = 0
+    try:
+        while True:
+            rows = session.execute(
+                text(
+                    """
+                SELECT ctid::text, chunk_text FROM chunk
+                WHERE embedding_multilingual IS NULL
+                LIMIT :limit
+                """
+                ),
+                {"limit": batch_size},
+            ).fetchall()
+            if not rows:
+                break
+
+            embeddings = create_chunk_embeddings([row[1] or "" for row in rows], multilingual_model)
+            session.execute(
+                text(
+                    "UPDATE chunk SET embedding_multilingual = CAST(:embedding AS vector) "
+                    "WHERE ctid = CAST(:ctid AS tid)"
+                ),
+                [
+                    {"ctid": row[0], "embedding": str(embedding.tolist())}
+                    for row, embedding in zip(rows, embeddings)
+                ],
+            )
+            session.commit()
+            updated_count += len(rows)
+            logger.info(f"Stored multilingual embeddings for {updated_count} chunks so far")
+    finally:
+        session.close()
+
+    logger.info(f"Backfilled multilingual embeddings for {updated_count} chunks")
+    return updated_count
+
+
 def main(chunk_method="recursive"):
     """
     Main function to execute the chunking pipeline.
@@ -670,6 +761,12 @@ if __name__ == "__main__":
         help="Method to use for document chunking (recursive or semantic)",
     )
 
+    parser.add_argument(
+        "--backfill-multilingual",
+        action="store_true",
+        help="Only store multilingual embeddings for chunks that have none, then exit",
+    )
+
     # Parse arguments
     args = parser.parse_args()
 
@@ -677,6 +774,14 @@ if __name__ == "__main__":
     logger.info(f"Command line arguments: {sys.argv}")
     logger.info(f"Parsed chunk-method argument: '{args.chunk_method}'")
 
+    if args.backfill_multilingual:
+        try:
+            backfill_multilingual_embeddings()
+            sys.exit(0)
+        except Exception as e:
+            logger.exception(f"Multilingual backfill failed with error : {str(e)}")
+            sys.exit(1)
+
     try:
         # Run main with specified method
         inserted_count = main(chunk_method=args.chunk_method)
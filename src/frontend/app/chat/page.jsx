@@ -6,6 +6,9 @@ import ProtectedRoute from '../../components/auth/ProtectedRoute';
 import DataService from '../../services/DataService';
 import styles from '../../components/chat/chat.module.css';
 
+// Messages loaded when a chat is opened, and per "Load older messages" click
+const MESSAGE_PAGE_SIZE = 50;
+
 function ChatContent() {
   // States for chat functionality
   const [chatId, setChatId] = useState(null);
@@ -14,6 +17,7 @@ function ChatContent() {
   const [isTyping, setIsTyping] = useState(false);
   const [inputMessage, setInputMessage] = useState('');
   const [recentChats, setRecentChats] = useState([]);
+  const [chatsCursor, setChatsCursor] = useState(null);
   const [showSidebar, setShowSidebar] = useState(true);
   const [model, setModel] = useState('gemma3:12b');
   const messagesEndRef = useRef(null);
@@ -44,10 +48,11 @@ function ChatContent() {
     fetchRecentChats();
   }, []);
 
-  // Scroll to bottom whenever messages change
+  // Scroll to bottom whenever a message is added (not when older messages are loaded)
+  const lastMessageId = chat?.messages?.[chat.messages.length - 1]?.message_id;
   useEffect(() => {
     scrollToBottom();
-  }, [chat]);
+  }, [lastMessageId]);
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
@@ -56,17 +61,28 @@ function ChatContent() {
   // Fetch functions using DataService
   const fetchRecentChats = async () => {
     try {
-      const response = await DataService.GetChats();
-      setRecentChats(response.data);
+      const response = await DataService.ListChats();
+      setRecentChats(response.data.chats);
+      setChatsCursor(response.data.next_cursor);
     } catch (error) {
       console.error('Error fetching recent chats:', error);
     }
   };
 
+  const fetchMoreChats = async () => {
+    try {
+      const response = await DataService.ListChats(chatsCursor);
+      setRecentChats((chats) => [...chats, ...response.data.chats]);
+      setChatsCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching more chats:', error);
+    }
+  };
+
   const fetchChat = async (id) => {
     try {
       setChat(null);
-      const response = await DataService.GetChat(model, id);
+      const response = await DataService.GetChat(model, id, { limit: MESSAGE_PAGE_SIZE });
       setChat(response.data);
     } catch (error) {
       console.error('Error fetching chat:', error);
@@ -75,6 +91,22 @@ function ChatContent() {
     }
   };
 
+  const fetchOlderMessages = async () => {
+    try {
+      const response = await DataService.GetChat(model, chatId, {
+        limit: MESSAGE_PAGE_SIZE,
+        before: chat.messages[0].seq,
+      });
+      setChat((current) => ({
+        ...current,
+        has_older: response.data.has_older,
+        messages: [...response.data.messages, ...current.messages],
+      }));
+    } catch (error) {
+      console.error('Error fetching older messages:', error);
+    }
+  };
+
   const startNewChat = async (message) => {
     try {
       setIsTyping(true);
@@ -131,7 +163,13 @@ function ChatContent() {
       setChat(updatedChat);
 
       const response = await DataService.ContinueChatWithLLM(model, chatId, { content: message });
-      setChat(response.data);
+      // The response holds only the latest messages: replace the temporary user message
+      // with the saved user/assistant pair
+      setChat({
+        ...response.data,
+        has_older: updatedChat.has_older,
+        messages: [...updatedChat.messages.slice(0, -1), ...response.data.messages.slice(-2)],
+      });
       fetchRecentChats(); // Refresh the sidebar
     } catch (error) {
       console.error('Error continuing chat:', error);
@@ -259,6 +297,11 @@ function ChatContent() {
           ) : (
             <div className={styles.noChats}>No chats yet</div>
           )}
+          {chatsCursor && (
+            <button className={styles.loadMoreButton} onClick={fetchMoreChats}>
+              Load more
+            </button>
+          )}
         </div>
       </div>
 
@@ -276,6 +319,11 @@ function ChatContent() {
         <div className={styles.messagesContainer}>
           {hasActiveChat && chat?.messages ? (
             <div className={styles.messages}>
+              {chat.has_older && (
+                <button className={styles.loadMoreButton} onClick={fetchOlderMessages}>
+                  Load older messages
+                </button>
+              )}
               {chat.messages.map((message) => (
                 <div
                   key={message.message_id}
@@ -75,11 +75,32 @@ export const GetChats = async (limit = null) => {
   return { data };
 };
 
+// One page of chat summaries (chat_id, title, dts, message_count) and the next page's cursor
+export const ListChats = async (cursor = null, limit = null) => {
+  const params = new URLSearchParams({ summary: 'true' });
+  if (cursor) {
+    params.set('cursor', cursor);
+  }
+  if (limit) {
+    params.set('limit', limit);
+  }
+  const data = await fetchWithAuth(`/api/chats?${params.toString()}`);
+  return { data };
+};
+
 /**
  * Get a specific chat by ID
  */
-export const GetChat = async (model, chatId) => {
-  const data = await fetchWithAuth(`/api/chats/${chatId}`);
+export const GetChat = async (model, chatId, { limit = null, before = null } = {}) => {
+  const params = new URLSearchParams();
+  if (limit) {
+    params.set('limit', limit);
+  }
+  if (before !== null) {
+    params.set('before', before);
+  }
+  const query = params.toString();
+  const data = await fetchWithAuth(`/api/chats/${chatId}${query ? `?${query}` : ''}`);
   return { data };
 };
 
@@ -142,6 +163,7 @@ export const SubmitQuery = async (model, chatId, question, sessionId) => {
 // Alternative implementation of the same endpoints using the new format
 const DataService = {
   GetChats,
+  ListChats,
   GetChat,
   StartChatWithLLM,
   ContinueChatWithLLM,
@@ -12,6 +12,7 @@ echo "Pulling models..."
 ollama pull gemma3:12b || echo "Failed to pull gemma3:12b"
 ollama pull llama3:8b || echo "Failed to pull llama3:8b"
 ollama pull llama-guard3:8b || echo "Failed to pull llama-guard3:8b"
+ollama pull llama3.2:1b || echo "Failed to pull llama3.2:1b"
 
 echo "Stopping Ollama server using ollama kill..."
 kill -9 $PID
@@ -5,8 +5,10 @@ Tests the authentication middleware functions including:
 - Database session dependency
 - Token extraction from cookies and headers
 - Token verification logic
+- Admin verification
 """
 
+import asyncio
 import sys
 import os
 import unittest
@@ -213,6 +215,17 @@ class TestAuthMiddleware(unittest.TestCase):
         assert "Authentication error" in exc_info.value.detail
         assert "Database error" in exc_info.value.detail
 
+    def test_verify_admin(self):
+        """Test that only users listed in ADMIN_EMAILS pass the admin check"""
+        self.auth_middleware.ADMIN_EMAILS = {"admin@example.com"}
+
+        email = asyncio.run(self.auth_middleware.verify_admin("Admin@example.com"))
+        assert email == "Admin@example.com"
+
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(self.auth_middleware.verify_admin("student@example.com"))
+        assert exc_info.value.status_code == status.HTTP_403_FORBIDDEN
+
 
 if __name__ == "__main__":
     unittest.main()
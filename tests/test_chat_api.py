@@ -7,8 +7,10 @@ Tests the RAG chatbot API endpoints including:
 - Retrieving chat history
 - Deleting chats
 - Processing queries
+- Refusing chats of other users
 """
 
+import asyncio
 import sys
 import os
 import time
@@ -30,6 +32,7 @@ MOCK_RESPONSE = "RAG stands for Retrieval Augmented Generation."
 MOCK_CHAT = {
     "chat_id": MOCK_CHAT_ID,
     "title": MOCK_QUESTION,
+    "user_email": MOCK_USER_EMAIL,
     "dts": int(time.time()),
     "messages": [
         {"message_id": MOCK_MESSAGE_ID, "role": "user", "content": MOCK_QUESTION},
@@ -83,16 +86,24 @@ class TestChatAPI(unittest.TestCase):
             "utils.chat_history": MagicMock(),
             "utils.database": MagicMock(),
             "utils.llm_rag_utils": MagicMock(),
+            "utils.kv_store": MagicMock(),
             "rag_pipeline": MagicMock(),
             "rag_pipeline.config": MagicMock(),
             "rag_pipeline.embedding": MagicMock(),
             "rag_pipeline.ollama": MagicMock(),
+            "rag_pipeline.conversation_memory": MagicMock(),
+            "rag_pipeline.scheduler": MagicMock(),
+            "routers": MagicMock(),
+            "routers.auth_middleware": MagicMock(),
         }
 
         # Configure mock modules
         self.mock_modules["utils.chat_history"].ChatHistoryManager = MagicMock(
             return_value=self.mock_chat_manager
         )
+        self.mock_modules["utils.chat_history"].StaleChatError = type(
+            "StaleChatError", (Exception,), {}
+        )
         self.mock_modules["utils.database"].SessionLocal = self.mock_session_local
         self.mock_modules["utils.llm_rag_utils"].chat_sessions = {}
         self.mock_modules["utils.llm_rag_utils"].create_chat_session = MagicMock(return_value={})
@@ -132,15 +143,15 @@ class TestChatAPI(unittest.TestCase):
     def import_chat_api(self):
         """Import the chat_api module directly from file"""
         # Add src to the Python path
-        sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src")))
+        sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
 
         # Import the module directly using its file path
         import importlib.util
 
         spec = importlib.util.spec_from_file_location(
-            "chat_api",
+            "routers.chat_api",
             os.path.abspath(
-                os.path.join(os.path.dirname(__file__), "../../src/api/routers/chat_api.py")
+                os.path.join(os.path.dirname(__file__), "../src/api/routers/chat_api.py")
             ),
         )
         chat_api = importlib.util.module_from_spec(spec)
@@ -183,7 +194,9 @@ class TestChatAPI(unittest.TestCase):
         )
 
         # Verify the chat manager was called correctly
-        self.mock_chat_manager.get_chat.assert_called_once_with(MOCK_CHAT_ID)
+        self.mock_chat_manager.get_chat.assert_called_once_with(
+            MOCK_CHAT_ID, last_n=None, before_seq=None, after_seq=None
+        )
 
         # Verify the result is what we expect
         assert result == MOCK_CHAT
@@ -307,6 +320,44 @@ class TestChatAPI(unittest.TestCase):
         assert exc_info.value.status_code == 404
         assert "Chat not found" in exc_info.value.detail
 
+    def test_chat_of_another_user_refused(self):
+        """Another user's chat is refused when loaded, before the pipeline runs"""
+        chat_api = self.import_chat_api()
+        self.mock_chat_manager.get_chat.return_value = dict(MOCK_CHAT, user_email="other@x.com")
+        request = chat_api.QueryRequest(
+            chat_id=MOCK_CHAT_ID,
+            question=MOCK_QUESTION,
+            model_name="llama2",
+            session_id=MOCK_SESSION_ID,
+        )
+
+        for call in (
+            lambda: chat_api.continue_chat_with_llm(
+                chat_id=MOCK_CHAT_ID,
+                message={"content": "Follow-up question"},
+                x_session_id=MOCK_SESSION_ID,
+                user_email=MOCK_USER_EMAIL,
+            ),
+            lambda: chat_api.process_query(request, user_email=MOCK_USER_EMAIL),
+        ):
+            with pytest.raises(HTTPException) as exc_info:
+                asyncio.run(call())
+            assert exc_info.value.status_code == 403
+
+        self.mock_query_ollama.assert_not_called()
+        self.mock_chat_manager.save_chat.assert_not_called()
+
+    def test_save_turn_permission_error(self):
+        """A save refused for another user's chat is a 403, not a server error"""
+        chat_api = self.import_chat_api()
+        self.mock_chat_manager.save_chat.side_effect = PermissionError(
+            "Chat belongs to another user"
+        )
+
+        with pytest.raises(HTTPException) as exc_info:
+            chat_api.save_turn(dict(MOCK_CHAT), MOCK_USER_EMAIL, MOCK_SESSION_ID)
+        assert exc_info.value.status_code == 403
+
     async def test_delete_chat(self):
         """Test the delete_chat endpoint"""
         # Import the module
@@ -15,6 +15,7 @@ import sys
 from unittest.mock import MagicMock, patch
 from datetime import datetime
 
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 # Mock modules
@@ -38,15 +39,29 @@ MOCK_CHAT = {
         {"message_id": "msg2", "role": "assistant", "content": "Hi there!"},
     ],
 }
+MOCK_STORED_MESSAGES = [dict(message, seq=seq) for seq, message in enumerate(MOCK_CHAT["messages"])]
 MOCK_DB_ROW = (
     MOCK_CHAT_ID,
     MOCK_SESSION_ID,
     MOCK_MODEL,
     "Test Chat",
-    json.dumps(MOCK_CHAT["messages"]),
+    "[]",
     MOCK_TIMESTAMP,
     datetime.now(),
     datetime.now(),
+    json.dumps(MOCK_STORED_MESSAGES),
+    2,
+    3,
+    None,
+    None,
+    MOCK_USER_EMAIL,
+)
+# A chat saved before chat_message existed: messages only in the JSONB column
+MOCK_LEGACY_DB_ROW = (
+    MOCK_DB_ROW[:4]
+    + (json.dumps(MOCK_CHAT["messages"]),)
+    + MOCK_DB_ROW[5:8]
+    + ("[]", 0, 1, None, None, MOCK_USER_EMAIL)
 )
 
 
@@ -86,16 +101,18 @@ class TestChatHistoryManager(unittest.TestCase):
 
     def test_save_chat_new(self):
         """Test saving a new chat to the database"""
-        # Mock the count query result (0 means chat doesn't exist)
-        mock_count_result = MagicMock()
-        mock_count_result.scalar.return_value = 0
-        self.mock_db_session.execute.return_value = mock_count_result
+        # The statement returns the row version (1 for a newly inserted chat) and the first seq
+        mock_result = MagicMock()
+        mock_result.fetchone.return_value = (1, 0)
+        self.mock_db_session.execute.return_value = mock_result
+        chat = json.loads(json.dumps(MOCK_CHAT))
 
         # Call the method to test
-        self.chat_manager.save_chat(MOCK_CHAT, MOCK_USER_EMAIL, MOCK_SESSION_ID)
+        version = self.chat_manager.save_chat(chat, MOCK_USER_EMAIL, MOCK_SESSION_ID)
 
-        # Verify execute was called twice (once for check, once for insert)
-        self.assertEqual(self.mock_db_session.execute.call_count, 2)
+        # Verify a single statement was executed
+        self.assertEqual(self.mock_db_session.execute.call_count, 1)
+        self.assertEqual(version, 1)
 
         # Verify commit was called once
         self.mock_db_session.commit.assert_called_once()
@@ -103,34 +120,98 @@ class TestChatHistoryManager(unittest.TestCase):
         # Verify close was called once
         self.mock_db_session.close.assert_called_once()
 
-        # Instead of checking string content, check that parameters for the second call include
-        # chat_id, session_id, and user_email for an INSERT operation
-        second_call_args = self.mock_db_session.execute.call_args_list[1]
-        self.assertIn(MOCK_CHAT_ID, str(second_call_args))
-        self.assertIn(MOCK_SESSION_ID, str(second_call_args))
-        self.assertIn(MOCK_USER_EMAIL, str(second_call_args))
+        # Check the statement updates or inserts the header and appends to chat_message
+        sql, params = self.mock_db_session.execute.call_args[0]
+        self.assertIn("UPDATE chat_history", str(sql))
+        self.assertIn("INSERT INTO chat_history", str(sql))
+        self.assertIn("RETURNING version", str(sql))
+        self.assertIn("INSERT INTO chat_message", str(sql))
+        self.assertEqual(params["chat_id"], MOCK_CHAT_ID)
+        self.assertEqual(params["session_id"], MOCK_SESSION_ID)
+        self.assertEqual(params["user_email"], MOCK_USER_EMAIL)
+        self.assertEqual(json.loads(params["messages"]), MOCK_CHAT["messages"])
+
+        # The saved messages now carry their positions
+        self.assertEqual([m["seq"] for m in chat["messages"]], [0, 1])
+        self.assertEqual(chat["message_count"], 2)
 
     def test_save_chat_existing(self):
-        """Test updating an existing chat in the database"""
-        # Mock the count query result (1 means chat exists)
-        mock_count_result = MagicMock()
-        mock_count_result.scalar.return_value = 1
-        self.mock_db_session.execute.return_value = mock_count_result
+        """Test that continuing a chat appends only the new messages"""
+        mock_result = MagicMock()
+        mock_result.fetchone.return_value = (4, 40)
+        self.mock_db_session.execute.return_value = mock_result
+        chat = {
+            "chat_id": MOCK_CHAT_ID,
+            "title": "Test Chat",
+            "messages": [
+                {"seq": 38, "message_id": "m38", "role": "user", "content": "Earlier"},
+                {"seq": 39, "message_id": "m39", "role": "assistant", "content": "Answer"},
+                {"message_id": "m40", "role": "user", "content": "Next"},
+                {"message_id": "m41", "role": "assistant", "content": "Reply"},
+            ],
+        }
 
         # Call the method to test
-        self.chat_manager.save_chat(MOCK_CHAT, MOCK_USER_EMAIL, MOCK_SESSION_ID)
+        version = self.chat_manager.save_chat(chat, MOCK_USER_EMAIL, MOCK_SESSION_ID)
 
-        # Verify execute was called twice (once for check, once for update)
-        self.assertEqual(self.mock_db_session.execute.call_count, 2)
+        # Verify a single statement was executed and the new version returned
+        self.assertEqual(self.mock_db_session.execute.call_count, 1)
+        self.assertEqual(version, 4)
 
         # Verify commit was called once
         self.mock_db_session.commit.assert_called_once()
 
-        # Check that the second call includes chat_id for an UPDATE operation
-        second_call_args = self.mock_db_session.execute.call_args_list[1]
-        self.assertIn(MOCK_CHAT_ID, str(second_call_args))
-        # Also check the parameters include message data
-        self.assertIn("messages", str(second_call_args))
+        # Only the new pair is sent
+        _, params = self.mock_db_session.execute.call_args[0]
+        self.assertEqual([m["message_id"] for m in json.loads(params["messages"])], ["m40", "m41"])
+        self.assertEqual([m["seq"] for m in chat["messages"]], [38, 39, 40, 41])
+        self.assertEqual(chat["message_count"], 42)
+
+    def test_save_chat_other_user(self):
+        """Test that a chat owned by another user is not overwritten"""
+        # The conditional update matched no row, so no version is returned
+        mock_result = MagicMock()
+        mock_result.fetchone.return_value = (None, 0)
+        self.mock_db_session.execute.return_value = mock_result
+
+        with self.assertRaises(PermissionError):
+            self.chat_manager.save_chat(MOCK_CHAT, MOCK_USER_EMAIL, MOCK_SESSION_ID)
+
+        # Every row of the chat is checked, whatever session or model created it
+        sql, _ = self.mock_db_session.execute.call_args[0]
+        self.assertIn("WHERE chat_id = :chat_id AND user_email <> :user_email", str(sql))
+        self.assertNotIn("ON CONFLICT (chat_id, session_id, model)", str(sql))
+        self.mock_db_session.rollback.assert_called_once()
+        self.mock_db_session.commit.assert_not_called()
+
+    def test_save_chat_stale(self):
+        """Test that a chat loaded before other messages were appended is not saved"""
+        from api.utils.chat_history import StaleChatError
+
+        # Two more messages were stored since the chat was loaded
+        mock_result = MagicMock()
+        mock_result.fetchone.return_value = (None, 4)
+        self.mock_db_session.execute.return_value = mock_result
+        chat = {"chat_id": MOCK_CHAT_ID, "messages": list(MOCK_STORED_MESSAGES)}
+        chat["messages"].append({"message_id": "m", "role": "user", "content": "Next"})
+
+        with self.assertRaises(StaleChatError):
+            self.chat_manager.save_chat(chat, MOCK_USER_EMAIL, MOCK_SESSION_ID)
+
+        _, params = self.mock_db_session.execute.call_args[0]
+        self.assertEqual(params["expected_seq"], 2)
+        self.mock_db_session.rollback.assert_called_once()
+        self.mock_db_session.commit.assert_not_called()
+
+    def test_save_chat_concurrent_append(self):
+        """Test that losing a race on the same seq is reported as stale"""
+        from api.utils.chat_history import StaleChatError
+
+        error = IntegrityError("INSERT", {}, MagicMock(pgcode="23505"))
+        self.mock_db_session.execute.side_effect = error
+
+        with self.assertRaises(StaleChatError):
+            self.chat_manager.save_chat(MOCK_CHAT, MOCK_USER_EMAIL, MOCK_SESSION_ID)
 
     def test_save_chat_exception(self):
         """Test handling exceptions when saving a chat"""
@@ -167,7 +248,99 @@ class TestChatHistoryManager(unittest.TestCase):
         self.assertEqual(result["chat_id"], MOCK_CHAT_ID)
         self.assertEqual(result["model"], MOCK_MODEL)
         self.assertEqual(result["title"], "Test Chat")
-        self.assertEqual(len(result["messages"]), 2)
+        self.assertEqual(result["messages"], MOCK_STORED_MESSAGES)
+        self.assertEqual(result["message_count"], 2)
+        self.assertEqual(result["user_email"], MOCK_USER_EMAIL)
+
+    def test_get_chat_last_n(self):
+        """Test that the number of loaded messages is passed to the query"""
+        mock_result = MagicMock()
+        mock_result.fetchone.return_value = MOCK_DB_ROW
+        self.mock_db_session.execute.return_value = mock_result
+
+        self.chat_manager.get_chat(MOCK_CHAT_ID, last_n=12)
+
+        sql, params = self.mock_db_session.execute.call_args[0]
+        self.assertIn("LIMIT :last_n", str(sql))
+        self.assertEqual(params["last_n"], 12)
+
+    def test_get_chat_before_seq(self):
+        """Test loading the page of older messages before a message"""
+        mock_result = MagicMock()
+        mock_result.fetchone.return_value = MOCK_DB_ROW[:8] + (
+            json.dumps([{"seq": 3, "role": "user", "content": "a"}]),
+            10,
+            7,
+            None,
+            None,
+            MOCK_USER_EMAIL,
+        )
+        self.mock_db_session.execute.return_value = mock_result
+
+        result = self.chat_manager.get_chat(MOCK_CHAT_ID, last_n=1, before_seq=4)
+
+        sql, params = self.mock_db_session.execute.call_args[0]
+        self.assertIn("AND seq < :before_seq", str(sql))
+        self.assertIn("ORDER BY seq DESC", str(sql))
+        self.assertEqual(params["before_seq"], 4)
+        self.assertTrue(result["has_older"])
+        self.assertTrue(result["has_newer"])
+
+    def test_get_chat_after_seq(self):
+        """Test loading the page of newer messages after a message"""
+        mock_result = MagicMock()
+        mock_result.fetchone.return_value = MOCK_DB_ROW
+        self.mock_db_session.execute.return_value = mock_result
+
+        result = self.chat_manager.get_chat(MOCK_CHAT_ID, last_n=50, after_seq=-1)
+
+        sql, params = self.mock_db_session.execute.call_args[0]
+        self.assertIn("AND seq > :after_seq", str(sql))
+        self.assertIn("ORDER BY seq ASC", str(sql))
+        self.assertFalse(result["has_older"])
+        self.assertFalse(result["has_newer"])
+
+    def test_get_chat_before_and_after(self):
+        """Test that a window cannot be both before and after a message"""
+        with self.assertRaises(ValueError):
+            self.chat_manager.get_chat(MOCK_CHAT_ID, before_seq=4, after_seq=2)
+
+    def test_get_chat_legacy_messages(self):
+        """Test that a chat not migrated yet is read from the JSONB column"""
+        mock_result = MagicMock()
+        mock_result.fetchone.return_value = MOCK_LEGACY_DB_ROW
+        self.mock_db_session.execute.return_value = mock_result
+
+        result = self.chat_manager.get_chat(MOCK_CHAT_ID, last_n=1)
+
+        # All messages are returned without seq, so the next save moves them over
+        self.assertEqual(result["messages"], MOCK_CHAT["messages"])
+        self.assertEqual(result["message_count"], 2)
+
+    def test_get_chat_version(self):
+        """Test that the row version is returned with the chat"""
+        mock_result = MagicMock()
+        mock_result.fetchone.return_value = MOCK_DB_ROW
+        self.mock_db_session.execute.return_value = mock_result
+
+        self.assertEqual(self.chat_manager.get_chat(MOCK_CHAT_ID)["version"], 3)
+
+    def test_get_chat_conversation_summary(self):
+        """Test that the chat's rolling summary is loaded with it"""
+        mock_result = MagicMock()
+        mock_result.fetchone.return_value = MOCK_DB_ROW[:11] + (
+            "Asked about ML.",
+            5,
+            MOCK_USER_EMAIL,
+        )
+        self.mock_db_session.execute.return_value = mock_result
+
+        result = self.chat_manager.get_chat(MOCK_CHAT_ID)
+
+        self.assertIn("LEFT JOIN chat_summary", str(self.mock_db_session.execute.call_args[0][0]))
+        self.assertEqual(
+            result["conversation_summary"], {"text": "Asked about ML.", "through_seq": 5}
+        )
 
     def test_get_chat_not_found(self):
         """Test when a chat is not found in the database"""
@@ -294,6 +467,68 @@ class TestChatHistoryManager(unittest.TestCase):
         # Verify the result is an empty list
         self.assertEqual(results, [])
 
+    def test_cursor_round_trip(self):
+        """Test that cursors encode the keyset position and reject garbage"""
+        from api.utils.chat_history import decode_cursor, encode_cursor
+
+        cursor = encode_cursor(MOCK_TIMESTAMP, MOCK_CHAT_ID)
+        self.assertEqual(decode_cursor(cursor), (MOCK_TIMESTAMP, MOCK_CHAT_ID))
+        for bad in ("not a cursor", encode_cursor("x", MOCK_CHAT_ID), "W10"):
+            with self.assertRaises(ValueError):
+                decode_cursor(bad)
+
+    def test_list_chats_first_page(self):
+        """Test listing chat summaries: one extra row signals the next page"""
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = [
+            ("chat-3", "Third", 300, 4),
+            ("chat-2", "Second", 200, 2),
+            ("chat-1", "First", 100, 6),
+        ]
+        self.mock_db_session.execute.return_value = mock_result
+
+        page = self.chat_manager.list_chats(MOCK_USER_EMAIL, limit=2)
+
+        sql, params = self.mock_db_session.execute.call_args[0]
+        self.assertNotIn("messages,", str(sql))
+        self.assertIn("ORDER BY h.dts DESC, h.chat_id DESC", str(sql))
+        self.assertIn("newer.chat_id = h.chat_id", str(sql))
+        self.assertNotIn(":cursor_dts", str(sql))
+        self.assertEqual(params["limit"], 3)
+        self.assertEqual(
+            page["chats"],
+            [
+                {"chat_id": "chat-3", "title": "Third", "dts": 300, "message_count": 4},
+                {"chat_id": "chat-2", "title": "Second", "dts": 200, "message_count": 2},
+            ],
+        )
+        from api.utils.chat_history import decode_cursor
+
+        self.assertEqual(decode_cursor(page["next_cursor"]), (200, "chat-2"))
+        self.mock_db_session.close.assert_called_once()
+
+    def test_list_chats_next_page(self):
+        """Test that a cursor continues after its position and the last page has no cursor"""
+        from api.utils.chat_history import encode_cursor
+
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = [("chat-1", "First", 100, 6)]
+        self.mock_db_session.execute.return_value = mock_result
+
+        page = self.chat_manager.list_chats(MOCK_USER_EMAIL, 2, encode_cursor(200, "chat-2"))
+
+        sql, params = self.mock_db_session.execute.call_args[0]
+        self.assertIn("(h.dts, h.chat_id) < (:cursor_dts, :cursor_chat_id)", str(sql))
+        self.assertEqual((params["cursor_dts"], params["cursor_chat_id"]), (200, "chat-2"))
+        self.assertEqual(len(page["chats"]), 1)
+        self.assertIsNone(page["next_cursor"])
+
+    def test_list_chats_invalid_cursor(self):
+        """Test that a malformed cursor is rejected before querying"""
+        with self.assertRaises(ValueError):
+            self.chat_manager.list_chats(MOCK_USER_EMAIL, cursor="%%%")
+        self.mock_db_session.execute.assert_not_called()
+
     def test_delete_chat(self):
         """Test deleting a chat"""
         # Mock the execute result to indicate a successful deletion
@@ -304,8 +539,9 @@ class TestChatHistoryManager(unittest.TestCase):
         # Call the method to test
         result = self.chat_manager.delete_chat(MOCK_CHAT_ID)
 
-        # Verify execute was called once
+        # Verify execute was called once, deleting the messages as well
         self.mock_db_session.execute.assert_called_once()
+        self.assertIn("DELETE FROM chat_message", str(self.mock_db_session.execute.call_args[0][0]))
 
         # Verify commit was called once
         self.mock_db_session.commit.assert_called_once()
@@ -316,6 +552,57 @@ class TestChatHistoryManager(unittest.TestCase):
         # Check that the result is True
         self.assertTrue(result)
 
+    def test_export_chats(self):
+        """Test streaming chats from a server-side cursor with filters"""
+        row = (MOCK_CHAT_ID, MOCK_USER_EMAIL) + MOCK_DB_ROW[1:10]
+        self.mock_db_session.execute.return_value = iter([row, row])
+
+        chats = self.chat_manager.export_chats(
+            class_id="AC215", start_dts=1700000000, end_dts=1710000000, batch_size=50
+        )
+        # Nothing is read until the export is consumed
+        self.mock_db_session.execute.assert_not_called()
+        first = next(chats)
+
+        sql, params = self.mock_db_session.execute.call_args[0]
+        self.assertIn("FROM access WHERE class_id = :class_id", str(sql))
+        self.assertIn("h.dts >= :start_dts", str(sql))
+        # Filters apply to the latest header of each chat, not inside its selection
+        self.assertIn("newer.chat_id = h.chat_id", str(sql))
+        self.assertLess(str(sql).index("NOT EXISTS"), str(sql).index(":start_dts"))
+        self.assertNotIn("user_email = :user_email", str(sql))
+        self.assertEqual((params["start_dts"], params["end_dts"]), (1700000000, 1710000000))
+        self.assertEqual(
+            self.mock_db_session.execute.call_args[1]["execution_options"], {"yield_per": 50}
+        )
+        self.assertEqual(first["user_email"], MOCK_USER_EMAIL)
+        self.assertEqual(first["messages"], MOCK_STORED_MESSAGES)
+        self.assertEqual(first["message_count"], 2)
+
+        self.assertEqual(len(list(chats)), 1)
+        self.mock_db_session.close.assert_called_once()
+
+    def test_save_summary(self):
+        """Test storing a summary that covers more messages than the stored one"""
+        mock_result = MagicMock()
+        mock_result.rowcount = 1
+        self.mock_db_session.execute.return_value = mock_result
+
+        self.assertTrue(self.chat_manager.save_summary(MOCK_CHAT_ID, "Asked about ML.", 7))
+
+        sql, params = self.mock_db_session.execute.call_args[0]
+        self.assertIn("chat_summary.through_seq < EXCLUDED.through_seq", str(sql))
+        self.assertEqual(params["through_seq"], 7)
+        self.mock_db_session.commit.assert_called_once()
+
+    def test_save_summary_outdated(self):
+        """Test that an older summary does not replace a newer one"""
+        mock_result = MagicMock()
+        mock_result.rowcount = 0
+        self.mock_db_session.execute.return_value = mock_result
+
+        self.assertFalse(self.chat_manager.save_summary(MOCK_CHAT_ID, "Old.", 3))
+
     def test_delete_chat_not_found(self):
         """Test when a chat to delete is not found"""
         # Mock the execute result to indicate no rows were deleted
@@ -359,5 +646,98 @@ class TestChatHistoryManager(unittest.TestCase):
         self.assertFalse(result)
 
 
+class TestChatCache(unittest.TestCase):
+    """Write-through chat cache: consecutive turns skip the database read"""
+
+    def setUp(self):
+        from api.utils.chat_history import ChatHistoryManager
+        from api.utils.kv_store import MemoryKVStore
+
+        self.mock_db_session = MagicMock(spec=Session)
+        self.chat_manager = ChatHistoryManager(MOCK_MODEL, cache=MemoryKVStore(), cache_messages=3)
+        self.chat_manager.SessionLocal = MagicMock(return_value=self.mock_db_session)
+
+    def _save(self, chat, version, next_seq):
+        mock_result = MagicMock()
+        mock_result.fetchone.return_value = (version, next_seq)
+        self.mock_db_session.execute.return_value = mock_result
+        return self.chat_manager.save_chat(chat, MOCK_USER_EMAIL, MOCK_SESSION_ID)
+
+    def test_consecutive_turns_skip_read(self):
+        chat = json.loads(json.dumps(MOCK_CHAT))
+        self._save(chat, 1, 0)
+
+        # The next turn loads the chat from the cache
+        loaded = self.chat_manager.get_chat(MOCK_CHAT_ID, last_n=12)
+        self.assertEqual(self.mock_db_session.execute.call_count, 1)
+        self.assertEqual(loaded["messages"], MOCK_STORED_MESSAGES)
+        self.assertEqual((loaded["version"], loaded["message_count"]), (1, 2))
+        self.assertEqual(loaded["session_id"], MOCK_SESSION_ID)
+        self.assertEqual(loaded["user_email"], MOCK_USER_EMAIL)
+
+        loaded["messages"] += [
+            {"message_id": "m3", "role": "user", "content": "More"},
+            {"message_id": "m4", "role": "assistant", "content": "Sure"},
+        ]
+        self._save(loaded, 2, 2)
+
+        # Only the latest cache_messages are kept: a larger window falls back to the database
+        cached = self.chat_manager.get_chat(MOCK_CHAT_ID, last_n=3)
+        self.assertEqual([m["seq"] for m in cached["messages"]], [1, 2, 3])
+        self.assertTrue(cached["has_older"])
+        self.assertEqual(self.mock_db_session.execute.call_count, 2)
+
+        self.mock_db_session.execute.return_value.fetchone.return_value = MOCK_DB_ROW
+        self.chat_manager.get_chat(MOCK_CHAT_ID, last_n=10)
+        self.assertEqual(self.mock_db_session.execute.call_count, 3)
+
+    def test_stale_save_invalidates(self):
+        from api.utils.chat_history import StaleChatError
+
+        self._save(json.loads(json.dumps(MOCK_CHAT)), 1, 0)
+        chat = self.chat_manager.get_chat(MOCK_CHAT_ID, last_n=2)
+        chat["messages"].append({"message_id": "m3", "role": "user", "content": "More"})
+
+        # Another replica appended a pair in the meantime
+        with self.assertRaises(StaleChatError):
+            self._save(chat, None, 4)
+
+        self.assertIsNone(self.chat_manager.cache.get(f"chat:{MOCK_CHAT_ID}"))
+
+    def test_summary_updates_cached_chat(self):
+        self._save(json.loads(json.dumps(MOCK_CHAT)), 1, 0)
+        self.mock_db_session.execute.return_value.rowcount = 1
+
+        self.chat_manager.save_summary(MOCK_CHAT_ID, "Asked about ML.", 1)
+
+        cached = self.chat_manager.get_chat(MOCK_CHAT_ID, last_n=2)
+        self.assertEqual(cached["conversation_summary"]["through_seq"], 1)
+
+    def test_save_keeps_newer_cached_summary(self):
+        """A turn loaded before a background summary update does not undo it in the cache"""
+        chat = json.loads(json.dumps(MOCK_CHAT))
+        self._save(chat, 1, 0)
+        loaded = self.chat_manager.get_chat(MOCK_CHAT_ID, last_n=2)
+        loaded["conversation_summary"] = {"text": "Older.", "through_seq": 0}
+
+        self.mock_db_session.execute.return_value.rowcount = 1
+        self.chat_manager.save_summary(MOCK_CHAT_ID, "Asked about ML.", 1)
+        loaded["messages"].append({"message_id": "m3", "role": "user", "content": "More"})
+        self._save(loaded, 2, 2)
+
+        cached = self.chat_manager.get_chat(MOCK_CHAT_ID, last_n=2)
+        self.assertEqual(
+            cached["conversation_summary"], {"text": "Asked about ML.", "through_seq": 1}
+        )
+
+    def test_delete_invalidates(self):
+        self._save(json.loads(json.dumps(MOCK_CHAT)), 1, 0)
+        self.mock_db_session.execute.return_value.rowcount = 1
+
+        self.chat_manager.delete_chat(MOCK_CHAT_ID)
+
+        self.assertIsNone(self.chat_manager.cache.get(f"chat:{MOCK_CHAT_ID}"))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,163 @@
+"""
+Unit tests for the conversation_memory.py module.
+
+Tests the rolling conversation summaries including:
+- Splitting the history into summarized and raw messages within a token budget
+- Summary prompt contents
+- Background summary updates, one per chat at a time
+- Failed summaries leaving the stored one in place
+- Loading the messages between the summary and the loaded window
+"""
+
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from api.rag_pipeline.conversation_memory import (
+    ConversationMemory,
+    build_summary_prompt,
+    estimate_tokens,
+    select_history,
+    summary_for_prompt,
+)
+
+
+def _history(count, length=40):
+    return [
+        {
+            "seq": seq,
+            "role": "user" if seq % 2 == 0 else "assistant",
+            "content": f"message {seq} " + "x" * length,
+        }
+        for seq in range(count)
+    ]
+
+
+class TestSelectHistory(unittest.TestCase):
+    def test_short_history_sent_raw(self):
+        older, recent = select_history(_history(4), budget=1000, window=6)
+        self.assertEqual(older, [])
+        self.assertEqual(len(recent), 4)
+
+    def test_window_start_is_summarized(self):
+        history = _history(14)
+        older, recent = select_history(history, budget=1000, window=6)
+        self.assertEqual([m["seq"] for m in recent], list(range(6, 14)))
+        self.assertEqual(older + recent, history)
+
+    def test_token_budget(self):
+        """Long answers push messages out of the raw window; the latest is always kept"""
+        history = _history(10, length=396)  # About 100 tokens per message
+        older, recent = select_history(history, budget=250, window=6)
+        self.assertEqual([m["seq"] for m in recent], [8, 9])
+        self.assertLessEqual(sum(estimate_tokens(m["content"]) for m in recent), 250)
+
+        _, recent = select_history(history, budget=10, window=6)
+        self.assertEqual([m["seq"] for m in recent], [9])
+
+    def test_no_budget_sends_window(self):
+        """Chats without a summary keep their whole history window"""
+        history = _history(14, length=396)
+        older, recent = select_history(history, budget=None, window=6)
+        self.assertEqual([m["seq"] for m in recent], list(range(6, 14)))
+        self.assertEqual(older + recent, history)
+
+    def test_summary_for_prompt(self):
+        summary = {"text": "Asked about CNNs.", "through_seq": 5}
+        self.assertEqual(summary_for_prompt(summary, _history(6)), "Asked about CNNs.")
+        self.assertEqual(summary_for_prompt(summary, []), "")
+        self.assertEqual(summary_for_prompt(None, _history(6)), "")
+
+
+class TestSummaryPrompt(unittest.TestCase):
+    def test_prompt(self):
+        messages = [
+            {"seq": 0, "role": "user", "content": "What is dropout?"},
+            {"seq": 1, "role": "assistant", "content": "A regularizer.\n\nSOURCES:\n1. [Doc]"},
+        ]
+        prompt = build_summary_prompt("Earlier summary.", messages)
+
+        self.assertIn("SUMMARY SO FAR:\nEarlier summary.", prompt)
+        self.assertIn("User: What is dropout?\n\nAssistant: A regularizer.", prompt)
+        self.assertNotIn("SOURCES", prompt)
+        self.assertTrue(prompt.endswith("UPDATED SUMMARY:\n"))
+
+
+class TestConversationMemory(unittest.TestCase):
+    def setUp(self):
+        self.save_summary = MagicMock(return_value=True)
+        self.memory = ConversationMemory(self.save_summary, budget=1000, window=6)
+        self.chat = {"chat_id": "chat-1", "messages": _history(14), "conversation_summary": None}
+
+    def _run(self, response):
+        async def scenario():
+            with patch("api.rag_pipeline.conversation_memory.AsyncOllamaAPIClient") as client_class:
+                client_class.return_value.generate_text = AsyncMock(return_value=response)
+                first = self.memory.schedule_update(self.chat)
+                second = self.memory.schedule_update(self.chat)
+                self.assertIsNone(second)
+                result = await first
+                self.assertEqual(client_class.call_args[1]["priority"], "batch")
+                return result
+
+        return asyncio.run(scenario())
+
+    def test_pending_messages(self):
+        self.assertEqual(
+            [m["seq"] for m in self.memory.pending_messages(self.chat)], list(range(6))
+        )
+
+        self.chat["conversation_summary"] = {"text": "s", "through_seq": 5}
+        self.assertEqual(self.memory.pending_messages(self.chat), [])
+
+    def test_update_stores_summary(self):
+        summary = self._run(" The user asked about CNNs. ")
+
+        self.assertEqual(summary, {"text": "The user asked about CNNs.", "through_seq": 5})
+        self.save_summary.assert_called_once_with("chat-1", "The user asked about CNNs.", 5)
+        self.assertEqual(self.memory.stats()["updates"], 1)
+        self.assertEqual(self.memory.stats()["skipped"], 1)
+        self.assertEqual(self.memory.stats()["running"], 0)
+
+    def test_failed_summary_not_stored(self):
+        self.assertIsNone(self._run("Error: Request timed out"))
+        self.save_summary.assert_not_called()
+        self.assertEqual(self.memory.stats()["failures"], 1)
+
+    def test_gap_loaded_before_summarizing(self):
+        """Messages between the summary and the loaded window are read, not skipped"""
+        self.chat["messages"] = _history(30)[16:]  # Only the latest messages were loaded
+        self.chat["conversation_summary"] = {"text": "Earlier.", "through_seq": 5}
+        self.memory.load_chat = MagicMock(return_value={"messages": _history(30)[6:16]})
+
+        summary = self._run("Updated.")
+
+        self.memory.load_chat.assert_called_once_with("chat-1", last_n=10, after_seq=5)
+        self.assertEqual(summary, {"text": "Updated.", "through_seq": 23})
+        self.save_summary.assert_called_once_with("chat-1", "Updated.", 23)
+        self.assertEqual(self.memory.stats()["gaps_filled"], 1)
+
+    def test_unfilled_gap_not_summarized(self):
+        """Without the missing messages the summary is left as it is"""
+        self.chat["messages"] = _history(30)[16:]
+        self.chat["conversation_summary"] = {"text": "Earlier.", "through_seq": 5}
+        self.memory.load_chat = MagicMock(return_value={"messages": _history(30)[8:16]})
+
+        with patch("api.rag_pipeline.conversation_memory.AsyncOllamaAPIClient") as client_class:
+            chat = self.chat
+            summary = asyncio.run(
+                self.memory.update("chat-1", chat["conversation_summary"], chat["messages"][:8])
+            )
+            self.assertIsNone(summary)
+
+        client_class.assert_not_called()
+        self.save_summary.assert_not_called()
+        self.assertEqual(self.memory.stats()["failures"], 1)
+
+    def test_nothing_to_summarize(self):
+        self.chat["messages"] = _history(4)
+        self.assertIsNone(self.memory.schedule_update(self.chat))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,6 +13,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../.
 # Import from the correct module path
 from src.datapipeline.datapipeline import (
     BUCKET_NAME,
+    backfill_multilingual_embeddings,
     chunk_documents_from_gcs,
     clean_chunks,
     clean_document_text,
@@ -25,6 +26,7 @@ from src.datapipeline.datapipeline import (
     get_metadata,
     list_document_folders,
     load_pdf_from_gcs,
+    quantize_embedding,
     recursive_chunking,
     semantic_chunking,
     validate_data,
@@ -497,6 +499,11 @@ class TestDataPipeline(unittest.TestCase):
         with self.assertRaises(RuntimeError):
             create_chunk_embeddings(chunk_texts, mock_model)
 
+    def test_quantize_embedding(self):
+        halfvec_str, binary_str = quantize_embedding(np.array([0.25, -0.5, 0.0]))
+        self.assertEqual(halfvec_str, "[0.25,-0.5,0.0]")
+        self.assertEqual(binary_str, "[1,0,0]")
+
     def test_create_and_insert_chunks(self):
         # Use fresh patches to ensure they're applied correctly
         with patch("src.datapipeline.datapipeline.connect_to_postgres") as mock_connect, patch(
@@ -550,6 +557,58 @@ class TestDataPipeline(unittest.TestCase):
             # Verify correct count was returned
             self.assertEqual(inserted_count, 2)
 
+    def test_create_and_insert_chunks_multilingual(self):
+        """The multilingual embedding is stored alongside the default one when enabled"""
+        with patch("src.datapipeline.datapipeline.connect_to_postgres"), patch(
+            "src.datapipeline.datapipeline.sessionmaker"
+        ) as mock_sessionmaker, patch(
+            "src.datapipeline.datapipeline.get_ch_embedding_model"
+        ) as mock_get_model, patch(
+            "src.datapipeline.datapipeline.create_chunk_embeddings"
+        ) as mock_create_embeddings, patch(
+            "src.datapipeline.datapipeline.text", lambda sql: sql
+        ), patch(
+            "src.datapipeline.datapipeline.STORE_MULTILINGUAL_EMBEDDINGS", True
+        ):
+            mock_session = mock_sessionmaker.return_value.return_value
+            mock_create_embeddings.side_effect = [np.array([[0.1, 0.2]]), np.array([[0.3, 0.4]])]
+
+            chunks = [Document(page_content="Chunk 1", metadata={"source": "doc1", "page": 1})]
+            self.assertEqual(create_and_insert_chunks(chunks), 1)
+
+            mock_get_model.assert_called_with("paraphrase-multilingual-mpnet-base-v2")
+            sql = mock_session.execute.call_args[0][0]
+            self.assertIn("embedding_multilingual", sql)
+            self.assertIn("'[0.3, 0.4]'::vector", sql)
+
+    def test_backfill_multilingual_embeddings(self):
+        """Chunks without a multilingual embedding are updated batch by batch"""
+        with patch("src.datapipeline.datapipeline.connect_to_postgres"), patch(
+            "src.datapipeline.datapipeline.sessionmaker"
+        ) as mock_sessionmaker, patch(
+            "src.datapipeline.datapipeline.get_ch_embedding_model"
+        ), patch(
+            "src.datapipeline.datapipeline.create_chunk_embeddings"
+        ) as mock_create_embeddings, patch(
+            "src.datapipeline.datapipeline.text", lambda sql: sql
+        ):
+            mock_session = mock_sessionmaker.return_value.return_value
+            mock_session.execute.return_value.fetchall.side_effect = [
+                [("(0,1)", "Chunk 1"), ("(0,2)", "Chunk 2")],
+                [],
+            ]
+            mock_create_embeddings.return_value = np.array([[0.1, 0.2], [0.3, 0.4]])
+
+            self.assertEqual(backfill_multilingual_embeddings(batch_size=2), 2)
+
+            mock_create_embeddings.assert_called_once()
+            self.assertEqual(mock_create_embeddings.call_args[0][0], ["Chunk 1", "Chunk 2"])
+            sql, params = mock_session.execute.call_args_list[1][0]
+            self.assertIn("UPDATE chunk SET embedding_multilingual", sql)
+            self.assertEqual(params[1], {"ctid": "(0,2)", "embedding": "[0.3, 0.4]"})
+            mock_session.commit.assert_called_once()
+            mock_session.close.assert_called_once()
+
     def test_main(self):
         """Fixed test_main method that works with pandas to_sql"""
         # Use fresh patches to ensure they're applied correctly
@@ -5,6 +5,7 @@ Tests the PostgreSQL connection and audit logging functionality.
 """
 
 import unittest
+import json
 import os
 from unittest.mock import MagicMock, patch
 import numpy as np
@@ -162,6 +163,17 @@ class TestDatabase(unittest.TestCase):
         # Verify logger.info was called
         mock_logger.info.assert_called_once()
 
+    @patch("api.utils.database.text")
+    def test_log_audit_without_embedding(self, mock_text):
+        """Test that a missing query embedding is stored as NULL"""
+        mock_text.return_value = self.mock_text
+
+        log_audit(self.mock_session, "test@example.com", "consulta", None, [], "response", "es")
+
+        sql_arg = mock_text.call_args[0][0]
+        self.assertIn(":query, NULL, :document_ids", sql_arg)
+        self.mock_session.commit.assert_called_once()
+
     @patch("api.utils.database.text")
     def test_log_audit_with_default_language(self, mock_text):
         """Test the audit logging function with default language"""
@@ -188,6 +200,43 @@ class TestDatabase(unittest.TestCase):
         # Check the language_code is set to default "en"
         self.assertEqual(self.execute_params.get("language_code"), "en")
 
+    @patch("api.utils.database.text")
+    def test_log_audit_with_token_usage(self, mock_text):
+        """Test the audit logging function with the request's token usage"""
+        mock_text.side_effect = lambda sql: sql
+
+        def side_effect(sql, params=None):
+            self.execute_sql = sql
+            self.execute_params = params
+            return MagicMock()
+
+        self.mock_session.execute.side_effect = side_effect
+        token_usage = {
+            "calls": 2,
+            "prompt_tokens": 900,
+            "output_tokens": 120,
+            "eval_seconds": 3.0,
+            "total_seconds": 4.5,
+            "stages": {"answer": {"calls": 1, "prompt_tokens": 800, "output_tokens": 118}},
+        }
+
+        log_audit(
+            self.mock_session,
+            "test@example.com",
+            "test query",
+            np.array([0.1, 0.2, 0.3]),
+            [],
+            "test response",
+            token_usage=token_usage,
+        )
+
+        self.assertIn("CAST(:token_usage AS JSONB)", self.execute_sql)
+        self.assertEqual(self.execute_params["llm_calls"], 2)
+        self.assertEqual(self.execute_params["prompt_tokens"], 900)
+        self.assertEqual(self.execute_params["output_tokens"], 120)
+        self.assertEqual(self.execute_params["llm_seconds"], 4.5)
+        self.assertEqual(json.loads(self.execute_params["token_usage"]), token_usage)
+
     @patch("api.utils.database.text")
     def test_log_audit_with_empty_chunks(self, mock_text):
         """Test the audit logging function with empty chunks"""
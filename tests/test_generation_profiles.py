@@ -0,0 +1,93 @@
+"""
+Unit tests for the generation_profiles.py module.
+
+Tests the per-stage generation profiles including:
+- Mapping of profiles and overrides onto Ollama options
+- Output-limit validation and statistics
+- Profiles sent as `options` by the Ollama client
+"""
+
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from api.rag_pipeline import generation_profiles
+from api.rag_pipeline.generation_profiles import (
+    check_limits,
+    generation_profile_stats,
+    profile_options,
+)
+from api.rag_pipeline.ollama_api import AsyncOllamaAPIClient
+from api.rag_pipeline.ollama_pool import OllamaPool
+
+
+@patch("api.rag_pipeline.generation_profiles.logger", MagicMock())
+class TestGenerationProfiles(unittest.TestCase):
+    def setUp(self):
+        generation_profiles._stats.clear()
+
+    def test_profile_options(self):
+        options = profile_options("rerank")
+        self.assertIn("num_predict", options)
+        self.assertIn("num_ctx", options)
+        self.assertIn("stop", options)
+        self.assertNotIn("max_tokens", options)
+
+    def test_overrides(self):
+        options = profile_options("answer", max_tokens=64, temperature=None, top_p=0.5)
+        self.assertEqual(options["num_predict"], 64)
+        self.assertEqual(options["top_p"], 0.5)
+        self.assertEqual(options["temperature"], profile_options("answer")["temperature"])
+
+    def test_overrides_do_not_leak(self):
+        profile_options("safety", stop=["END"])["stop"].append("mutated")
+        self.assertNotIn("END", profile_options("safety")["stop"])
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            profile_options("summarize")
+
+    def test_check_limits(self):
+        options = {"num_predict": 8}
+        self.assertTrue(check_limits("rerank", options, {"eval_count": 2, "done_reason": "stop"}))
+        self.assertTrue(check_limits("rerank", options, {"eval_count": 8, "done_reason": "length"}))
+        self.assertFalse(check_limits("rerank", options, {"eval_count": 50}))
+
+        stats = generation_profile_stats()["rerank"]
+        self.assertEqual(stats["requests"], 3)
+        self.assertEqual(stats["truncated"], 1)
+        self.assertEqual(stats["violations"], 1)
+        self.assertEqual(stats["max_output_tokens"], 50)
+
+
+class TestClientOptions(unittest.TestCase):
+    def test_generate_sends_options(self):
+        response = MagicMock(status=200)
+        response.json = AsyncMock(return_value={"response": "7", "eval_count": 1})
+        request = MagicMock()
+        request.__aenter__ = AsyncMock(return_value=response)
+        request.__aexit__ = AsyncMock(return_value=False)
+        session = MagicMock()
+        session.post.return_value = request
+        session.__aenter__ = AsyncMock(return_value=session)
+        session.__aexit__ = AsyncMock(return_value=False)
+
+        with patch(
+            "api.rag_pipeline.ollama_api.get_ollama_pool", return_value=OllamaPool(["gpu1"])
+        ), patch("api.rag_pipeline.ollama_api.get_residency_manager"), patch(
+            "api.rag_pipeline.ollama_api.logger", MagicMock()
+        ), patch(
+            "api.rag_pipeline.ollama_api.aiohttp.ClientSession", return_value=session
+        ):
+            client = AsyncOllamaAPIClient("llama3:8b", timeout=30, stage="rerank")
+            result = asyncio.run(client.generate_text("Rate this text"))
+
+        self.assertEqual(result, "7")
+        payload = session.post.call_args.kwargs["json"]
+        self.assertEqual(payload["options"], profile_options("rerank"))
+        self.assertNotIn("max_tokens", payload)
+        self.assertNotIn("temperature", payload)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+"""
+Unit tests for the kv_store.py module.
+
+Tests the shared key-value store including:
+- Compact binary value encoding
+- In-memory store TTLs and LRU eviction
+- Redis-protocol store against a local stand-in server
+- Server failures degrading to misses
+"""
+
+import io
+import socketserver
+import threading
+import unittest
+from unittest.mock import patch
+
+from api.utils.kv_store import MemoryKVStore, RedisKVStore, dumps, loads
+
+
+class _RESPHandler(socketserver.StreamRequestHandler):
+    """Minimal Redis-protocol server: GET/MGET/SET (PX)/DEL/PING/SELECT on a dict."""
+
+    def handle(self):
+        data = self.server.data
+        while True:
+            try:
+                command = RedisKVStore.read_reply(self.rfile)
+            except ConnectionError:
+                return
+            name, args = command[0].upper(), command[1:]
+            if name == b"PING":
+                reply = b"+PONG\r\n"
+            elif name == b"SELECT":
+                reply = b"+OK\r\n"
+            elif name == b"SET":
+                data[args[0]] = args[1]
+                self.server.ttls[args[0]] = int(args[3]) if len(args) > 3 else None
+                reply = b"+OK\r\n"
+            elif name == b"MGET":
+                reply = f"*{len(args)}\r\n".encode()
+                for key in args:
+                    value = data.get(key)
+                    if value is None:
+                        reply += b"$-1\r\n"
+                    else:
+                        reply += f"${len(value)}\r\n".encode() + value + b"\r\n"
+            elif name == b"DEL":
+                reply = f":{sum(data.pop(key, None) is not None for key in args)}\r\n".encode()
+            else:
+                reply = b"-ERR unknown command\r\n"
+            self.wfile.write(reply)
+
+
+class TestEncoding(unittest.TestCase):
+    def test_round_trip(self):
+        value = {"messages": [{"role": "user", "content": "¿Qué es un bosque aleatorio?"}]}
+        self.assertEqual(loads(dumps(value)), value)
+
+    def test_large_values_compressed(self):
+        value = {"content": "gradient descent " * 200}
+        encoded = dumps(value)
+        self.assertEqual(encoded[:1], b"\x02")
+        self.assertLess(len(encoded), len(value["content"]) // 4)
+        self.assertEqual(loads(encoded), value)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            loads(b"\x09{}")
+
+
+class TestMemoryKVStore(unittest.TestCase):
+    def test_ttl_expiry(self):
+        store = MemoryKVStore()
+        with patch("api.utils.kv_store.time.time", return_value=1000.0):
+            store.set("a", {"x": 1}, ttl=10)
+            store.set("b", [1, 2])
+        with patch("api.utils.kv_store.time.time", return_value=1011.0):
+            self.assertIsNone(store.get("a"))
+            self.assertEqual(store.get("b"), [1, 2])
+
+    def test_lru_eviction_and_delete(self):
+        store = MemoryKVStore(max_entries=2)
+        store.set("a", 1)
+        store.set("b", 2)
+        store.get("a")
+        store.set("c", 3)
+
+        self.assertEqual(store.get_many(["a", "b", "c"]), {"a": 1, "c": 3})
+        self.assertTrue(store.delete("a"))
+        self.assertFalse(store.delete("a"))
+
+
+class TestRedisKVStore(unittest.TestCase):
+    def setUp(self):
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _RESPHandler)
+        self.server.daemon_threads = True
+        self.server.data = {}
+        self.server.ttls = {}
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        port = self.server.server_address[1]
+        self.store = RedisKVStore(f"redis://127.0.0.1:{port}/2", prefix="test:", timeout=2)
+
+    def tearDown(self):
+        self.store._close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_encode_command(self):
+        self.assertEqual(RedisKVStore.encode_command("GET", "k"), b"*2\r\n$3\r\nGET\r\n$1\r\nk\r\n")
+
+    def test_read_reply(self):
+        reader = io.BytesIO(b"*3\r\n$3\r\nabc\r\n$-1\r\n:2\r\n")
+        self.assertEqual(RedisKVStore.read_reply(reader), [b"abc", None, 2])
+
+    def test_set_get_delete(self):
+        self.assertTrue(self.store.ping())
+        self.assertTrue(self.store.set("session", {"messages": []}, ttl=1.5))
+
+        self.assertEqual(self.server.ttls[b"test:session"], 1500)
+        self.assertEqual(self.store.get("session"), {"messages": []})
+        self.assertEqual(self.store.get_many(["session", "missing"]), {"session": {"messages": []}})
+        self.assertTrue(self.store.delete("session"))
+        self.assertIsNone(self.store.get("session"))
+
+    def test_reconnects_after_dropped_connection(self):
+        self.store.set("a", 1)
+        self.store._sock.close()  # Simulate the server dropping the connection
+        self.assertEqual(self.store.get("a"), 1)
+
+    def test_unreachable_server_is_a_miss(self):
+        self.tearDown()
+        self.assertIsNone(self.store.get("a"))
+        self.assertFalse(self.store.set("a", 1))
+        self.assertEqual(self.store.stats()["errors"], 2)
+        self.setUp()
+
+
+if __name__ == "__main__":
+    unittest.main()
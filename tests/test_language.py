@@ -13,26 +13,17 @@ import sys
 
 
 class TestLanguageDetector(unittest.TestCase):
-    def setUp(self):
-        self.mock_translator = MagicMock()
-        self.mock_translator.translate.return_value = "Translated text"
-
     @patch("api.rag_pipeline.language.logger", MagicMock())
-    @patch("api.rag_pipeline.language.GoogleTranslator")
-    def test_language_detector_init(self, mock_google_translator):
-        mock_google_translator.return_value = self.mock_translator
+    def test_language_detector_init(self):
         from api.rag_pipeline.language import LanguageDetector
 
         detector = LanguageDetector(default_language="fr", min_confidence=0.75)
         self.assertEqual(detector.default_language, "fr")
         self.assertEqual(detector.min_confidence, 0.75)
-        mock_google_translator.assert_called_once_with(source="auto", target="en")
 
     @patch("api.rag_pipeline.language.logger", MagicMock())
     @patch("api.rag_pipeline.language.fasttext_detect")
-    @patch("api.rag_pipeline.language.GoogleTranslator")
-    def test_detect_language_empty_text(self, mock_google_translator, mock_fasttext_detect):
-        mock_google_translator.return_value = self.mock_translator
+    def test_detect_language_empty_text(self, mock_fasttext_detect):
         from api.rag_pipeline.language import LanguageDetector
 
         detector = LanguageDetector()
@@ -42,9 +33,7 @@ class TestLanguageDetector(unittest.TestCase):
 
     @patch("api.rag_pipeline.language.logger", MagicMock())
     @patch("api.rag_pipeline.language.fasttext_detect")
-    @patch("api.rag_pipeline.language.GoogleTranslator")
-    def test_detect_language_common_phrase(self, mock_google_translator, mock_fasttext_detect):
-        mock_google_translator.return_value = self.mock_translator
+    def test_detect_language_common_phrase(self, mock_fasttext_detect):
         from api.rag_pipeline.language import LanguageDetector
 
         detector = LanguageDetector()
@@ -54,9 +43,7 @@ class TestLanguageDetector(unittest.TestCase):
 
     @patch("api.rag_pipeline.language.logger", MagicMock())
     @patch("api.rag_pipeline.language.fasttext_detect")
-    @patch("api.rag_pipeline.language.GoogleTranslator")
-    def test_detect_language_pattern_match(self, mock_google_translator, mock_fasttext_detect):
-        mock_google_translator.return_value = self.mock_translator
+    def test_detect_language_pattern_match(self, mock_fasttext_detect):
         from api.rag_pipeline.language import LanguageDetector
 
         detector = LanguageDetector()
@@ -67,9 +54,7 @@ class TestLanguageDetector(unittest.TestCase):
 
     @patch("api.rag_pipeline.language.logger", MagicMock())
     @patch("api.rag_pipeline.language.fasttext_detect")
-    @patch("api.rag_pipeline.language.GoogleTranslator")
-    def test_detect_language_fasttext(self, mock_google_translator, mock_fasttext_detect):
-        mock_google_translator.return_value = self.mock_translator
+    def test_detect_language_fasttext(self, mock_fasttext_detect):
         mock_fasttext_detect.return_value = {"lang": "fr", "score": 0.95}
         from api.rag_pipeline.language import LanguageDetector
 
@@ -80,9 +65,7 @@ class TestLanguageDetector(unittest.TestCase):
 
     @patch("api.rag_pipeline.language.logger", MagicMock())
     @patch("api.rag_pipeline.language.fasttext_detect")
-    @patch("api.rag_pipeline.language.GoogleTranslator")
-    def test_detect_language_low_confidence(self, mock_google_translator, mock_fasttext_detect):
-        mock_google_translator.return_value = self.mock_translator
+    def test_detect_language_low_confidence(self, mock_fasttext_detect):
         mock_fasttext_detect.return_value = {"lang": "fr", "score": 0.3}
         from api.rag_pipeline.language import LanguageDetector
 
@@ -93,9 +76,7 @@ class TestLanguageDetector(unittest.TestCase):
 
     @patch("api.rag_pipeline.language.logger", MagicMock())
     @patch("api.rag_pipeline.language.fasttext_detect")
-    @patch("api.rag_pipeline.language.GoogleTranslator")
-    def test_detect_language_fasttext_exception(self, mock_google_translator, mock_fasttext_detect):
-        mock_google_translator.return_value = self.mock_translator
+    def test_detect_language_fasttext_exception(self, mock_fasttext_detect):
         mock_fasttext_detect.side_effect = Exception("FastText error")
         from api.rag_pipeline.language import LanguageDetector
 
@@ -107,9 +88,7 @@ class TestLanguageDetector(unittest.TestCase):
 
     @patch("api.rag_pipeline.language.logger", MagicMock())
     @patch("api.rag_pipeline.language.fasttext_detect")
-    @patch("api.rag_pipeline.language.GoogleTranslator")
-    def test_detect_with_details(self, mock_google_translator, mock_fasttext_detect):
-        mock_google_translator.return_value = self.mock_translator
+    def test_detect_with_details(self, mock_fasttext_detect):
         mock_fasttext_detect.return_value = {"lang": "de", "score": 0.88}
         from api.rag_pipeline.language import LanguageDetector
 
@@ -126,24 +105,196 @@ class TestLanguageDetector(unittest.TestCase):
         self.assertEqual(empty_result["method"], "default")
 
     @patch("api.rag_pipeline.language.logger", MagicMock())
-    @patch("api.rag_pipeline.language.GoogleTranslator")
-    def test_translate_text(self, mock_google_translator):
-        mock_translator_instance = MagicMock()
-        mock_translator_instance.translate.return_value = "Hello world"
-        mock_google_translator.return_value = mock_translator_instance
-        from api.rag_pipeline.language import LanguageDetector
+    def test_translate_text(self):
+        import api.rag_pipeline.language as language_module
+        from api.rag_pipeline.translation_cache import TranslationCache
 
-        detector = LanguageDetector()
+        backend = MagicMock()
+        backend.translate_batch.return_value = ["Hello world"]
+        detector = language_module.LanguageDetector()
         detector.detect_language = MagicMock(return_value="fr")
 
-        result = detector.translate_text("Bonjour le monde")
+        # The detector translates through the shared backend and cache
+        with patch.object(
+            language_module, "get_translation_backend", return_value=backend
+        ), patch.object(language_module, "get_translation_cache", return_value=TranslationCache()):
+            result = detector.translate_text("Bonjour le monde")
         self.assertEqual(result, "Hello world")
-        mock_google_translator.assert_called_with(source="fr", target="en")
+        backend.translate_batch.assert_called_once_with(["Bonjour le monde"], "fr", "en")
 
         detector.detect_language.return_value = "en"
         same_lang_result = detector.translate_text("Hello world", target_lang="en")
         self.assertEqual(same_lang_result, "Hello world")
 
+    @patch("api.rag_pipeline.language.logger", MagicMock())
+    def test_compiled_matchers(self):
+        from api.rag_pipeline.language import LanguageDetector
+
+        detector = LanguageDetector()
+        self.assertEqual(detector._match_common_phrase("tell me assumptions"), "tell me")
+        self.assertEqual(detector._match_common_phrase("whose"), "whose")
+        self.assertIsNone(detector._match_common_phrase("tellme"))
+        self.assertIsNone(detector._match_common_phrase("what is?"))
+
+        self.assertEqual(detector._check_patterns("bonjour"), "fr")
+        self.assertEqual(detector._check_patterns("wie geht's"), "de")
+        self.assertIsNone(detector._check_patterns("xyz"))
+
+        details = detector.detect_with_details("dime algo")
+        self.assertEqual(details["lang"], "es")
+        self.assertEqual(details["method"], "pattern:^(dime|muéstrame|búscame|encuentre)(\\s|$)")
+
+    @patch("api.rag_pipeline.language.logger", MagicMock())
+    @patch("api.rag_pipeline.language.fasttext_detect")
+    def test_detect_languages(self, mock_fasttext_detect):
+        mock_fasttext_detect.return_value = {"lang": "fr", "score": 0.95}
+        from api.rag_pipeline.language import LanguageDetector
+
+        detector = LanguageDetector()
+        long_text = "Bonjour tout le monde, comment allez-vous aujourd'hui?"
+        result = detector.detect_languages(["tell me", long_text, "", long_text, "hola"])
+
+        self.assertEqual(result, ["en", "fr", "en", "fr", "es"])
+        # Repeated texts are only detected once
+        mock_fasttext_detect.assert_called_once()
+
+    @patch("api.rag_pipeline.language.logger", MagicMock())
+    def test_translate_text_uses_cache(self):
+        import api.rag_pipeline.language as language_module
+        from api.rag_pipeline.translation_cache import TranslationCache
+
+        backend = MagicMock()
+        backend.translate_batch.return_value = ["Good morning"]
+        with patch.object(
+            language_module, "get_translation_backend", return_value=backend
+        ), patch.object(language_module, "get_translation_cache", return_value=TranslationCache()):
+            first = language_module.translate_text("Buenos días", "en", "es")
+            second = language_module.translate_text("Buenos días", "en", "es")
+
+        self.assertEqual(first, "Good morning")
+        self.assertEqual(second, "Good morning")
+        backend.translate_batch.assert_called_once_with(["Buenos días"], "es", "en")
+
+    @patch("api.rag_pipeline.language.logger", MagicMock())
+    def test_translate_batch(self):
+        import api.rag_pipeline.language as language_module
+        from api.rag_pipeline.translation_backend import StandInTranslationBackend
+        from api.rag_pipeline.translation_cache import TranslationCache
+
+        backend = StandInTranslationBackend()
+        cache = TranslationCache()
+        cache.set("es", "en", "Adiós", "Goodbye")
+        with patch.object(
+            language_module, "get_translation_backend", return_value=backend
+        ), patch.object(language_module, "get_translation_cache", return_value=cache):
+            result = language_module.translate_batch(
+                ["Hola", "Adiós", "", "Gracias", "Hola"], target_lang="en", source_lang="es"
+            )
+
+        self.assertEqual(result, ["[en] Hola", "Goodbye", "", "[en] Gracias", "[en] Hola"])
+        # Only the distinct misses are sent, in a single backend call
+        self.assertEqual(backend.calls, 1)
+
+    @patch("api.rag_pipeline.language.logger", MagicMock())
+    def test_translate_text_async_timeout_keeps_original(self):
+        import asyncio
+
+        import api.rag_pipeline.language as language_module
+        from api.rag_pipeline.translation_backend import StandInTranslationBackend
+        from api.rag_pipeline.translation_cache import TranslationCache
+
+        with patch.object(
+            language_module,
+            "get_translation_backend",
+            return_value=StandInTranslationBackend(delay=1.0),
+        ), patch.object(language_module, "get_translation_cache", return_value=TranslationCache()):
+            slow = asyncio.run(
+                language_module.translate_text_async("Hallo", "en", "de", timeout=0.01)
+            )
+            fast = asyncio.run(language_module.translate_text_async("Hallo", "en", "de"))
+
+        self.assertEqual(slow, "Hallo")
+        self.assertEqual(fast, "[en] Hallo")
+
+    def test_split_into_segments(self):
+        from api.rag_pipeline.language import split_into_segments
+
+        text = "First paragraph.\n\nOne sentence here. Another sentence here. A third one."
+        segments = split_into_segments(text, max_chars=40)
+
+        self.assertEqual("".join(segments), text)
+        self.assertEqual(segments[:2], ["First paragraph.", "\n\n"])
+        self.assertTrue(all(len(s) <= 40 for s in segments))
+
+    def test_split_keeps_code_fences_whole(self):
+        """A fenced block with blank lines is one segment and is not translated"""
+        from api.rag_pipeline.language import _needs_translation, split_into_segments
+
+        code = "```python\ndef f():\n\n    return 1\n\n\nprint(f())\n```"
+        text = f"Example:\n\n{code}\n\nIt returns 1."
+        segments = split_into_segments(text, max_chars=20)
+
+        self.assertEqual("".join(segments), text)
+        self.assertIn(code, segments)
+        self.assertFalse(_needs_translation(code))
+        self.assertEqual(segments[-1], "It returns 1.")
+
+    def test_split_long_list_on_lines(self):
+        """A long bullet list is split between items, keeping its line breaks"""
+        from api.rag_pipeline.language import split_into_segments
+
+        items = [f"- Item number {i} of the list" for i in range(6)]
+        text = "\n".join(items)
+        segments = split_into_segments(text, max_chars=60)
+
+        self.assertEqual("".join(segments), text)
+        self.assertTrue(all(len(s) <= 60 for s in segments))
+        self.assertIn("\n", segments)
+        self.assertTrue(all(s == "\n" or s.startswith("- ") for s in segments))
+
+    @patch("api.rag_pipeline.language.logger", MagicMock())
+    def test_translate_response_async(self):
+        """Segments are translated separately and reassembled; code blocks are kept"""
+        import asyncio
+
+        import api.rag_pipeline.language as language_module
+        from api.rag_pipeline.translation_backend import StandInTranslationBackend
+        from api.rag_pipeline.translation_cache import TranslationCache
+
+        answer = "Hello.\n\n```print(1)```\n\nGoodbye."
+        with patch.object(
+            language_module, "get_translation_backend", return_value=StandInTranslationBackend()
+        ), patch.object(language_module, "get_translation_cache", return_value=TranslationCache()):
+            translated = asyncio.run(language_module.translate_response_async(answer, "es"))
+            unchanged = asyncio.run(language_module.translate_response_async(answer, "en"))
+
+        self.assertEqual(translated, "[es] Hello.\n\n```print(1)```\n\n[es] Goodbye.")
+        self.assertEqual(unchanged, answer)
+
+    @patch("api.rag_pipeline.language.logger", MagicMock())
+    def test_translate_batch_async_cache_off_loop(self):
+        """Cache reads and writes run in worker threads, not on the event loop"""
+        import asyncio
+        import threading
+
+        import api.rag_pipeline.language as language_module
+        from api.rag_pipeline.translation_backend import StandInTranslationBackend
+
+        threads = []
+        cache = MagicMock()
+        cache.get_many.side_effect = lambda *args: threads.append(threading.current_thread()) or {}
+        cache.set_many.side_effect = lambda *args: threads.append(threading.current_thread())
+        with patch.object(
+            language_module, "get_translation_backend", return_value=StandInTranslationBackend()
+        ), patch.object(language_module, "get_translation_cache", return_value=cache):
+            translated = asyncio.run(
+                language_module.translate_batch_async(["Hello."], "es", source_lang="en")
+            )
+
+        self.assertEqual(translated, ["[es] Hello."])
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.main_thread(), threads)
+
     def test_module_level_functions(self):
         """Test module-level utility functions by directly patching the actual functions"""
         # Clear any cached modules
@@ -5,9 +5,17 @@ Tests the chat session management functionality.
 """
 
 import unittest
+from unittest.mock import patch
 
 # Import the actual module functions to test
-from api.utils.llm_rag_utils import create_chat_session, rebuild_chat_session, chat_sessions
+from api.utils.llm_rag_utils import (
+    ChatSessionCache,
+    chat_sessions,
+    create_chat_session,
+    estimate_session_size,
+    rebuild_chat_session,
+)
+from api.utils.kv_store import MemoryKVStore
 
 # Mock data for testing
 MOCK_CHAT_HISTORY = [
@@ -110,5 +118,78 @@ class TestLLMRAGUtils(unittest.TestCase):
         self.assertEqual(len(chat_sessions[chat_id]["messages"]), 0)
 
 
+class TestChatSessionCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        """The least recently used session is evicted when the cache is full"""
+        cache = ChatSessionCache(max_entries=2, max_bytes=10**6, idle_seconds=60)
+        cache["a"] = create_chat_session()
+        cache["b"] = create_chat_session()
+        cache.get("a")  # "b" is now least recently used
+        cache["c"] = create_chat_session()
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.stats()["evictions"]["lru"], 1)
+
+    def test_idle_eviction(self):
+        """Sessions unused for longer than the idle TTL are dropped"""
+        cache = ChatSessionCache(max_entries=10, max_bytes=10**6, idle_seconds=60)
+        with patch("api.utils.llm_rag_utils.time.time", return_value=1000.0):
+            cache["a"] = create_chat_session()
+        with patch("api.utils.llm_rag_utils.time.time", return_value=1061.0):
+            self.assertIsNone(cache.get("a"))
+
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats()["evictions"]["idle"], 1)
+
+    def test_memory_eviction(self):
+        """Old sessions are evicted while the estimated size is over the budget"""
+        session = rebuild_chat_session(MOCK_CHAT_HISTORY)
+        size = estimate_session_size(session)
+        cache = ChatSessionCache(max_entries=10, max_bytes=2 * size, idle_seconds=60)
+        for chat_id in ("a", "b", "c"):
+            cache[chat_id] = rebuild_chat_session(MOCK_CHAT_HISTORY)
+
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn("a", cache)
+        self.assertEqual(cache.stats()["estimated_bytes"], 2 * size)
+        self.assertEqual(cache.stats()["evictions"]["memory"], 1)
+
+    def test_hit_miss_metrics(self):
+        cache = ChatSessionCache(max_entries=10, max_bytes=10**6, idle_seconds=60)
+        cache["a"] = create_chat_session()
+        cache.get("a")
+        cache.get("missing")
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+        self.assertIsNone(cache.pop("missing"))
+        self.assertIsNotNone(cache.pop("a"))
+        self.assertEqual(cache.stats()["estimated_bytes"], 0)
+
+    def test_shared_store_across_replicas(self):
+        """A session created on one replica is found on another through the shared store"""
+        shared = MemoryKVStore(shared=True)
+        replica_a = ChatSessionCache(idle_seconds=60, store=shared)
+        replica_b = ChatSessionCache(idle_seconds=60, store=shared)
+
+        replica_a["chat"] = rebuild_chat_session(MOCK_CHAT_HISTORY)
+        session = replica_b.get("chat")
+
+        self.assertEqual(len(session["messages"]), 3)
+        self.assertEqual(replica_b.stats()["store_hits"], 1)
+        self.assertEqual(replica_b.get("chat"), session)
+        self.assertEqual(replica_b.stats()["hits"], 1)
+
+        replica_a.pop("chat")
+        self.assertIsNone(ChatSessionCache(store=shared).get("chat"))
+
+    def test_unshared_store_not_used(self):
+        """The in-memory store is per process, so sessions are not duplicated into it"""
+        cache = ChatSessionCache(store=MemoryKVStore())
+        self.assertIsNone(cache.store)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,85 @@
+"""
+Unit tests for the model_residency.py module.
+
+Tests the Ollama model residency manager including:
+- keep_alive preloading of configured models
+- Refreshing models that are unloaded or about to expire
+- Load-duration metrics and cold-load counting
+"""
+
+import asyncio
+import time
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from api.rag_pipeline.model_residency import ModelResidencyManager, _parse_expires_at
+
+
+@patch("api.rag_pipeline.model_residency.logger", MagicMock())
+class TestModelResidency(unittest.TestCase):
+    def setUp(self):
+        self.manager = ModelResidencyManager(
+            models=["llama3:8b", "llama-guard3:8b", "llama3:8b"],
+            hosts=["ollama", "http://ollama:11434/"],
+            keep_alive="30m",
+            refresh_margin=300,
+            cold_load_seconds=1.0,
+        )
+        self.manager._request = AsyncMock(return_value={"load_duration": 2_500_000_000})
+
+    def test_models_deduplicated(self):
+        self.assertEqual(self.manager.models, ["llama3:8b", "llama-guard3:8b"])
+        self.assertEqual(self.manager.base_urls, ["http://ollama:11434"])
+
+    def test_preload_sends_keep_alive(self):
+        results = asyncio.run(self.manager.preload())
+
+        self.assertEqual(results, {"llama3:8b": True, "llama-guard3:8b": True})
+        self.manager._request.assert_any_await(
+            "http://ollama:11434",
+            "POST",
+            "/api/generate",
+            {"model": "llama3:8b", "keep_alive": "30m", "stream": False},
+        )
+        # Preloads are not user requests
+        self.assertEqual(self.manager.metrics["llama3:8b"]["preloads"], 1)
+        self.assertEqual(self.manager.metrics["llama3:8b"]["cold_loads"], 0)
+
+    def test_preload_failure(self):
+        self.manager._request.side_effect = Exception("connection refused")
+        results = asyncio.run(self.manager.preload())
+        self.assertEqual(results, {"llama3:8b": False, "llama-guard3:8b": False})
+
+    def test_refresh_pings_stale_models(self):
+        soon = datetime.fromtimestamp(time.time() + 60, tz=timezone.utc).isoformat()
+        later = datetime.fromtimestamp(time.time() + 3600, tz=timezone.utc).isoformat()
+        self.manager.loaded_models = AsyncMock(return_value={"llama3:8b": _parse_expires_at(later)})
+
+        self.assertEqual(asyncio.run(self.manager.refresh_once()), ["llama-guard3:8b"])
+
+        self.manager.loaded_models.return_value = {
+            "llama3:8b": _parse_expires_at(soon),
+            "llama-guard3:8b": _parse_expires_at(later),
+        }
+        self.assertEqual(asyncio.run(self.manager.refresh_once()), ["llama3:8b"])
+
+    def test_record_cold_loads(self):
+        self.manager.record("llama3:8b", {"load_duration": 50_000_000, "total_duration": 2e9})
+        self.manager.record("llama3:8b", {"load_duration": 4_000_000_000})
+
+        stats = self.manager.metrics["llama3:8b"]
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["cold_loads"], 1)
+        self.assertAlmostEqual(stats["load_seconds_max"], 4.0)
+        self.assertAlmostEqual(stats["last_load_seconds"], 4.0)
+
+    def test_parse_expires_at(self):
+        parsed = _parse_expires_at("2024-06-01T12:00:00.123456789-07:00")
+        expected = datetime(2024, 6, 1, 19, 0, 0, 123456, tzinfo=timezone.utc).timestamp()
+        self.assertAlmostEqual(parsed, expected)
+        self.assertIsNone(_parse_expires_at("not a date"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Unit tests for the chat generation path of the ollama_api.py module.
+
+Tests multi-turn generation via the Ollama chat API including:
+- Message layout with a stable system/summary/history prefix
+- Block-wise history window
+- Chat request payload and per-chat host affinity
+"""
+
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from api.rag_pipeline.ollama_api import (
+    AsyncOllamaAPIClient,
+    build_chat_messages,
+    history_window,
+)
+from api.rag_pipeline.ollama_pool import OllamaPool
+
+
+def _history(count):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}"}
+        for i in range(count)
+    ]
+
+
+class TestChatMessages(unittest.TestCase):
+    def test_layout(self):
+        messages = build_chat_messages(
+            "  System prompt  ",
+            "DOCUMENT 1:\nText",
+            "What is dropout?",
+            _history(2),
+            instructions="Respond in French.",
+        )
+
+        self.assertEqual(messages[0], {"role": "system", "content": "System prompt"})
+        self.assertEqual([m["role"] for m in messages[1:]], ["user", "assistant", "user"])
+        self.assertTrue(messages[-1]["content"].startswith("CONTEXT:\nDOCUMENT 1:\nText"))
+        self.assertIn("Respond in French.", messages[-1]["content"])
+        self.assertTrue(messages[-1]["content"].endswith("USER QUERY:\nWhat is dropout?"))
+
+    def test_layout_with_summary(self):
+        messages = build_chat_messages(
+            "System prompt", "ctx", "q", _history(2), summary="Asked about CNNs."
+        )
+
+        self.assertEqual(messages[1]["role"], "system")
+        self.assertEqual(
+            messages[1]["content"], "SUMMARY OF THE EARLIER CONVERSATION:\nAsked about CNNs."
+        )
+        self.assertEqual([m["role"] for m in messages[2:]], ["user", "assistant", "user"])
+
+    def test_history_window_moves_in_blocks(self):
+        self.assertEqual(history_window(None), [])
+        self.assertEqual(len(history_window(_history(4), window=6)), 4)
+        self.assertEqual(len(history_window(_history(10), window=6)), 10)
+        self.assertEqual(history_window(_history(12), window=6)[0]["content"], "message 6")
+
+    def test_history_window_aligned_on_seq(self):
+        """Only the latest messages of a chat are loaded: the same window is selected"""
+        full = [dict(message, seq=seq) for seq, message in enumerate(_history(25))]
+        for loaded in (12, 15, 25):
+            self.assertEqual(history_window(full[-loaded:], window=6), history_window(full, 6))
+
+    def test_consecutive_turns_share_prefix(self):
+        """Turn N+1 starts with the system prompt and history of turn N"""
+        for length in range(0, 20, 2):
+            previous = build_chat_messages("System", "ctx", "q", _history(length))
+            current = build_chat_messages("System", "ctx", "q", _history(length + 2))
+            shared = previous[:-1]
+            if current[: len(shared)] != shared:
+                # Only allowed when the window advances to a new block
+                self.assertEqual((length + 2 - 6) % 6, 0)
+
+
+class TestChatRequest(unittest.TestCase):
+    def setUp(self):
+        self.pool = OllamaPool(["gpu1", "gpu2"])
+        self.residency = MagicMock(keep_alive="30m")
+        self.patches = [
+            patch("api.rag_pipeline.ollama_api.get_ollama_pool", return_value=self.pool),
+            patch("api.rag_pipeline.ollama_api.get_residency_manager", return_value=self.residency),
+            patch("api.rag_pipeline.ollama_api.logger", MagicMock()),
+        ]
+        for p in self.patches:
+            p.start()
+        self.addCleanup(lambda: [p.stop() for p in self.patches])
+
+    def _mock_http(self, body):
+        response = MagicMock(status=200)
+        response.json = AsyncMock(return_value=body)
+        request = MagicMock()
+        request.__aenter__ = AsyncMock(return_value=response)
+        request.__aexit__ = AsyncMock(return_value=False)
+        session = MagicMock()
+        session.post.return_value = request
+        session.__aenter__ = AsyncMock(return_value=session)
+        session.__aexit__ = AsyncMock(return_value=False)
+        return session
+
+    def test_chat_payload_and_affinity(self):
+        session = self._mock_http(
+            {"message": {"role": "assistant", "content": "Dropout is..."}, "prompt_eval_count": 12}
+        )
+        client = AsyncOllamaAPIClient("llama3:8b", timeout=30)
+        messages = build_chat_messages("System", "ctx", "What is dropout?")
+
+        with patch("api.rag_pipeline.ollama_api.aiohttp.ClientSession", return_value=session):
+            first = asyncio.run(client.chat(messages, max_tokens=100, chat_id="chat-1"))
+            second = asyncio.run(client.chat(messages, max_tokens=100, chat_id="chat-1"))
+
+        self.assertEqual(first, "Dropout is...")
+        self.assertEqual(second, "Dropout is...")
+        (url_1,), kwargs = session.post.call_args_list[0]
+        (url_2,), _ = session.post.call_args_list[1]
+        self.assertTrue(url_1.endswith("/api/chat"))
+        self.assertEqual(url_1, url_2)
+        self.assertEqual(kwargs["json"]["messages"], messages)
+        self.assertEqual(kwargs["json"]["options"]["num_predict"], 100)
+        self.assertIn("num_ctx", kwargs["json"]["options"])
+        self.assertEqual(kwargs["json"]["keep_alive"], "30m")
+        self.residency.record.assert_called_with("llama3:8b", unittest.mock.ANY)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+Unit tests for the ollama_pool.py module.
+
+Tests the multi-host Ollama endpoint pool including:
+- Host normalization
+- Least-outstanding routing that prefers hosts with the model loaded
+- Ejection of failing hosts and recovery through health checks
+- Chat affinity pinning turns of one conversation to the same host
+"""
+
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiohttp
+
+from api.rag_pipeline.ollama_pool import EndpointFailure, OllamaPool, normalize_host
+
+
+@patch("api.rag_pipeline.ollama_pool.logger", MagicMock())
+class TestOllamaPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = OllamaPool(["gpu1", "gpu2:11500", "http://gpu3:11434"], eject_after=2)
+        self.gpu1, self.gpu2, self.gpu3 = self.pool.endpoints
+
+    def test_normalize_host(self):
+        self.assertEqual(normalize_host("gpu1"), "http://gpu1:11434")
+        self.assertEqual(normalize_host("gpu2:11500"), "http://gpu2:11500")
+        self.assertEqual(
+            normalize_host("https://ollama.example.com:443/"), "https://ollama.example.com:443"
+        )
+        self.assertEqual(self.gpu1.generate_url, "http://gpu1:11434/api/generate")
+
+    def test_requires_hosts(self):
+        with self.assertRaises(ValueError):
+            OllamaPool([])
+
+    def test_prefers_loaded_model_then_fewest_outstanding(self):
+        self.gpu2.loaded_models = {"llama3:8b"}
+        self.gpu3.loaded_models = {"llama3:8b"}
+        self.gpu2.outstanding = 3
+        self.gpu3.outstanding = 1
+
+        self.assertIs(self.pool.choose("llama3:8b"), self.gpu3)
+        # No host has the model: least outstanding overall
+        self.assertIs(self.pool.choose("llama-guard3:8b"), self.gpu1)
+
+    def test_acquire_tracks_outstanding(self):
+        async def run():
+            async with self.pool.acquire("llama3:8b") as endpoint:
+                self.assertEqual(endpoint.outstanding, 1)
+                return endpoint
+
+        endpoint = asyncio.run(run())
+        self.assertEqual(endpoint.outstanding, 0)
+        self.assertIn("llama3:8b", endpoint.loaded_models)
+
+    def test_failures_eject_host(self):
+        async def fail():
+            async with self.pool.acquire() as endpoint:
+                raise aiohttp.ClientError("connection refused")
+
+        self.gpu2.outstanding = self.gpu3.outstanding = 5  # Route to gpu1
+        for _ in range(2):
+            with self.assertRaises(aiohttp.ClientError):
+                asyncio.run(fail())
+
+        self.assertFalse(self.gpu1.healthy)
+        self.assertIsNot(self.pool.choose(), self.gpu1)
+
+    def test_other_exceptions_do_not_count(self):
+        async def fail():
+            async with self.pool.acquire():
+                raise ValueError("bad prompt")
+
+        with self.assertRaises(ValueError):
+            asyncio.run(fail())
+        self.assertEqual(sum(e.failures for e in self.pool.endpoints), 0)
+
+    def test_all_ejected_uses_first_to_recover(self):
+        for endpoint, until in zip(self.pool.endpoints, (3e12, 1e12, 2e12)):
+            endpoint.ejected_until = until
+        self.assertIs(self.pool.choose(), self.gpu2)
+
+    def test_affinity_pins_chat_to_host(self):
+        async def turn():
+            async with self.pool.acquire("llama3:8b", affinity_key="chat-1") as endpoint:
+                return endpoint
+
+        first = asyncio.run(turn())
+        first.outstanding = 10  # Busier than the others, still preferred for this chat
+        self.assertIs(asyncio.run(turn()), first)
+        self.assertEqual(self.pool.affinity_hits, 1)
+
+        first.ejected_until = 1e12  # Unhealthy pinned host: re-route and re-pin
+        second = asyncio.run(turn())
+        self.assertIsNot(second, first)
+        self.assertIs(self.pool.choose("llama3:8b", "chat-1"), second)
+
+    def test_affinity_is_bounded(self):
+        pool = OllamaPool(["gpu1", "gpu2"], affinity_size=2)
+        for chat_id in ("a", "b", "c"):
+            pool.pin(chat_id, pool.endpoints[0])
+        self.assertEqual(list(pool._affinity), ["b", "c"])
+
+    def _mock_http(self, status, body):
+        response = MagicMock(status=status)
+        response.json = AsyncMock(return_value=body)
+        request = MagicMock()
+        request.__aenter__ = AsyncMock(return_value=response)
+        request.__aexit__ = AsyncMock(return_value=False)
+        session = MagicMock()
+        session.get.return_value = request
+        session.__aenter__ = AsyncMock(return_value=session)
+        session.__aexit__ = AsyncMock(return_value=False)
+        return patch("api.rag_pipeline.ollama_pool.aiohttp.ClientSession", return_value=session)
+
+    def test_health_check_restores_host(self):
+        self.gpu1.ejected_until = 1e12
+        with self._mock_http(200, {"models": [{"name": "llama3:8b"}]}):
+            self.assertTrue(asyncio.run(self.pool.check_endpoint(self.gpu1)))
+
+        self.assertTrue(self.gpu1.healthy)
+        self.assertEqual(self.gpu1.loaded_models, {"llama3:8b"})
+
+    def test_health_check_failure(self):
+        with self._mock_http(503, {}):
+            results = asyncio.run(self.pool.check_health())
+
+        self.assertEqual(list(results.values()), [False, False, False])
+        self.assertEqual(self.gpu3.consecutive_failures, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
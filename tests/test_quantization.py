@@ -0,0 +1,90 @@
+"""
+Unit tests for the quantization.py module.
+
+Tests the quantized two-stage search helpers including:
+- Half-precision and binary encodings of embeddings
+- SQL generation for the quantized candidate scan
+- In-memory two-stage search recall against exact search
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from api.rag_pipeline.quantization import (
+    binarize,
+    bytes_per_vector,
+    exact_top_k,
+    quantize_for_storage,
+    quantized_vector_search,
+    recall_at_k,
+    to_halfvec,
+    two_stage_top_k,
+)
+
+
+class TestQuantization(unittest.TestCase):
+    def test_binarize(self):
+        """Positive components map to 1, everything else to 0"""
+        self.assertEqual(binarize([0.5, -0.2, 0.0, 3.0]), [1, 0, 0, 1])
+
+    def test_to_halfvec_rounds_to_float16(self):
+        """Half-precision values are representable in float16"""
+        values = to_halfvec(np.array([0.1, 0.333333, -2.5]))
+        self.assertEqual(values, np.array(values, dtype=np.float16).astype(np.float32).tolist())
+
+    def test_quantize_for_storage(self):
+        """Storage literals are formatted as vector literals"""
+        literals = quantize_for_storage([0.25, -1.0])
+        self.assertEqual(literals["halfvec"], "[0.25,-1.0]")
+        self.assertEqual(literals["binary"], "[1,0]")
+
+    def test_bytes_per_vector(self):
+        self.assertEqual(bytes_per_vector(768, "off"), 3072)
+        self.assertEqual(bytes_per_vector(768, "halfvec"), 1536)
+        self.assertEqual(bytes_per_vector(768, "binary"), 96)
+
+    def test_two_stage_recall(self):
+        """Two-stage search with a generous candidate pool matches exact search"""
+        rng = np.random.default_rng(0)
+        corpus = rng.normal(size=(500, 64)).astype(np.float32)
+        query = corpus[7] + 0.1 * rng.normal(size=64).astype(np.float32)
+
+        expected = exact_top_k(query, corpus, 5)
+        for mode in ("halfvec", "binary"):
+            retrieved = two_stage_top_k(query, corpus, 5, mode=mode, candidate_k=200)
+            self.assertEqual(retrieved[0], 7)
+            self.assertGreaterEqual(recall_at_k(expected, retrieved), 0.8)
+
+    def test_two_stage_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            two_stage_top_k([1.0], np.ones((3, 1)), 1, mode="pq")
+
+    @patch("api.rag_pipeline.quantization.text", lambda sql: sql)
+    def test_quantized_vector_search_binary(self):
+        """Binary mode scans the bvector column and rescores with full vectors"""
+        session = MagicMock()
+        session.execute.return_value.fetchall.return_value = [("doc1", 1, "Text 1", 0.9)]
+
+        results = quantized_vector_search(
+            session, [0.5, -0.5], 3, "test@example.com", mode="binary", candidate_k=50
+        )
+
+        self.assertEqual(results[0]["document_id"], "doc1")
+        self.assertEqual(results[0]["score"], 0.9)
+        sql = str(session.execute.call_args[0][0])
+        self.assertIn("embedding_bin <-> '[1,0]'::bvector", sql)
+        self.assertIn("embedding <=> '[0.5,-0.5]'::vector", sql)
+        self.assertEqual(session.execute.call_args[0][1]["candidate_k"], 50)
+        session.close.assert_called_once()
+
+    def test_quantized_vector_search_requires_email(self):
+        session = MagicMock()
+        with self.assertRaises(ValueError):
+            quantized_vector_search(session, [0.1], 3, None, mode="halfvec")
+        session.close.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
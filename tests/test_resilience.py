@@ -0,0 +1,92 @@
+"""
+Unit tests for the resilience.py module.
+
+Tests the latency budgets and circuit breakers including:
+- Rolling latency percentiles
+- Adaptive stage timeouts with floor and ceiling
+- Circuit breaker open, half-open and close transitions, and cancelled trial calls
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+from api.rag_pipeline.resilience import CircuitBreaker, LatencyTracker, Stage
+
+
+@patch("api.rag_pipeline.resilience.logger", MagicMock())
+class TestResilience(unittest.TestCase):
+    def test_latency_percentile(self):
+        tracker = LatencyTracker(window=100)
+        self.assertIsNone(tracker.percentile(95))
+        for value in range(1, 101):
+            tracker.record(float(value))
+        self.assertEqual(tracker.percentile(95), 95.0)
+        self.assertEqual(tracker.percentile(50), 50.0)
+
+    def test_latency_window(self):
+        tracker = LatencyTracker(window=3)
+        for value in (100.0, 1.0, 2.0, 3.0):
+            tracker.record(value)
+        self.assertEqual(tracker.percentile(100), 3.0)
+
+    def test_stage_timeout(self):
+        stage = Stage("generate", ceiling=600, floor=5, multiplier=2.0)
+        self.assertEqual(stage.timeout(), 600)  # Not enough samples yet
+
+        for _ in range(50):
+            stage.record_success(10.0)
+        self.assertEqual(stage.timeout(), 20.0)
+
+        fast = Stage("safety", ceiling=60, floor=5, multiplier=2.0)
+        for _ in range(50):
+            fast.record_success(0.5)
+        self.assertEqual(fast.timeout(), 5)
+
+        slow = Stage("rerank", ceiling=60, floor=5, multiplier=2.0)
+        for _ in range(50):
+            slow.record_success(45.0)
+        self.assertEqual(slow.timeout(), 60)
+
+    def test_breaker_opens_after_failures(self):
+        breaker = CircuitBreaker("generate", failure_threshold=3, reset_seconds=30)
+        for _ in range(2):
+            breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.rejected, 1)
+
+    def test_breaker_half_open_trial(self):
+        breaker = CircuitBreaker("generate", failure_threshold=1, reset_seconds=30)
+        with patch("api.rag_pipeline.resilience.time.time", return_value=1000.0):
+            breaker.record_failure()
+        with patch("api.rag_pipeline.resilience.time.time", return_value=1031.0):
+            self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+            self.assertTrue(breaker.allow())
+            self.assertFalse(breaker.allow())  # Only one trial call
+
+            breaker.record_failure()  # Trial failed: re-open
+            self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+            self.assertEqual(breaker.times_opened, 2)
+
+        with patch("api.rag_pipeline.resilience.time.time", return_value=1062.0):
+            self.assertTrue(breaker.allow())
+            breaker.record_success()
+            self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+            self.assertTrue(breaker.allow())
+
+    def test_breaker_release_cancelled_trial(self):
+        breaker = CircuitBreaker("generate", failure_threshold=1, reset_seconds=30)
+        with patch("api.rag_pipeline.resilience.time.time", return_value=1000.0):
+            breaker.record_failure()
+        with patch("api.rag_pipeline.resilience.time.time", return_value=1031.0):
+            self.assertTrue(breaker.allow())
+            breaker.release()  # The trial call was cancelled
+            self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+            self.assertTrue(breaker.allow())
+
+
+if __name__ == "__main__":
+    unittest.main()
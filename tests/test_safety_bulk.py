@@ -0,0 +1,135 @@
+"""
+Unit tests for the bulk evaluation mode of the safety.py module.
+
+Tests the batch safety re-evaluation including:
+- Reading queries from JSONL and plain text files
+- Incremental JSONL verdict output
+- Resuming an interrupted run
+- Streaming queries from the audit table
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# test_safety.py replaces the module in sys.modules; load the real implementation
+_mocked_safety = sys.modules.pop("api.rag_pipeline.safety", None)
+from api.rag_pipeline import safety  # noqa: E402
+
+if _mocked_safety is not None:
+    sys.modules["api.rag_pipeline.safety"] = _mocked_safety
+
+
+class TestSafetyBulk(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmp.name, "verdicts.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _read_output(self):
+        with open(self.output, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.endswith("}\n")]
+
+    def test_iter_queries_from_file(self):
+        path = os.path.join(self.tmp.name, "queries.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"id": "a1", "query": "What is PCA?"}\n\nExplain dropout\n')
+
+        self.assertEqual(
+            list(safety.iter_queries_from_file(path)),
+            [("a1", "What is PCA?"), ("3", "Explain dropout")],
+        )
+
+    def test_evaluate_queries_bulk(self):
+        async def check(query, timeout):
+            return ("bomb" not in query, "reason")
+
+        summary = asyncio.run(
+            safety.evaluate_queries_bulk(
+                [("1", "What is PCA?"), ("2", "bomb"), ("3", "Explain dropout")],
+                self.output,
+                concurrency=2,
+                check=check,
+            )
+        )
+
+        self.assertEqual(summary["evaluated"], 3)
+        self.assertEqual(summary["unsafe"], 1)
+        verdicts = {record["id"]: record["is_safe"] for record in self._read_output()}
+        self.assertEqual(verdicts, {"1": True, "2": False, "3": True})
+
+    def test_resume_skips_completed(self):
+        with open(self.output, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"id": "1", "is_safe": True}) + "\n")
+            f.write('{"id": "2", "is_sa')  # Truncated by an interruption
+
+        check = AsyncMock(return_value=(True, "Content is safe"))
+        summary = asyncio.run(
+            safety.evaluate_queries_bulk(
+                [("1", "q1"), ("2", "q2")], self.output, concurrency=1, check=check
+            )
+        )
+
+        self.assertEqual(summary["skipped"], 1)
+        self.assertEqual(summary["evaluated"], 1)
+        check.assert_awaited_once_with("q2", timeout=safety.DEFAULT_TIMEOUT)
+        self.assertEqual(self._read_output()[-1]["id"], "2")
+
+    def test_failed_checks_are_not_written(self):
+        check = AsyncMock(side_effect=RuntimeError("Ollama down"))
+        with patch.object(safety, "logger", MagicMock()):
+            summary = asyncio.run(
+                safety.evaluate_queries_bulk([("1", "q1")], self.output, check=check)
+            )
+
+        self.assertEqual(summary["failed"], 1)
+        self.assertEqual(self._read_output(), [])
+
+    def test_llama_guard_errors_are_not_written(self):
+        """The default check fails closed: an unreachable Llama Guard is not a SAFE verdict"""
+        with patch.object(safety, "logger", MagicMock()), patch.object(
+            safety.aiohttp.ClientSession, "post", side_effect=safety.aiohttp.ClientError("down")
+        ):
+            summary = asyncio.run(safety.evaluate_queries_bulk([("1", "q1")], self.output))
+
+        self.assertEqual(summary["failed"], 1)
+        self.assertEqual(self._read_output(), [])
+
+    def test_cancelled_trial_releases_breaker(self):
+        """A cancelled half-open trial lets the next check through"""
+        stage = safety.get_stage("safety")
+        stage.breaker.opened_at = 1.0  # Long past the reset delay: half-open
+        try:
+            with patch.object(safety, "logger", MagicMock()), patch.object(
+                safety.aiohttp.ClientSession, "post", side_effect=asyncio.CancelledError
+            ):
+                with self.assertRaises(asyncio.CancelledError):
+                    asyncio.run(safety.check_query_safety_with_llama_guard("q"))
+            self.assertTrue(stage.breaker.allow())
+        finally:
+            stage.breaker.record_success()
+
+    @patch("sqlalchemy.text", lambda sql: sql, create=True)
+    def test_iter_queries_from_audit(self):
+        session = MagicMock()
+        session.execute.return_value.fetchall.side_effect = [
+            [(1, "first"), (2, "second")],
+            [(5, "third")],
+            [],
+        ]
+
+        queries = list(safety.iter_queries_from_audit(lambda: session, batch_size=2))
+
+        self.assertEqual(queries, [("1", "first"), ("2", "second"), ("5", "third")])
+        self.assertEqual(session.execute.call_args_list[1][0][1]["after_id"], 2)
+        session.close.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
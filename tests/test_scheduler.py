@@ -0,0 +1,124 @@
+"""
+Unit tests for the scheduler.py module.
+
+Tests the priority scheduler for Ollama requests including:
+- Global and per-class concurrency caps
+- Priority order when slots free up
+- Cancellation of queued requests
+- Admission control (Retry-After estimate)
+"""
+
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+
+from api.rag_pipeline.scheduler import PriorityScheduler
+
+
+@patch("api.rag_pipeline.scheduler.logger", MagicMock())
+class TestPriorityScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = PriorityScheduler(
+            max_concurrency=2,
+            class_limits={"answer": 2, "safety": 2, "rerank": 1, "batch": 1},
+            max_queue=2,
+        )
+
+    def test_priority_order(self):
+        order = []
+
+        async def call(priority, name, release=None):
+            async with self.scheduler.slot(priority):
+                order.append(name)
+                if release is not None:
+                    await release.wait()
+
+        async def run():
+            release = asyncio.Event()
+            blockers = [
+                asyncio.create_task(call("answer", "blocker-1", release)),
+                asyncio.create_task(call("answer", "blocker-2", release)),
+            ]
+            await asyncio.sleep(0)
+            waiting = [
+                asyncio.create_task(call("batch", "batch")),
+                asyncio.create_task(call("rerank", "rerank")),
+                asyncio.create_task(call("answer", "answer")),
+            ]
+            await asyncio.sleep(0)
+            self.assertEqual(self.scheduler.queue_depth(), 3)
+            release.set()
+            await asyncio.gather(*blockers, *waiting)
+
+        asyncio.run(run())
+        self.assertEqual(order[2:], ["answer", "rerank", "batch"])
+
+    def test_class_limit(self):
+        async def run():
+            release = asyncio.Event()
+
+            async def rerank():
+                async with self.scheduler.slot("rerank"):
+                    await release.wait()
+
+            tasks = [asyncio.create_task(rerank()) for _ in range(2)]
+            await asyncio.sleep(0)
+            # One global slot is free, but the rerank class is at its cap
+            self.assertEqual(self.scheduler.running, 1)
+            self.assertEqual(self.scheduler.queue_depth("rerank"), 1)
+            release.set()
+            await asyncio.gather(*tasks)
+
+        asyncio.run(run())
+        self.assertEqual(self.scheduler.stats()["classes"]["rerank"]["completed"], 2)
+        self.assertEqual(self.scheduler.running, 0)
+
+    def test_cancelled_waiter_is_removed(self):
+        async def run():
+            release = asyncio.Event()
+
+            async def hold():
+                async with self.scheduler.slot("batch"):
+                    await release.wait()
+
+            holder = asyncio.create_task(hold())
+            await asyncio.sleep(0)
+            waiter = asyncio.create_task(hold())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            self.assertEqual(self.scheduler.queue_depth(), 0)
+            release.set()
+            await holder
+
+        asyncio.run(run())
+        self.assertEqual(self.scheduler.running, 0)
+
+    def test_unknown_class(self):
+        async def run():
+            async with self.scheduler.slot("urgent"):
+                pass
+
+        with self.assertRaises(ValueError):
+            asyncio.run(run())
+
+    def test_retry_after(self):
+        self.assertIsNone(self.scheduler.retry_after())
+
+        loop = asyncio.new_event_loop()
+        try:
+            self.scheduler._queues["answer"].extend(loop.create_future() for _ in range(3))
+            self.scheduler._queues["batch"].extend(loop.create_future() for _ in range(10))
+            for _ in range(5):
+                self.scheduler.service["answer"].record(4.0)
+
+            # 3 interactive requests waiting (batch ignored), 4s each over 2 slots
+            self.assertEqual(self.scheduler.retry_after(), 6)
+            self.assertEqual(self.scheduler.rejected, 1)
+        finally:
+            loop.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
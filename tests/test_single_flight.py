@@ -0,0 +1,120 @@
+"""
+Unit tests for the single_flight.py module.
+
+Tests the request coalescing layer including:
+- Stable key construction
+- Sharing one execution between concurrent identical calls
+- Shared exceptions and copied results
+- Leader cancellation not affecting followers
+"""
+
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+
+from api.rag_pipeline.single_flight import SingleFlight, make_key
+
+
+@patch("api.rag_pipeline.single_flight.logger", MagicMock())
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.calls = 0
+
+    async def _work(self, result="answer", delay=0.05):
+        self.calls += 1
+        await asyncio.sleep(delay)
+        return result
+
+    def test_make_key(self):
+        self.assertEqual(make_key("generate", "llama3", "hi"), make_key("generate", "llama3", "hi"))
+        self.assertNotEqual(
+            make_key("generate", "llama3", "hi"), make_key("generate", "llama3", "ho")
+        )
+        self.assertEqual(make_key({"b": 1, "a": 2}), make_key({"a": 2, "b": 1}))
+
+    def test_concurrent_calls_share_execution(self):
+        flight = SingleFlight("test", enabled=True)
+
+        async def run():
+            return await asyncio.gather(*(flight.do("k", self._work) for _ in range(5)))
+
+        results = asyncio.run(run())
+
+        self.assertEqual(results, ["answer"] * 5)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(flight.stats, {"leaders": 1, "followers": 4})
+        self.assertEqual(flight.inflight, 0)
+
+    def test_sequential_calls_run_again(self):
+        flight = SingleFlight("test", enabled=True)
+
+        async def run():
+            await flight.do("k", self._work)
+            await flight.do("k", self._work)
+
+        asyncio.run(run())
+        self.assertEqual(self.calls, 2)
+
+    def test_different_keys_run_separately(self):
+        flight = SingleFlight("test", enabled=True)
+
+        async def run():
+            await asyncio.gather(flight.do("a", self._work), flight.do("b", self._work))
+
+        asyncio.run(run())
+        self.assertEqual(self.calls, 2)
+
+    def test_exceptions_are_shared(self):
+        flight = SingleFlight("test", enabled=True)
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("Ollama down")
+
+        async def run():
+            return await asyncio.gather(
+                flight.do("k", fail), flight.do("k", fail), return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+
+    def test_followers_get_copies(self):
+        flight = SingleFlight("test", copy_result=True, enabled=True)
+
+        async def run():
+            return await asyncio.gather(
+                flight.do("k", lambda: self._work({"response": "hi"})),
+                flight.do("k", lambda: self._work({"response": "hi"})),
+            )
+
+        leader, follower = asyncio.run(run())
+        self.assertEqual(leader, follower)
+        self.assertIsNot(leader, follower)
+
+    def test_leader_cancellation_does_not_cancel_followers(self):
+        flight = SingleFlight("test", enabled=True)
+
+        async def run():
+            leader = asyncio.ensure_future(flight.do("k", self._work))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.do("k", self._work))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        self.assertEqual(asyncio.run(run()), "answer")
+        self.assertEqual(self.calls, 1)
+
+    def test_disabled(self):
+        flight = SingleFlight("test", enabled=False)
+
+        async def run():
+            await asyncio.gather(flight.do("k", self._work), flight.do("k", self._work))
+
+        asyncio.run(run())
+        self.assertEqual(self.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Unit tests for the translation_backend.py module.
+
+Tests the pluggable translation backends including:
+- Joined single-request batching for Google Translate
+- Fallback to per-segment batching
+- Executor-backed async translation
+- The deterministic stand-in backend
+"""
+
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+
+from api.rag_pipeline.translation_backend import (
+    GoogleTranslationBackend,
+    StandInTranslationBackend,
+    TranslationBackend,
+)
+
+
+class TestTranslationBackends(unittest.TestCase):
+    @patch("api.rag_pipeline.translation_backend.GoogleTranslator")
+    def test_google_joined_request(self, mock_google_translator):
+        """Several segments are sent in one provider request"""
+        translator = MagicMock()
+        translator.translate.return_value = "Hello\nThank you"
+        mock_google_translator.return_value = translator
+
+        backend = GoogleTranslationBackend()
+        result = backend.translate_batch(["Hola", "Gracias"], "es", "en")
+
+        self.assertEqual(result, ["Hello", "Thank you"])
+        translator.translate.assert_called_once_with("Hola\nGracias")
+        mock_google_translator.assert_called_once_with(source="es", target="en")
+
+    @patch("api.rag_pipeline.translation_backend.GoogleTranslator")
+    def test_google_fallback_on_mismatch(self, mock_google_translator):
+        """A merged response falls back to per-segment translation"""
+        translator = MagicMock()
+        translator.translate.return_value = "Hello thank you"
+        translator.translate_batch.return_value = ["Hello", "Thank you"]
+        mock_google_translator.return_value = translator
+
+        result = GoogleTranslationBackend().translate_batch(["Hola", "Gracias"], "es", "en")
+
+        self.assertEqual(result, ["Hello", "Thank you"])
+        translator.translate_batch.assert_called_once_with(["Hola", "Gracias"])
+
+    @patch("api.rag_pipeline.translation_backend.GoogleTranslator")
+    def test_google_reuses_translator(self, mock_google_translator):
+        mock_google_translator.return_value.translate.return_value = "Hello"
+        backend = GoogleTranslationBackend()
+        backend.translate_batch(["Hola"], "es", "en")
+        backend.translate_batch(["Hola"], "es", "en")
+        mock_google_translator.assert_called_once()
+
+    def test_async_runs_blocking_backend_in_executor(self):
+        class UpperBackend(TranslationBackend):
+            def translate_batch(self, texts, source_lang, target_lang):
+                return [text.upper() for text in texts]
+
+        result = asyncio.run(UpperBackend().atranslate_batch(["hola"], "es", "en"))
+        self.assertEqual(result, ["HOLA"])
+
+    def test_standin_backend(self):
+        backend = StandInTranslationBackend()
+        self.assertEqual(backend.translate_batch(["Hello"], "en", "fr"), ["[fr] Hello"])
+        self.assertEqual(asyncio.run(backend.atranslate_batch(["Hi"], "en", "de")), ["[de] Hi"])
+        self.assertEqual(backend.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Unit tests for the translation_cache.py module.
+
+Tests the two-tier translation cache including:
+- Cache key construction
+- In-process LRU hits and eviction
+- SQLite and shared key-value persistent tiers
+- Store failures degrading to misses
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from api.utils.kv_store import MemoryKVStore
+
+from api.rag_pipeline.translation_cache import (
+    KVTranslationStore,
+    SQLiteTranslationStore,
+    TranslationCache,
+    make_cache_key,
+)
+
+
+class TestTranslationCache(unittest.TestCase):
+    def test_make_cache_key(self):
+        """Keys depend on the language pair and the text"""
+        key = make_cache_key("es", "en", "hola")
+        self.assertTrue(key.startswith("es:en:"))
+        self.assertNotEqual(key, make_cache_key("fr", "en", "hola"))
+        self.assertNotEqual(key, make_cache_key("es", "en", "adiós"))
+
+    def test_memory_hit_and_miss(self):
+        cache = TranslationCache(max_entries=10)
+        self.assertIsNone(cache.get("es", "en", "hola"))
+
+        cache.set("es", "en", "hola", "hello")
+        self.assertEqual(cache.get("es", "en", "hola"), "hello")
+        self.assertEqual(cache.stats["hits"], 1)
+        self.assertEqual(cache.stats["misses"], 1)
+
+    def test_empty_translations_not_cached(self):
+        cache = TranslationCache()
+        cache.set("es", "en", "hola", "")
+        self.assertIsNone(cache.get("es", "en", "hola"))
+
+    def test_lru_eviction(self):
+        cache = TranslationCache(max_entries=2)
+        cache.set("es", "en", "uno", "one")
+        cache.set("es", "en", "dos", "two")
+        cache.get("es", "en", "uno")  # Mark "uno" as recently used
+        cache.set("es", "en", "tres", "three")
+
+        self.assertEqual(cache.get("es", "en", "uno"), "one")
+        self.assertIsNone(cache.get("es", "en", "dos"))
+        self.assertEqual(cache.get("es", "en", "tres"), "three")
+
+    def test_sqlite_store_persists(self):
+        """A new cache on the same SQLite file serves earlier translations"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "translations.sqlite3")
+            TranslationCache(store=SQLiteTranslationStore(path)).set_many(
+                "fr", "en", {"bonjour": "hello", "merci": "thank you"}
+            )
+
+            cache = TranslationCache(store=SQLiteTranslationStore(path))
+            found = cache.get_many("fr", "en", ["bonjour", "merci", "salut"])
+
+            self.assertEqual(found, {"bonjour": "hello", "merci": "thank you"})
+            self.assertEqual(cache.stats["store_hits"], 2)
+            self.assertEqual(cache.stats["misses"], 1)
+
+    def test_kv_store_shared_between_replicas(self):
+        """A cache on another replica serves translations through the shared store"""
+        shared = MemoryKVStore(shared=True)
+        TranslationCache(store=KVTranslationStore(shared)).set("it", "en", "ciao", "hi")
+
+        cache = TranslationCache(store=KVTranslationStore(shared))
+        self.assertEqual(cache.get("it", "en", "ciao"), "hi")
+        self.assertEqual(cache.stats["store_hits"], 1)
+
+    def test_store_failure_is_a_miss(self):
+        store = MagicMock()
+        store.get_many.side_effect = Exception("store down")
+        store.set_many.side_effect = Exception("store down")
+        cache = TranslationCache(store=store)
+
+        cache.set("de", "en", "hallo", "hello")  # Does not raise
+        cache.clear()
+        self.assertIsNone(cache.get("de", "en", "hallo"))
+
+
+if __name__ == "__main__":
+    unittest.main()
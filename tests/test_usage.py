@@ -0,0 +1,106 @@
+"""
+Unit tests for the usage.py module.
+
+Tests token and throughput accounting including:
+- Per-stage aggregation of Ollama response counters
+- Request scoping through context variables
+- Calls made from spawned tasks and coalesced (single-flight) calls
+"""
+
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+
+from api.rag_pipeline.single_flight import SingleFlight
+from api.rag_pipeline.usage import (
+    RequestUsage,
+    current_usage,
+    record_usage,
+    start_request_usage,
+)
+
+RESPONSE = {
+    "prompt_eval_count": 800,
+    "prompt_eval_duration": 400_000_000,
+    "eval_count": 100,
+    "eval_duration": 2_000_000_000,
+    "total_duration": 2_500_000_000,
+}
+
+
+class TestUsage(unittest.TestCase):
+    def test_per_stage_totals(self):
+        usage = RequestUsage()
+        usage.add("answer", RESPONSE)
+        usage.add("rerank", {"prompt_eval_count": 200, "eval_count": 2})
+        usage.add("rerank", {"prompt_eval_count": 210, "eval_count": 1})
+
+        self.assertEqual(usage.stages["rerank"]["calls"], 2)
+        self.assertEqual(usage.stages["rerank"]["prompt_tokens"], 410)
+        self.assertAlmostEqual(usage.stages["answer"]["eval_seconds"], 2.0)
+
+        totals = usage.to_dict()
+        self.assertEqual(totals["calls"], 3)
+        self.assertEqual(totals["prompt_tokens"], 1210)
+        self.assertEqual(totals["output_tokens"], 103)
+        self.assertAlmostEqual(totals["total_seconds"], 2.5)
+
+    def test_outside_request_is_ignored(self):
+        async def run():
+            record_usage("answer", RESPONSE)
+            return current_usage()
+
+        self.assertIsNone(asyncio.run(run()))
+
+    def test_requests_are_isolated(self):
+        async def request(stage, calls):
+            usage = start_request_usage()
+            for _ in range(calls):
+                await asyncio.sleep(0)
+                record_usage(stage, RESPONSE)
+            return usage
+
+        async def run():
+            return await asyncio.gather(request("answer", 2), request("safety", 1))
+
+        first, second = asyncio.run(run())
+        self.assertEqual(first.totals()["calls"], 2)
+        self.assertEqual(list(second.stages), ["safety"])
+
+    def test_spawned_tasks_are_counted(self):
+        async def run():
+            usage = start_request_usage()
+
+            async def call():
+                record_usage("rerank", RESPONSE)
+
+            await asyncio.gather(*(asyncio.create_task(call()) for _ in range(3)))
+            return usage
+
+        self.assertEqual(asyncio.run(run()).stages["rerank"]["calls"], 3)
+
+    @patch("api.rag_pipeline.single_flight.logger", MagicMock())
+    def test_coalesced_call_counted_once(self):
+        """A shared upstream call is charged to the request that made it"""
+        flight = SingleFlight("test", enabled=True)
+
+        async def call():
+            await asyncio.sleep(0.01)
+            record_usage("answer", RESPONSE)
+            return "answer"
+
+        async def request():
+            usage = start_request_usage()
+            await flight.do("key", call)
+            return usage
+
+        async def run():
+            return await asyncio.gather(request(), request())
+
+        leader, follower = asyncio.run(run())
+        self.assertEqual(leader.totals()["calls"], 1)
+        self.assertEqual(follower.totals()["calls"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()